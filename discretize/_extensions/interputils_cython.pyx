@@ -3,8 +3,18 @@
 import numpy as np
 import cython
 cimport numpy as np
+from cython.parallel cimport prange
+from libc.math cimport fabs, floor
 import scipy.sparse as sp
 
+ctypedef fused index_t:
+    np.int32_t
+    np.int64_t
+
+ctypedef fused scalar_t:
+    np.float64_t
+    np.complex128_t
+
 def _interp_point_1D(np.ndarray[np.float64_t, ndim=1] x, float xr_i):
     """
         given a point, xr_i, this will find which two integers it lies between.
@@ -14,8 +24,8 @@ def _interp_point_1D(np.ndarray[np.float64_t, ndim=1] x, float xr_i):
         :rtype: int,int,float,float
         :return: index1, index2, portion1, portion2
     """
-    cdef IIFF xs
-    _get_inds_ws(x,xr_i,&xs)
+    cdef np.float64_t[::1] xc = np.ascontiguousarray(x)
+    cdef IIFF xs = _get_inds_ws(&xc[0], xc.shape[0], xr_i)
     return xs.i1,xs.i2,xs.w1,xs.w2
 
 cdef struct IIFF:
@@ -48,137 +58,203 @@ cdef np.int64_t _bisect_right(np.float64_t[:] a, np.float64_t x) nogil:
       else: lo = mid+1
     return lo
 
-@cython.boundscheck(False)
-@cython.wraparound(False)
-@cython.nonecheck(False)
 @cython.cdivision(True)
-cdef void _get_inds_ws(np.float64_t[:] x, np.float64_t xp, IIFF* out) nogil:
-    cdef np.int64_t ind = _bisect_right(x,xp)
-    cdef np.int64_t nx = x.shape[0]
-    out.i2 = ind
-    out.i1 = ind-1
-    out.i2 = max(min(out.i2,nx-1),0)
-    out.i1 = max(min(out.i1,nx-1),0)
+cdef inline IIFF _get_inds_ws(
+    const np.float64_t* x, np.int64_t nx, np.float64_t xp
+) noexcept nogil:
+    # takes a pointer to the (contiguous) nodes to avoid memoryview reference
+    # counting on every call inside the parallel loops
+    cdef IIFF out
+    cdef np.int64_t lo = 0, hi = nx, mid
+    while lo < hi:
+        mid = (lo+hi)//2
+        if xp < x[mid]: hi = mid
+        else: lo = mid+1
+    out.i2 = max(min(lo,nx-1),0)
+    out.i1 = max(min(lo-1,nx-1),0)
     if(out.i1==out.i2):
         out.w1 = 0.5
     else:
         out.w1 = (x[out.i2]-xp)/(x[out.i2]-x[out.i1])
     out.w2 = 1-out.w1
+    return out
+
+@cython.cdivision(True)
+cdef inline IIFF _get_inds_dws(
+    const np.float64_t* x, np.int64_t nx, np.float64_t xp
+) noexcept nogil:
+    # the derivative of the weights of _get_inds_ws with respect to xp, which is
+    # zero outside of the grid where the interpolant is clamped to the end nodes
+    cdef IIFF out
+    cdef np.int64_t lo = 0, hi = nx, mid
+    while lo < hi:
+        mid = (lo+hi)//2
+        if xp < x[mid]: hi = mid
+        else: lo = mid+1
+    out.i2 = max(min(lo,nx-1),1) if nx > 1 else 0
+    out.i1 = max(out.i2-1,0)
+    if(out.i1==out.i2 or xp < x[0] or xp > x[nx-1]):
+        out.w1 = 0.0
+        out.w2 = 0.0
+    else:
+        out.w2 = 1.0/(x[out.i2]-x[out.i1])
+        out.w1 = -out.w2
+    return out
+
+cdef inline IIFF _get_inds(
+    const np.float64_t* x, np.int64_t nx, np.float64_t xp, bint derivative
+) noexcept nogil:
+    if derivative:
+        return _get_inds_dws(x, nx, xp)
+    return _get_inds_ws(x, nx, xp)
+
+# The kernels below fill the ``indices`` and ``data`` arrays of a CSR matrix with
+# 2**dim entries per point (row), ordered by increasing (Fortran ordered) column.
+# Points on or beyond the ends of the grid give duplicate columns in their row.
+# If ``derivative`` is an axis, they fill the derivative of the interpolation along
+# that axis instead.
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.nonecheck(False)
-def _interpmat1D(np.ndarray[np.float64_t, ndim=1] locs,
-                   np.ndarray[np.float64_t, ndim=1] x):
-    cdef int nx = x.size
+def _interpmat1D(const np.float64_t[:] locs, const np.float64_t[::1] x,
+                 index_t[:] indices, np.float64_t[:] data, int derivative=-1):
+    cdef np.int64_t npts = locs.shape[0]
+    cdef np.int64_t i
     cdef IIFF xs
-    cdef int npts = locs.shape[0]
-    cdef int i
 
-    cdef np.ndarray[np.int64_t,ndim=1] inds = np.empty(npts*2,dtype=np.int64)
-    cdef np.ndarray[np.float64_t,ndim=1] vals = np.empty(npts*2,dtype=np.float64)
-    for i in range(npts):
-        _get_inds_ws(x,locs[i],&xs)
+    for i in prange(npts, nogil=True, schedule='static'):
+        xs = _get_inds(&x[0], x.shape[0], locs[i], derivative == 0)
 
-        inds[2*i  ] = xs.i1
-        inds[2*i+1] = xs.i2
-        vals[2*i  ] = xs.w1
-        vals[2*i+1] = xs.w2
+        indices[2*i  ] = xs.i1
+        indices[2*i+1] = xs.i2
+        data[2*i  ] = xs.w1
+        data[2*i+1] = xs.w2
 
-    return inds,vals
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def _interpmat2D(const np.float64_t[:, :] locs, const np.float64_t[::1] x, const np.float64_t[::1] y,
+                 index_t[:] indices, np.float64_t[:] data, int derivative=-1):
+    cdef np.int64_t nx = x.shape[0]
+    cdef np.int64_t npts = locs.shape[0]
+    cdef np.int64_t i
+    cdef IIFF xs, ys
+
+    for i in prange(npts, nogil=True, schedule='static'):
+        xs = _get_inds(&x[0], x.shape[0], locs[i, 0], derivative == 0)
+        ys = _get_inds(&y[0], y.shape[0], locs[i, 1], derivative == 1)
+
+        indices[4*i  ] = xs.i1 + nx*ys.i1
+        indices[4*i+1] = xs.i2 + nx*ys.i1
+        indices[4*i+2] = xs.i1 + nx*ys.i2
+        indices[4*i+3] = xs.i2 + nx*ys.i2
+
+        data[4*i  ] = xs.w1*ys.w1
+        data[4*i+1] = xs.w2*ys.w1
+        data[4*i+2] = xs.w1*ys.w2
+        data[4*i+3] = xs.w2*ys.w2
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.nonecheck(False)
-def _interpmat2D(np.ndarray[np.float64_t, ndim=2] locs,
-                   np.ndarray[np.float64_t, ndim=1] x,
-                   np.ndarray[np.float64_t, ndim=1] y):
-    cdef int nx,ny
-    nx,ny = len(x),len(y)
-    cdef int npts = locs.shape[0]
-    cdef int i
-    cdef IIFF xs,ys
-
-    cdef np.ndarray[np.int64_t,ndim=2] inds = np.empty((npts*4,2),dtype=np.int64)
-    cdef np.ndarray[np.float64_t,ndim=1] vals = np.empty(npts*4,dtype=np.float64)
-    for i in range(npts):
-        _get_inds_ws(x,locs[i,0],&xs)
-        _get_inds_ws(y,locs[i,1],&ys)
-
-        inds[4*i  ,0] = xs.i1
-        inds[4*i+1,0] = xs.i1
-        inds[4*i+2,0] = xs.i2
-        inds[4*i+3,0] = xs.i2
-        inds[4*i  ,1] = ys.i1
-        inds[4*i+1,1] = ys.i2
-        inds[4*i+2,1] = ys.i1
-        inds[4*i+3,1] = ys.i2
-
-        vals[4*i  ] = xs.w1*ys.w1
-        vals[4*i+1] = xs.w1*ys.w2
-        vals[4*i+2] = xs.w2*ys.w1
-        vals[4*i+3] = xs.w2*ys.w2
-
-    return inds,vals
+def _interpmat3D(const np.float64_t[:, :] locs, const np.float64_t[::1] x, const np.float64_t[::1] y,
+                 const np.float64_t[::1] z, index_t[:] indices, np.float64_t[:] data,
+                 int derivative=-1):
+    cdef np.int64_t nx = x.shape[0]
+    cdef np.int64_t nxy = x.shape[0]*y.shape[0]
+    cdef np.int64_t npts = locs.shape[0]
+    cdef np.int64_t i
+    cdef IIFF xs, ys, zs
+
+    for i in prange(npts, nogil=True, schedule='static'):
+        xs = _get_inds(&x[0], x.shape[0], locs[i, 0], derivative == 0)
+        ys = _get_inds(&y[0], y.shape[0], locs[i, 1], derivative == 1)
+        zs = _get_inds(&z[0], z.shape[0], locs[i, 2], derivative == 2)
+
+        indices[8*i  ] = xs.i1 + nx*ys.i1 + nxy*zs.i1
+        indices[8*i+1] = xs.i2 + nx*ys.i1 + nxy*zs.i1
+        indices[8*i+2] = xs.i1 + nx*ys.i2 + nxy*zs.i1
+        indices[8*i+3] = xs.i2 + nx*ys.i2 + nxy*zs.i1
+        indices[8*i+4] = xs.i1 + nx*ys.i1 + nxy*zs.i2
+        indices[8*i+5] = xs.i2 + nx*ys.i1 + nxy*zs.i2
+        indices[8*i+6] = xs.i1 + nx*ys.i2 + nxy*zs.i2
+        indices[8*i+7] = xs.i2 + nx*ys.i2 + nxy*zs.i2
+
+        data[8*i  ] = xs.w1*ys.w1*zs.w1
+        data[8*i+1] = xs.w2*ys.w1*zs.w1
+        data[8*i+2] = xs.w1*ys.w2*zs.w1
+        data[8*i+3] = xs.w2*ys.w2*zs.w1
+        data[8*i+4] = xs.w1*ys.w1*zs.w2
+        data[8*i+5] = xs.w2*ys.w1*zs.w2
+        data[8*i+6] = xs.w1*ys.w2*zs.w2
+        data[8*i+7] = xs.w2*ys.w2*zs.w2
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.nonecheck(False)
-def _interpmat3D(np.ndarray[np.float64_t, ndim=2] locs,
-                 np.ndarray[np.float64_t, ndim=1] x,
-                 np.ndarray[np.float64_t, ndim=1] y,
-                 np.ndarray[np.float64_t, ndim=1] z):
-
-    cdef int nx,ny,nz
-    nx,ny,nz = len(x),len(y),len(z)
-    cdef IIFF xs,ys,zs
-    cdef int npts = locs.shape[0]
-    cdef int i
+def _gather_rows(const index_t[:, ::1] indices, const np.float64_t[:, ::1] weights,
+                 const scalar_t[:, ::1] values, scalar_t[:, ::1] out):
+    """out[i] = sum_j weights[i, j] * values[indices[i, j]], in parallel over i."""
+    cdef np.int64_t n = indices.shape[0]
+    cdef np.int64_t width = indices.shape[1]
+    cdef np.int64_t k = values.shape[1]
+    cdef np.int64_t i, j, c
+    cdef np.float64_t w
+    cdef scalar_t s
+    cdef scalar_t* out_row
+    cdef const scalar_t* value_row
+
+    if n == 0 or k == 0:
+        return
+    if k == 1:
+        # accumulate single fields in a register
+        for i in prange(n, nogil=True, schedule='static'):
+            s = 0
+            for j in range(width):
+                s = s + weights[i, j]*values[indices[i, j], 0]
+            out[i, 0] = s
+        return
+    for i in prange(n, nogil=True, schedule='static'):
+        out_row = &out[i, 0]
+        for c in range(k):
+            out_row[c] = 0
+        for j in range(width):
+            w = weights[i, j]
+            value_row = &values[indices[i, j], 0]
+            for c in range(k):
+                out_row[c] = out_row[c] + w*value_row[c]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+def _scatter_rows(const index_t[:, ::1] indices, const np.float64_t[:, ::1] weights,
+                  const scalar_t[:, ::1] values, scalar_t[:, ::1] out):
+    """out[indices[i, j]] += weights[i, j] * values[i], the adjoint of _gather_rows.
+
+    This runs serially, as different rows scatter to the same entries of out.
+    """
+    cdef np.int64_t n = indices.shape[0]
+    cdef np.int64_t width = indices.shape[1]
+    cdef np.int64_t k = values.shape[1]
+    cdef np.int64_t i, j, c
+    cdef np.float64_t w
+    cdef scalar_t* out_row
+    cdef const scalar_t* value_row
+
+    out[:, :] = 0
+    if n == 0 or k == 0:
+        return
+    with nogil:
+        for i in range(n):
+            value_row = &values[i, 0]
+            for j in range(width):
+                w = weights[i, j]
+                out_row = &out[indices[i, j], 0]
+                for c in range(k):
+                    out_row[c] = out_row[c] + w*value_row[c]
 
-    cdef np.ndarray[np.int64_t,ndim=2] inds = np.empty((npts*8,3),dtype=np.int64)
-    cdef np.ndarray[np.float64_t,ndim=1] vals = np.empty(npts*8,dtype=np.float64)
-    for i in range(npts):
-        _get_inds_ws(x,locs[i,0],&xs)
-        _get_inds_ws(y,locs[i,1],&ys)
-        _get_inds_ws(z,locs[i,2],&zs)
-
-        inds[8*i  ,0] = xs.i1
-        inds[8*i+1,0] = xs.i1
-        inds[8*i+2,0] = xs.i2
-        inds[8*i+3,0] = xs.i2
-        inds[8*i+4,0] = xs.i1
-        inds[8*i+5,0] = xs.i1
-        inds[8*i+6,0] = xs.i2
-        inds[8*i+7,0] = xs.i2
-
-        inds[8*i  ,1] = ys.i1
-        inds[8*i+1,1] = ys.i2
-        inds[8*i+2,1] = ys.i1
-        inds[8*i+3,1] = ys.i2
-        inds[8*i+4,1] = ys.i1
-        inds[8*i+5,1] = ys.i2
-        inds[8*i+6,1] = ys.i1
-        inds[8*i+7,1] = ys.i2
-
-        inds[8*i  ,2] = zs.i1
-        inds[8*i+1,2] = zs.i1
-        inds[8*i+2,2] = zs.i1
-        inds[8*i+3,2] = zs.i1
-        inds[8*i+4,2] = zs.i2
-        inds[8*i+5,2] = zs.i2
-        inds[8*i+6,2] = zs.i2
-        inds[8*i+7,2] = zs.i2
-
-        vals[8*i  ] = xs.w1*ys.w1*zs.w1
-        vals[8*i+1] = xs.w1*ys.w2*zs.w1
-        vals[8*i+2] = xs.w2*ys.w1*zs.w1
-        vals[8*i+3] = xs.w2*ys.w2*zs.w1
-        vals[8*i+4] = xs.w1*ys.w1*zs.w2
-        vals[8*i+5] = xs.w1*ys.w2*zs.w2
-        vals[8*i+6] = xs.w2*ys.w1*zs.w2
-        vals[8*i+7] = xs.w2*ys.w2*zs.w2
-
-    return inds,vals
 
 @cython.boundscheck(False)
 @cython.cdivision(True)
@@ -328,3 +404,459 @@ def _volume_avg_weights(np.float64_t[:] x1, np.float64_t[:] x2):
     ix1 = ix1[:ii]
     ix2 = ix2[:ii]
     return hs, ix1, ix2
+
+
+# Overlaps of general meshes, for conservative volume averaging between meshes whose
+# cells are decomposed into triangles (2D) or tetrahedra (3D).
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _bucket_grid(
+    np.float64_t[:, ::1] box_min, np.float64_t[:, ::1] box_max, lower, upper
+):
+    """Sort boxes into a uniform grid of buckets.
+
+    The grid spans ``lower`` to ``upper`` with about as many (roughly cubic)
+    buckets as boxes, and every box is added to the buckets it covers (boxes
+    beyond the grid are added to its outermost buckets).
+
+    Returns
+    -------
+    lower, width : (3) numpy.ndarray of float
+        The lower corner of the grid, and the widths of its buckets.
+    shape : (3) numpy.ndarray of int
+        The number of buckets along each axis, with a single bucket along the
+        axes beyond the dimension of the boxes. Bucket ``(i, j, k)`` is number
+        ``i + shape[0]*(j + shape[1]*k)``.
+    bucket_ptr, bucket_items : numpy.ndarray of int
+        The boxes in bucket ``b`` are ``bucket_items[bucket_ptr[b]:bucket_ptr[b + 1]]``.
+    """
+    cdef np.int64_t n = box_min.shape[0]
+    cdef int dim = box_min.shape[1]
+    cdef int d
+    extent = np.asarray(upper, dtype=np.float64) - lower
+    width_arr = (np.prod(extent)/max(n, 1))**(1.0/dim)*np.ones(dim)
+    shape_arr = np.clip(np.ceil(extent/width_arr), 1, max(n, 1)).astype(np.int64)
+    width_arr = extent/shape_arr
+
+    # pad to three dimensions, with a single bucket along the missing axes
+    lo_arr = np.zeros(3)
+    lo_arr[:dim] = lower
+    wide_arr = np.ones(3)
+    wide_arr[:dim] = width_arr
+    buckets_arr = np.ones(3, dtype=np.int64)
+    buckets_arr[:dim] = shape_arr
+    cdef np.float64_t[:] lo = lo_arr
+    cdef np.float64_t[:] width = wide_arr
+    cdef np.int64_t[:] shape = buckets_arr
+    cdef np.int64_t n_buckets = shape[0]*shape[1]*shape[2]
+
+    cdef np.int64_t[:, ::1] b_lo = np.zeros((n, 3), dtype=np.int64)
+    cdef np.int64_t[:, ::1] b_hi = np.zeros((n, 3), dtype=np.int64)
+    cdef np.int64_t ib, i, j, k, bucket
+    for ib in range(n):
+        for d in range(dim):
+            b_lo[ib, d] = _bucket(box_min[ib, d], lo[d], width[d], shape[d])
+            b_hi[ib, d] = _bucket(box_max[ib, d], lo[d], width[d], shape[d])
+    bucket_ptr_arr = np.zeros(n_buckets + 1, dtype=np.int64)
+    cdef np.int64_t[:] bucket_ptr = bucket_ptr_arr
+    for ib in range(n):
+        for k in range(b_lo[ib, 2], b_hi[ib, 2] + 1):
+            for j in range(b_lo[ib, 1], b_hi[ib, 1] + 1):
+                for i in range(b_lo[ib, 0], b_hi[ib, 0] + 1):
+                    bucket_ptr[(k*shape[1] + j)*shape[0] + i + 1] += 1
+    np.cumsum(bucket_ptr_arr, out=bucket_ptr_arr)
+    fill_arr = bucket_ptr_arr[:n_buckets].copy()
+    cdef np.int64_t[:] fill = fill_arr
+    bucket_items_arr = np.empty(bucket_ptr[n_buckets], dtype=np.int64)
+    cdef np.int64_t[:] bucket_items = bucket_items_arr
+    for ib in range(n):
+        for k in range(b_lo[ib, 2], b_hi[ib, 2] + 1):
+            for j in range(b_lo[ib, 1], b_hi[ib, 1] + 1):
+                for i in range(b_lo[ib, 0], b_hi[ib, 0] + 1):
+                    bucket = (k*shape[1] + j)*shape[0] + i
+                    bucket_items[fill[bucket]] = ib
+                    fill[bucket] += 1
+    return lo_arr, wide_arr, buckets_arr, bucket_ptr_arr, bucket_items_arr
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _box_overlap_pairs(
+    np.float64_t[:, ::1] a_min, np.float64_t[:, ::1] a_max,
+    np.float64_t[:, ::1] b_min, np.float64_t[:, ::1] b_max
+):
+    """Find all pairs of boxes from two sets whose interiors overlap.
+
+    The ``b`` boxes are sorted into a uniform grid of buckets spanning the common
+    extent of both sets, with about as many buckets as boxes. Each ``a`` box then
+    tests the ``b`` boxes of the buckets it covers, in parallel, and reports a pair
+    only from the bucket holding the lower corner of their intersection so that
+    every pair is found once.
+    """
+    cdef np.int64_t na = a_min.shape[0], nb = b_min.shape[0]
+    cdef int dim = a_min.shape[1]
+    cdef np.int64_t ia
+    empty = np.empty(0, dtype=np.int64)
+    if na == 0 or nb == 0:
+        return empty, empty
+
+    lower = np.maximum(np.min(a_min, axis=0), np.min(b_min, axis=0))
+    upper = np.minimum(np.max(a_max, axis=0), np.max(b_max, axis=0))
+    if np.any(upper <= lower):
+        return empty, empty
+    cdef np.float64_t[:] lo, width
+    cdef np.int64_t[:] shape, bucket_ptr, bucket_items
+    lo, width, shape, bucket_ptr, bucket_items = _bucket_grid(b_min, b_max, lower, upper)
+
+    # count, then gather, the pairs of every a box in parallel
+    counts_arr = np.zeros(na + 1, dtype=np.int64)
+    cdef np.int64_t[:] counts = counts_arr
+    for ia in prange(na, nogil=True, schedule='dynamic', chunksize=256):
+        counts[ia + 1] = _box_pairs(
+            ia, a_min, a_max, b_min, b_max, dim, lo, width, shape,
+            bucket_ptr, bucket_items, NULL
+        )
+    np.cumsum(counts_arr, out=counts_arr)
+    pair_a = np.empty(counts[na], dtype=np.int64)
+    pair_b_arr = np.empty(counts[na], dtype=np.int64)
+    cdef np.int64_t[:] pair_b = pair_b_arr
+    for ia in prange(na, nogil=True, schedule='dynamic', chunksize=256):
+        if counts[ia + 1] > counts[ia]:
+            _box_pairs(
+                ia, a_min, a_max, b_min, b_max, dim, lo, width, shape,
+                bucket_ptr, bucket_items, &pair_b[counts[ia]]
+            )
+    pair_a[:] = np.repeat(np.arange(na, dtype=np.int64), np.diff(counts_arr))
+    return pair_a, pair_b_arr
+
+
+@cython.cdivision(True)
+cdef inline np.int64_t _bucket(
+    np.float64_t x, np.float64_t lo, np.float64_t width, np.int64_t n
+) noexcept nogil:
+    cdef np.int64_t i = <np.int64_t> floor((x - lo)/width)
+    return min(max(i, 0), n - 1)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef np.int64_t _box_pairs(
+    np.int64_t ia, np.float64_t[:, ::1] a_min, np.float64_t[:, ::1] a_max,
+    np.float64_t[:, ::1] b_min, np.float64_t[:, ::1] b_max, int dim,
+    np.float64_t[:] lo, np.float64_t[:] width, np.int64_t[:] shape,
+    np.int64_t[:] bucket_ptr, np.int64_t[:] bucket_items, np.int64_t* out
+) noexcept nogil:
+    # count (and write to out, if given) the b boxes overlapping box ia
+    cdef np.int64_t a_lo[3]
+    cdef np.int64_t a_hi[3]
+    cdef np.int64_t corner[3]
+    cdef np.int64_t i, j, k, ii, ib, bucket, n = 0
+    cdef int d
+    cdef bint overlaps
+    for d in range(3):
+        if d < dim:
+            a_lo[d] = _bucket(a_min[ia, d], lo[d], width[d], shape[d])
+            a_hi[d] = _bucket(a_max[ia, d], lo[d], width[d], shape[d])
+        else:
+            a_lo[d] = a_hi[d] = corner[d] = 0
+    for k in range(a_lo[2], a_hi[2] + 1):
+        for j in range(a_lo[1], a_hi[1] + 1):
+            for i in range(a_lo[0], a_hi[0] + 1):
+                bucket = (k*shape[1] + j)*shape[0] + i
+                for ii in range(bucket_ptr[bucket], bucket_ptr[bucket + 1]):
+                    ib = bucket_items[ii]
+                    overlaps = True
+                    for d in range(dim):
+                        if (
+                            max(a_min[ia, d], b_min[ib, d])
+                            >= min(a_max[ia, d], b_max[ib, d])
+                        ):
+                            overlaps = False
+                            break
+                        corner[d] = _bucket(
+                            max(a_min[ia, d], b_min[ib, d]), lo[d], width[d], shape[d]
+                        )
+                    if (
+                        overlaps and corner[0] == i and corner[1] == j
+                        and corner[2] == k
+                    ):
+                        if out != NULL:
+                            out[n] = ib
+                        n = n + 1
+    return n
+
+
+cdef inline bint _boxes_overlap(
+    const double* a_min, const double* a_max, const double* b_min,
+    const double* b_max, int dim
+) noexcept nogil:
+    cdef int d
+    for d in range(dim):
+        if a_min[d] >= b_max[d] or b_min[d] >= a_max[d]:
+            return False
+    return True
+
+
+cdef inline double _tet_volume(const double* p) noexcept nogil:
+    cdef double ax = p[3] - p[0], ay = p[4] - p[1], az = p[5] - p[2]
+    cdef double bx = p[6] - p[0], by = p[7] - p[1], bz = p[8] - p[2]
+    cdef double cx = p[9] - p[0], cy = p[10] - p[1], cz = p[11] - p[2]
+    return fabs(ax*(by*cz - bz*cy) - ay*(bx*cz - bz*cx) + az*(bx*cy - by*cx))/6.0
+
+
+@cython.cdivision(True)
+cdef double _tri_overlap(const double* a, const double* b) noexcept nogil:
+    # area of the intersection of triangles a and b, by clipping a with the
+    # half-planes of b's edges
+    cdef double poly[2][16]
+    cdef int n = 3, m, cur = 0, e, i, i1
+    cdef double nx, ny, c, dp, dq, t, area
+    cdef const double* p
+    cdef const double* q
+    cdef const double* r
+    for i in range(6):
+        poly[0][i] = a[i]
+    for e in range(3):
+        p = &b[2*e]
+        q = &b[2*((e + 1) % 3)]
+        r = &b[2*((e + 2) % 3)]
+        # outward normal of the edge pq
+        nx = q[1] - p[1]
+        ny = p[0] - q[0]
+        c = nx*p[0] + ny*p[1]
+        if nx*r[0] + ny*r[1] - c > 0:
+            nx = -nx
+            ny = -ny
+            c = -c
+        m = 0
+        for i in range(n):
+            i1 = (i + 1) % n
+            dp = nx*poly[cur][2*i] + ny*poly[cur][2*i + 1] - c
+            dq = nx*poly[cur][2*i1] + ny*poly[cur][2*i1 + 1] - c
+            if dp <= 0:
+                poly[1 - cur][2*m] = poly[cur][2*i]
+                poly[1 - cur][2*m + 1] = poly[cur][2*i + 1]
+                m = m + 1
+            if (dp <= 0) != (dq <= 0):
+                t = dp/(dp - dq)
+                poly[1 - cur][2*m] = poly[cur][2*i] + t*(poly[cur][2*i1] - poly[cur][2*i])
+                poly[1 - cur][2*m + 1] = (
+                    poly[cur][2*i + 1] + t*(poly[cur][2*i1 + 1] - poly[cur][2*i + 1])
+                )
+                m = m + 1
+        cur = 1 - cur
+        n = m
+        if n < 3:
+            return 0.0
+    area = 0.0
+    for i in range(n):
+        i1 = (i + 1) % n
+        area = area + poly[cur][2*i]*poly[cur][2*i1 + 1] - poly[cur][2*i1]*poly[cur][2*i + 1]
+    return 0.5*fabs(area)
+
+
+cdef void _tet_planes(const double* b, double* planes) noexcept nogil:
+    # outward normals and offsets of the faces of tetrahedron b, as (nx, ny, nz, c)
+    cdef int f, i, j, k
+    cdef double ux, uy, uz, vx, vy, vz, nx, ny, nz, c
+    for f in range(4):
+        i = 3*((f + 1) % 4)
+        j = 3*((f + 2) % 4)
+        k = 3*((f + 3) % 4)
+        ux = b[j] - b[i]
+        uy = b[j + 1] - b[i + 1]
+        uz = b[j + 2] - b[i + 2]
+        vx = b[k] - b[i]
+        vy = b[k + 1] - b[i + 1]
+        vz = b[k + 2] - b[i + 2]
+        nx = uy*vz - uz*vy
+        ny = uz*vx - ux*vz
+        nz = ux*vy - uy*vx
+        c = nx*b[i] + ny*b[i + 1] + nz*b[i + 2]
+        if nx*b[3*f] + ny*b[3*f + 1] + nz*b[3*f + 2] - c > 0:
+            nx = -nx
+            ny = -ny
+            nz = -nz
+            c = -c
+        planes[4*f] = nx
+        planes[4*f + 1] = ny
+        planes[4*f + 2] = nz
+        planes[4*f + 3] = c
+
+
+cdef inline int _n_inside(const double* planes, const double* p) noexcept nogil:
+    # number of the 4 points p inside of every plane, or -1 if all of the points
+    # are outside of one of the planes
+    cdef int f, i, n_in = 4, n_out
+    cdef bint inside[4]
+    for i in range(4):
+        inside[i] = True
+    for f in range(4):
+        n_out = 0
+        for i in range(4):
+            if (
+                planes[4*f]*p[3*i] + planes[4*f + 1]*p[3*i + 1]
+                + planes[4*f + 2]*p[3*i + 2] - planes[4*f + 3] > 0
+            ):
+                inside[i] = False
+                n_out = n_out + 1
+        if n_out == 4:
+            return -1
+    n_in = 0
+    for i in range(4):
+        n_in = n_in + inside[i]
+    return n_in
+
+
+cdef inline void _lerp(
+    const double* p, const double* q, double dp, double dq, double* out
+) noexcept nogil:
+    cdef double t = dp/(dp - dq)
+    out[0] = p[0] + t*(q[0] - p[0])
+    out[1] = p[1] + t*(q[1] - p[1])
+    out[2] = p[2] + t*(q[2] - p[2])
+
+
+cdef inline void _put_tet(
+    double* out, const double* p0, const double* p1, const double* p2,
+    const double* p3
+) noexcept nogil:
+    cdef int i
+    for i in range(3):
+        out[i] = p0[i]
+        out[3 + i] = p1[i]
+        out[6 + i] = p2[i]
+        out[9 + i] = p3[i]
+
+
+@cython.cdivision(True)
+cdef double _tet_overlap(const double* a, const double* b) noexcept nogil:
+    # volume of the intersection of tetrahedra a and b, by clipping a with the
+    # planes of b's faces, keeping the clipped region as a set of tetrahedra
+    cdef double planes_a[16]
+    cdef double planes_b[16]
+    cdef double tets[2][81*12]
+    cdef double pts[6*3]
+    cdef double d[4]
+    cdef int ins[4]
+    cdef int outs[4]
+    cdef int n = 1, m, cur = 0, f, t, i, n_in, n_out
+    cdef double* tet
+    cdef double* o
+    cdef double vol_a = _tet_volume(a), vol_b = _tet_volume(b), vol
+
+    if vol_a == 0 or vol_b == 0:
+        return 0.0
+    _tet_planes(b, planes_b)
+    n_in = _n_inside(planes_b, a)
+    if n_in == -1:
+        return 0.0
+    if n_in == 4:
+        return vol_a
+    _tet_planes(a, planes_a)
+    n_in = _n_inside(planes_a, b)
+    if n_in == -1:
+        return 0.0
+    if n_in == 4:
+        return vol_b
+
+    for i in range(12):
+        tets[0][i] = a[i]
+    for f in range(4):
+        m = 0
+        for t in range(n):
+            tet = &tets[cur][12*t]
+            n_in = n_out = 0
+            for i in range(4):
+                d[i] = (
+                    planes_b[4*f]*tet[3*i] + planes_b[4*f + 1]*tet[3*i + 1]
+                    + planes_b[4*f + 2]*tet[3*i + 2] - planes_b[4*f + 3]
+                )
+                if d[i] <= 0:
+                    ins[n_in] = i
+                    n_in = n_in + 1
+                else:
+                    outs[n_out] = i
+                    n_out = n_out + 1
+            o = &tets[1 - cur][12*m]
+            if n_in == 4:
+                for i in range(12):
+                    o[i] = tet[i]
+                m = m + 1
+            elif n_in == 1:
+                for i in range(3):
+                    _lerp(&tet[3*ins[0]], &tet[3*outs[i]], d[ins[0]], d[outs[i]], &pts[3*i])
+                _put_tet(o, &tet[3*ins[0]], &pts[0], &pts[3], &pts[6])
+                m = m + 1
+            elif n_in == 3:
+                # prism between the inside face and its cut by the plane
+                for i in range(3):
+                    _lerp(&tet[3*ins[i]], &tet[3*outs[0]], d[ins[i]], d[outs[0]], &pts[3*i])
+                _put_tet(o, &tet[3*ins[0]], &tet[3*ins[1]], &tet[3*ins[2]], &pts[0])
+                _put_tet(&o[12], &tet[3*ins[1]], &tet[3*ins[2]], &pts[0], &pts[3])
+                _put_tet(&o[24], &tet[3*ins[2]], &pts[0], &pts[3], &pts[6])
+                m = m + 3
+            elif n_in == 2:
+                # prism between the two inside points' cuts of the outside edges
+                _lerp(&tet[3*ins[0]], &tet[3*outs[0]], d[ins[0]], d[outs[0]], &pts[0])
+                _lerp(&tet[3*ins[0]], &tet[3*outs[1]], d[ins[0]], d[outs[1]], &pts[3])
+                _lerp(&tet[3*ins[1]], &tet[3*outs[0]], d[ins[1]], d[outs[0]], &pts[6])
+                _lerp(&tet[3*ins[1]], &tet[3*outs[1]], d[ins[1]], d[outs[1]], &pts[9])
+                _put_tet(o, &tet[3*ins[0]], &pts[0], &pts[3], &tet[3*ins[1]])
+                _put_tet(&o[12], &pts[0], &pts[3], &tet[3*ins[1]], &pts[6])
+                _put_tet(&o[24], &pts[3], &tet[3*ins[1]], &pts[6], &pts[9])
+                m = m + 3
+        cur = 1 - cur
+        n = m
+        if n == 0:
+            return 0.0
+    vol = 0.0
+    for t in range(n):
+        vol = vol + _tet_volume(&tets[cur][12*t])
+    return vol
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _simplex_overlap_volumes(
+    const np.int64_t[:] pair_a, const np.int64_t[:] pair_b,
+    const np.float64_t[:, :, ::1] a_simplices, const np.int64_t[:] a_ptr,
+    const np.float64_t[:] a_scale,
+    const np.float64_t[:, :, ::1] b_simplices, const np.int64_t[:] b_ptr,
+    const np.float64_t[:] b_scale,
+    np.float64_t[:] out,
+):
+    """Overlap volumes of pairs of cells decomposed into simplices, in parallel.
+
+    The simplices of cell ``i`` of each set are ``simplices[ptr[i]:ptr[i + 1]]``,
+    and the overlap of every pair of simplices is multiplied by both their scales.
+    """
+    cdef np.int64_t n_pairs = pair_a.shape[0]
+    cdef int dim = a_simplices.shape[2]
+    cdef np.int64_t p, s, t
+    cdef double v
+    if n_pairs == 0:
+        return
+    # bounding boxes of the simplices, to skip the clipping of disjoint pairs
+    cdef np.float64_t[:, ::1] a_min = np.min(a_simplices, axis=1)
+    cdef np.float64_t[:, ::1] a_max = np.max(a_simplices, axis=1)
+    cdef np.float64_t[:, ::1] b_min = np.min(b_simplices, axis=1)
+    cdef np.float64_t[:, ::1] b_max = np.max(b_simplices, axis=1)
+    for p in prange(n_pairs, nogil=True, schedule='dynamic', chunksize=64):
+        v = 0.0
+        for s in range(a_ptr[pair_a[p]], a_ptr[pair_a[p] + 1]):
+            for t in range(b_ptr[pair_b[p]], b_ptr[pair_b[p] + 1]):
+                if not _boxes_overlap(
+                    &a_min[s, 0], &a_max[s, 0], &b_min[t, 0], &b_max[t, 0], dim
+                ):
+                    continue
+                if dim == 2:
+                    v = v + a_scale[s]*b_scale[t]*_tri_overlap(
+                        &a_simplices[s, 0, 0], &b_simplices[t, 0, 0]
+                    )
+                else:
+                    v = v + a_scale[s]*b_scale[t]*_tet_overlap(
+                        &a_simplices[s, 0, 0], &b_simplices[t, 0, 0]
+                    )
+        out[p] = v
@@ -0,0 +1,89 @@
+# cython: embedsignature=True, language_level=3
+# cython: linetrace=True
+import numpy as np
+import cython
+cimport numpy as np
+from cython.parallel cimport prange
+
+ctypedef fused scalar_t:
+    np.float64_t
+    np.complex128_t
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline void _invert_2x2(
+    scalar_t[:, :, :] A, np.int64_t i, scalar_t[:] out, np.int64_t start,
+    np.int64_t stride
+) noexcept nogil:
+    # writes the inverse of block i to out[start + row*stride + col], singular
+    # blocks give inf/nan entries
+    cdef scalar_t a11 = A[i, 0, 0], a12 = A[i, 0, 1]
+    cdef scalar_t a21 = A[i, 1, 0], a22 = A[i, 1, 1]
+    cdef scalar_t det_inv = 1.0/(a11*a22 - a21*a12)
+    out[start] = a22*det_inv
+    out[start + 1] = -a12*det_inv
+    out[start + stride] = -a21*det_inv
+    out[start + stride + 1] = a11*det_inv
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline void _invert_3x3(
+    scalar_t[:, :, :] A, np.int64_t i, scalar_t[:] out, np.int64_t start,
+    np.int64_t stride
+) noexcept nogil:
+    # writes the inverse of block i to out[start + row*stride + col], singular
+    # blocks give inf/nan entries
+    cdef scalar_t a11 = A[i, 0, 0], a12 = A[i, 0, 1], a13 = A[i, 0, 2]
+    cdef scalar_t a21 = A[i, 1, 0], a22 = A[i, 1, 1], a23 = A[i, 1, 2]
+    cdef scalar_t a31 = A[i, 2, 0], a32 = A[i, 2, 1], a33 = A[i, 2, 2]
+    cdef scalar_t b11 = a22*a33 - a23*a32
+    cdef scalar_t b12 = a13*a32 - a12*a33
+    cdef scalar_t b13 = a12*a23 - a13*a22
+    cdef scalar_t det_inv = 1.0/(a11*b11 + a21*b12 + a31*b13)
+    out[start] = b11*det_inv
+    out[start + 1] = b12*det_inv
+    out[start + 2] = b13*det_inv
+    out[start + stride] = (a31*a23 - a21*a33)*det_inv
+    out[start + stride + 1] = (a11*a33 - a31*a13)*det_inv
+    out[start + stride + 2] = (a21*a13 - a11*a23)*det_inv
+    out[start + 2*stride] = (a21*a32 - a31*a22)*det_inv
+    out[start + 2*stride + 1] = (a31*a12 - a11*a32)*det_inv
+    out[start + 2*stride + 2] = (a11*a22 - a21*a12)*det_inv
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _invert_blocks(scalar_t[:, :, :] A, scalar_t[:] out, bint block_major=True):
+    """Invert a set of 2x2 or 3x3 blocks in parallel.
+
+    The inverse of block ``i`` is written to ``out`` either block by block
+    (``out[i*d*d + a*d + b]``), which allows ``out`` to be the memory of ``A`` to
+    invert it in place, or as the data of the CSR block matrix whose block
+    ``(a, b)`` is the diagonal matrix of the ``(a, b)`` entries of every inverse
+    (``out[(a*n + i)*d + b]``).
+    """
+    cdef np.int64_t n = A.shape[0]
+    cdef np.int64_t d = A.shape[1]
+    cdef np.int64_t i
+    if d != 2 and d != 3:
+        raise NotImplementedError("Only supports 2x2 and 3x3 blocks")
+    if out.shape[0] != n*d*d:
+        raise ValueError("out must have n*d*d elements")
+    if d == 2:
+        if block_major:
+            for i in prange(n, nogil=True, schedule='static'):
+                _invert_2x2(A, i, out, 4*i, 2)
+        else:
+            for i in prange(n, nogil=True, schedule='static'):
+                _invert_2x2(A, i, out, 2*i, 2*n)
+    else:
+        if block_major:
+            for i in prange(n, nogil=True, schedule='static'):
+                _invert_3x3(A, i, out, 9*i, 3)
+        else:
+            for i in prange(n, nogil=True, schedule='static'):
+                _invert_3x3(A, i, out, 3*i, 3*n)
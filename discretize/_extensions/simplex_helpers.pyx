@@ -8,6 +8,7 @@ from cython.operator cimport dereference
 cimport cython
 cimport numpy as np
 from cython cimport view
+from cython.parallel cimport prange
 from libc.math cimport sqrt
 
 cdef extern from "triplet.h":
@@ -289,6 +290,90 @@ def _directed_search(
         return np.array(inds), np.array(all_barys)
     return np.array(inds)
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.linetrace(False)
+cdef np.int64_t _bucket_find(
+    np.float64_t[:, :] locs,
+    np.int64_t i,
+    np.float64_t[:] lo,
+    np.float64_t[:] width,
+    np.int64_t[:] shape,
+    np.int64_t[:] bucket_ptr,
+    np.int64_t[:] bucket_items,
+    np.float64_t[:, :, :] transform,
+    np.float64_t[:, :] shift,
+    np.float64_t eps,
+    np.float64_t * bary,
+) noexcept nogil:
+    # returns the first simplex of the bucket holding location i that contains it
+    cdef:
+        int dim = locs.shape[1]
+        int d, j, k
+        np.int64_t bucket = 0, ii, i_simp, ib
+        np.float64_t x
+        np.float64_t barys[4]
+        bint is_inside
+    for d in range(dim - 1, -1, -1):
+        x = (locs[i, d] - lo[d]) / width[d]
+        if not (x >= 0 and x <= shape[d]):
+            return -1
+        ib = <np.int64_t> x
+        if ib == shape[d]:
+            ib = shape[d] - 1
+        bucket = bucket * shape[d] + ib
+    for ii in range(bucket_ptr[bucket], bucket_ptr[bucket + 1]):
+        i_simp = bucket_items[ii]
+        barys[dim] = 1.0
+        is_inside = True
+        for j in range(dim):
+            barys[j] = 0.0
+            for k in range(dim):
+                barys[j] += transform[i_simp, j, k] * (locs[i, k] - shift[i_simp, k])
+            barys[dim] -= barys[j]
+            if barys[j] < -eps:
+                is_inside = False
+                break
+        if is_inside and barys[dim] >= -eps:
+            for j in range(dim + 1):
+                bary[j] = barys[j]
+            return i_simp
+    return -1
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _bucket_search(
+    np.float64_t[:, :] locs,
+    np.float64_t[:] lo,
+    np.float64_t[:] width,
+    np.int64_t[:] shape,
+    np.int64_t[:] bucket_ptr,
+    np.int64_t[:] bucket_items,
+    np.float64_t[:, :, :] transform,
+    np.float64_t[:, :] shift,
+    np.float64_t eps=1E-15,
+):
+    """Find the simplex containing each location using a grid of buckets.
+
+    The grid (from ``interputils_cython._bucket_grid``) holds the simplices whose
+    bounding box overlaps each bucket, so only the simplices of the bucket holding
+    a location are tested. The locations are searched in parallel, and those not
+    contained in any simplex have an index of -1 (and zero barycentric
+    coordinates).
+    """
+    cdef:
+        np.int64_t n_locs = locs.shape[0], i
+        int dim = locs.shape[1]
+        np.int64_t[:] inds = np.empty(n_locs, dtype=np.int64)
+        np.float64_t[:, ::1] all_barys = np.zeros((n_locs, dim + 1), dtype=np.float64)
+    for i in prange(n_locs, nogil=True, schedule='static'):
+        inds[i] = _bucket_find(
+            locs, i, lo, width, shape, bucket_ptr, bucket_items, transform, shift,
+            eps, &all_barys[i, 0]
+        )
+    return np.asarray(inds), np.asarray(all_barys)
+
 @cython.boundscheck(False)
 @cython.cdivision(True)
 def _interp_cc(
@@ -10,6 +10,7 @@ from numpy.math cimport INFINITY
 
 from .tree cimport int_t, Tree as c_Tree, PyWrapper, Node, Edge, Face, Cell as c_Cell
 
+import itertools
 import scipy.sparse as sp
 import numpy as np
 from .interputils_cython cimport _bisect_left, _bisect_right
@@ -308,13 +309,72 @@ cdef int _evaluate_func(void* function, c_Cell* cell) noexcept with gil:
     val = func(pycell)
     return <int> func(pycell)
 
+# maximum number of non-hanging items a single (hanging) face or edge resolves to
+cdef enum:
+    _MAX_EXPAND = 8
+
+cdef int _expand_edge(
+    Edge *edge, double w, np.int64_t offset, np.int64_t *inds, double *ws, int n
+) noexcept nogil:
+    # Resolves a (possibly hanging) edge into its non-hanging parents and weights
+    if edge.hanging:
+        n = _expand_edge(edge.parents[0], 0.5*w, offset, inds, ws, n)
+        return _expand_edge(edge.parents[1], 0.5*w, offset, inds, ws, n)
+    if n < _MAX_EXPAND:
+        inds[n] = edge.index + offset
+        ws[n] = w
+    return n + 1
+
+cdef int _expand_face(
+    Face *face, double w, np.int64_t offset, np.int64_t *inds, double *ws, int n
+) noexcept nogil:
+    # Resolves a (possibly hanging) face into its non-hanging parent
+    while face.hanging:
+        face = face.parent
+    if n < _MAX_EXPAND:
+        inds[n] = face.index + offset
+        ws[n] = w
+    return n + 1
+
+cdef int _expand_cell_items(
+    c_Cell *cell, bint on_faces, int_t dim, np.int64_t *offsets,
+    np.int64_t *inds, double *ws, int *counts
+) noexcept nogil:
+    # Resolves every face (or edge) of a cell, returning the largest count
+    cdef int_t epc = 1<<(dim-1)
+    cdef int_t n_slots = 2*dim if on_faces else dim*epc
+    cdef int_t s, a, side, k = 0
+    cdef int n_max = 0
+    for s in range(n_slots):
+        k = s*_MAX_EXPAND
+        if on_faces:
+            a = s//2
+            side = s%2
+            if dim == 2:
+                # 2D faces are the edges of the perpendicular direction
+                counts[s] = _expand_edge(
+                    cell.edges[2*(1 - a) + side], 1.0, offsets[a], &inds[k], &ws[k], 0
+                )
+            else:
+                counts[s] = _expand_face(
+                    cell.faces[s], 1.0, offsets[a], &inds[k], &ws[k], 0
+                )
+        else:
+            a = s//epc
+            counts[s] = _expand_edge(
+                cell.edges[s], 1.0, offsets[a], &inds[k], &ws[k], 0
+            )
+        if counts[s] > n_max:
+            n_max = counts[s]
+    return n_max
+
 cdef class _TreeMesh:
     cdef c_Tree *tree
     cdef PyWrapper *wrapper
     cdef int_t _dim
     cdef int_t[3] ls
     cdef int _finalized
-    cdef bool _diagonal_balance
+    cdef readonly bool _diagonal_balance
 
     cdef double[:] _xs, _ys, _zs
     cdef double[:] _origin
@@ -5339,9 +5399,110 @@ cdef class _TreeMesh:
             return self._getEdgeP(xEdge, yEdge, zEdge)
         return Pxxx
 
-    def _getEdgeIntMat(self, locs, zeros_outside, direction):
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def _full_tensor_inner_product_terms(self, projection_type):
+        """Cell couplings of the full tensor inner product on a tree mesh.
+
+        Every cell couples the vector component ``a`` at one of its faces (or
+        edges) with the component ``b`` at another through the ``(a, b)`` entry of
+        the property tensor. The couplings are gathered directly from each cell,
+        with the hanging faces (edges) replaced by their weighted parents, which
+        is equivalent to deflating the inner product of all the faces (edges).
+
+        Parameters
+        ----------
+        projection_type : {'F', 'E'}
+            'F' for faces 'E' for edges
+
+        Returns
+        -------
+        rows, cols : numpy.ndarray of int
+            The face (or edge) indices coupled by each term.
+        weights : numpy.ndarray of float
+            The weight of each term.
+        params : numpy.ndarray of int
+            The index of the (flattened) model entry scaling each term.
+        """
+        cdef int_t dim = self._dim
+        cdef bint on_faces = projection_type == "F"
+        cdef int_t epc = 1<<(dim-1)
+        cdef np.int64_t n_cells = self.n_cells
+
+        # Count the number of corners sharing each coupling of the cell's items
+        stencil = self._tensor_stencil
+        table = {}
+        for corner in itertools.product([0, 1], repeat=dim):
+            slots = []
+            for a in range(dim):
+                if on_faces:
+                    slots.append(2*a + corner[a])
+                else:
+                    others = [corner[j] for j in range(dim) if j != a]
+                    slots.append(a*epc + sum(c << k for k, c in enumerate(others)))
+            for a in range(dim):
+                for b in range(dim):
+                    key = (slots[a], slots[b], stencil[a][b])
+                    table[key] = table.get(key, 0) + 1
+        keys = np.array(list(table.keys()), dtype=np.int64)
+        cdef np.int64_t[:] t_sa = keys[:, 0].copy()
+        cdef np.int64_t[:] t_sb = keys[:, 1].copy()
+        cdef np.int64_t[:] t_p = keys[:, 2]*n_cells
+        cdef np.float64_t[:] t_w = np.array(list(table.values()), dtype=np.float64)/(1<<dim)
+        cdef np.int64_t n_terms = t_sa.shape[0]
+
+        cdef np.int64_t[3] offsets
+        offsets[0] = 0
+        if on_faces:
+            offsets[1] = self.n_faces_x
+            if dim == 3:
+                offsets[2] = self.n_faces_x + self.n_faces_y
+        else:
+            offsets[1] = self.n_edges_x
+            if dim == 3:
+                offsets[2] = self.n_edges_x + self.n_edges_y
+
+        cdef np.int64_t[12*_MAX_EXPAND] inds
+        cdef double[12*_MAX_EXPAND] ws
+        cdef int[12] counts
+        cdef c_Cell *cell
+        cdef np.int64_t t, i, j, ka, kb, n_total = 0
+        cdef double w
+
+        for cell in self.tree.cells:
+            if _expand_cell_items(cell, on_faces, dim, offsets, inds, ws, counts) > _MAX_EXPAND:
+                raise ValueError("Unable to resolve the hanging items of an unbalanced tree.")
+            for t in range(n_terms):
+                n_total += counts[t_sa[t]]*counts[t_sb[t]]
+
+        rows_arr = np.empty(n_total, dtype=np.int64)
+        cols_arr = np.empty(n_total, dtype=np.int64)
+        weights_arr = np.empty(n_total, dtype=np.float64)
+        params_arr = np.empty(n_total, dtype=np.int64)
+        cdef np.int64_t[:] rows = rows_arr
+        cdef np.int64_t[:] cols = cols_arr
+        cdef np.float64_t[:] weights = weights_arr
+        cdef np.int64_t[:] params = params_arr
+
+        n_total = 0
+        for cell in self.tree.cells:
+            _expand_cell_items(cell, on_faces, dim, offsets, inds, ws, counts)
+            for t in range(n_terms):
+                w = cell.volume*t_w[t]
+                ka = t_sa[t]*_MAX_EXPAND
+                kb = t_sb[t]*_MAX_EXPAND
+                for i in range(counts[t_sa[t]]):
+                    for j in range(counts[t_sb[t]]):
+                        rows[n_total] = inds[ka + i]
+                        cols[n_total] = inds[kb + j]
+                        weights[n_total] = w*ws[ka + i]*ws[kb + j]
+                        params[n_total] = t_p[t] + cell.index
+                        n_total += 1
+        return rows_arr, cols_arr, weights_arr, params_arr
+
+    def _getEdgeIntMat(self, locs, zeros_outside, direction, derivative=-1):
         cdef:
-            double[:, :] locations = locs
+            const double[:, :] locations = locs
             int_t dir, dir1, dir2
             int_t dim = self._dim
             int_t n_loc = locs.shape[0]
@@ -5366,9 +5527,10 @@ cdef class _TreeMesh:
             Edge *i110
             Edge *i111
             double x, y, z
-            double w1, w2, w3
+            double w1, w2, w3, v1, v2, v3
             double eps = 100*np.finfo(float).eps
             int zeros_out = zeros_outside
+            int deriv = derivative
 
         if direction == 'x':
             dir, dir1, dir2 = 0, 1, 2
@@ -5433,16 +5595,20 @@ cdef class _TreeMesh:
 
                 i000 = i0.edges[n_edges * dir]
                 i001 = i0.edges[n_edges * dir + 1]
-                w1 = ((i001.location[dir1] - locations[i, dir1])/
-                      (i001.location[dir1] - i000.location[dir1]))
+                w1, v1 = _lin_weights(
+                    i000.location[dir1], i001.location[dir1], locations[i, dir1],
+                    deriv == dir1
+                )
 
                 i010 = i1.edges[n_edges*dir]
                 i011 = i1.edges[n_edges*dir + 1]
                 if i0.index != i1.index:
-                    w2 = ((i010.location[dir] - locations[i, dir])/
-                          (i010.location[dir] - i000.location[dir]))
+                    w2, v2 = _lin_weights(
+                        i000.location[dir], i010.location[dir], locations[i, dir],
+                        deriv == dir
+                    )
                 else:
-                    w2 = 1.0
+                    w2, v2 = _const_weights(deriv == dir)
 
                 if dim == 3:
                     i100 = i0.edges[n_edges * dir + 2]
@@ -5450,28 +5616,26 @@ cdef class _TreeMesh:
                     i110 = i1.edges[n_edges * dir + 2]
                     i111 = i1.edges[n_edges * dir + 3]
 
-                    w3 = ((i100.location[dir2] - locations[i, dir2])/
-                          (i100.location[dir2] - i000.location[dir2]))
+                    w3, v3 = _lin_weights(
+                        i000.location[dir2], i100.location[dir2], locations[i, dir2],
+                        deriv == dir2
+                    )
                 else:
-                    w3 = 1.0
-
-                w1 = _clip01(w1)
-                w2 = _clip01(w2)
-                w3 = _clip01(w3)
+                    w3, v3 = _const_weights(False)
 
                 row_data[0] = w1 * w2 * w3
-                row_data[1] = (1 - w1) * w2 * w3
-                row_data[2] = w1 * (1 - w2) * w3
-                row_data[3] = (1 - w1) * (1 - w2) * w3
+                row_data[1] = v1 * w2 * w3
+                row_data[2] = w1 * v2 * w3
+                row_data[3] = v1 * v2 * w3
                 row_inds[0] = i000.index + offset
                 row_inds[1] = i001.index + offset
                 row_inds[2] = i010.index + offset
                 row_inds[3] = i011.index + offset
                 if dim==3:
-                    row_data[4] = w1 * w2 * (1 - w3)
-                    row_data[5] = (1 - w1) * w2 * (1 - w3)
-                    row_data[6] = w1 * (1 - w2) * (1 - w3)
-                    row_data[7] = (1 - w1) * (1 - w2) * (1 - w3)
+                    row_data[4] = w1 * w2 * v3
+                    row_data[5] = v1 * w2 * v3
+                    row_data[6] = w1 * v2 * v3
+                    row_data[7] = v1 * v2 * v3
                     row_inds[4] = i100.index + offset
                     row_inds[5] = i101.index + offset
                     row_inds[6] = i110.index + offset
@@ -5481,9 +5645,9 @@ cdef class _TreeMesh:
         A = sp.csr_matrix((data, indices, indptr), shape=(locs.shape[0], self.n_total_edges))
         return A*Re
 
-    def _getFaceIntMat(self, locs, zeros_outside, direction):
+    def _getFaceIntMat(self, locs, zeros_outside, direction, derivative=-1):
         cdef:
-            double[:, :] locations = locs
+            const double[:, :] locations = locs
             int_t dir, dir1, dir2, temp
             int_t dim = self._dim
             int_t n_loc = locs.shape[0]
@@ -5511,9 +5675,10 @@ cdef class _TreeMesh:
             Edge *e10
             Edge *e11
             double x, y, z
-            double w1, w2, w3
+            double w1, w2, w3, v1, v2, v3
             double eps = 100*np.finfo(float).eps
             int zeros_out = zeros_outside
+            int deriv = derivative
 
         if direction == 'x':
             dir = 0
@@ -5596,20 +5761,22 @@ cdef class _TreeMesh:
                   e01 = i00.edges[2 * dir1 + 1]
                   e10 = i01.edges[2 * dir1]
                   e11 = i01.edges[2 * dir1 + 1]
-                  w1 = ((e01.location[dir] - locations[i, dir])/
-                        (e01.location[dir] - e00.location[dir]))
+                  w1, v1 = _lin_weights(
+                      e00.location[dir], e01.location[dir], locations[i, dir],
+                      deriv == dir
+                  )
                   if i00.index != i01.index:
-                      w2 = ((e10.location[dir1] - locations[i, dir1])/
-                            (e10.location[dir1] - e00.location[dir1]))
+                      w2, v2 = _lin_weights(
+                          e00.location[dir1], e10.location[dir1], locations[i, dir1],
+                          deriv == dir1
+                      )
                   else:
-                      w2 = 1.0
+                      w2, v2 = _const_weights(deriv == dir1)
 
-                  w1 = _clip01(w1)
-                  w2 = _clip01(w2)
                   row_data[0] = w1 * w2
-                  row_data[1] = (1 - w1) * w2
-                  row_data[2] = w1 * (1 - w2)
-                  row_data[3] = (1 - w1) * (1 - w2)
+                  row_data[1] = v1 * w2
+                  row_data[2] = w1 * v2
+                  row_data[3] = v1 * v2
                   row_inds[0] = e00.index + offset
                   row_inds[1] = e01.index + offset
                   row_inds[2] = e10.index + offset
@@ -5653,31 +5820,33 @@ cdef class _TreeMesh:
                   f110 = i11.faces[dir * 2]
                   f111 = i11.faces[dir * 2 + 1]
 
-                  w1 = ((f001.location[dir] - locations[i, dir])/
-                        (f001.location[dir] - f000.location[dir]))
+                  w1, v1 = _lin_weights(
+                      f000.location[dir], f001.location[dir], locations[i, dir],
+                      deriv == dir
+                  )
                   if i00.index != i01.index:
-                      w2 = ((f010.location[dir1] - locations[i, dir1])/
-                            (f010.location[dir1] - f000.location[dir1]))
+                      w2, v2 = _lin_weights(
+                          f000.location[dir1], f010.location[dir1], locations[i, dir1],
+                          deriv == dir1
+                      )
                   else:
-                      w2 = 1.0
+                      w2, v2 = _const_weights(deriv == dir1)
                   if i10.index != i00.index:
-                      w3 = ((f100.location[dir2] - locations[i, dir2])/
-                            (f100.location[dir2] - f000.location[dir2]))
+                      w3, v3 = _lin_weights(
+                          f000.location[dir2], f100.location[dir2], locations[i, dir2],
+                          deriv == dir2
+                      )
                   else:
-                      w3 = 1.0
-
-                  w1 = _clip01(w1)
-                  w2 = _clip01(w2)
-                  w3 = _clip01(w3)
+                      w3, v3 = _const_weights(deriv == dir2)
 
                   row_data[0] = w1 * w2 * w3
-                  row_data[1] = (1 - w1) * w2 * w3
-                  row_data[2] = w1 * (1 - w2) * w3
-                  row_data[3] = (1 - w1) * (1 - w2) * w3
-                  row_data[4] = w1 * w2 * (1 - w3)
-                  row_data[5] = (1 - w1) * w2 * (1 - w3)
-                  row_data[6] = w1 * (1 - w2) * (1 - w3)
-                  row_data[7] = (1 - w1) * (1 - w2) * (1 - w3)
+                  row_data[1] = v1 * w2 * w3
+                  row_data[2] = w1 * v2 * w3
+                  row_data[3] = v1 * v2 * w3
+                  row_data[4] = w1 * w2 * v3
+                  row_data[5] = v1 * w2 * v3
+                  row_data[6] = w1 * v2 * v3
+                  row_data[7] = v1 * v2 * v3
                   row_inds[0] = f000.index + offset
                   row_inds[1] = f001.index + offset
                   row_inds[2] = f010.index + offset
@@ -5690,9 +5859,9 @@ cdef class _TreeMesh:
         Rf = self._deflate_faces()
         return sp.csr_matrix((data, indices, indptr), shape=(locs.shape[0], self.n_total_faces))*Rf
 
-    def _getNodeIntMat(self, locs, zeros_outside):
+    def _getNodeIntMat(self, locs, zeros_outside, derivative=-1):
         cdef:
-            double[:, :] locations = locs
+            const double[:, :] locations = locs
             int_t dim = self._dim
             int_t n_loc = locs.shape[0]
             int_t n_nodes = 1<<dim
@@ -5703,9 +5872,10 @@ cdef class _TreeMesh:
             int_t ii, i
             c_Cell *cell
             double x, y, z
-            double wx, wy, wz
+            double wx, wy, wz, vx, vy, vz
             double eps = 100*np.finfo(float).eps
             int zeros_out = zeros_outside
+            int deriv = derivative
 
         for i in range(n_loc):
             x = locations[i, 0]
@@ -5736,28 +5906,37 @@ cdef class _TreeMesh:
                         V[n_nodes*i + ii] = 0.0
                     continue
 
-            wx = _clip01(wx)
-            wy = _clip01(wy)
-            wz = _clip01(wz)
+            wx, vx = _lin_weights(
+                cell.points[0].location[0], cell.points[3].location[0], x, deriv == 0
+            )
+            wy, vy = _lin_weights(
+                cell.points[0].location[1], cell.points[3].location[1], y, deriv == 1
+            )
+            if dim == 3:
+                wz, vz = _lin_weights(
+                    cell.points[0].location[2], cell.points[7].location[2], z, deriv == 2
+                )
+            else:
+                wz, vz = _const_weights(False)
             for ii in range(n_nodes):
                 J[n_nodes*i + ii] = cell.points[ii].index
 
             V[n_nodes*i    ] = wx*wy*wz
-            V[n_nodes*i + 1] = (1 - wx)*wy*wz
-            V[n_nodes*i + 2] = wx*(1 - wy)*wz
-            V[n_nodes*i + 3] = (1 - wx)*(1 - wy)*wz
+            V[n_nodes*i + 1] = vx*wy*wz
+            V[n_nodes*i + 2] = wx*vy*wz
+            V[n_nodes*i + 3] = vx*vy*wz
             if dim==3:
-                V[n_nodes*i + 4] = wx*wy*(1 - wz)
-                V[n_nodes*i + 5] = (1 - wx)*wy*(1 - wz)
-                V[n_nodes*i + 6] = wx*(1 - wy)*(1 - wz)
-                V[n_nodes*i + 7] = (1 - wx)*(1 - wy)*(1 - wz)
+                V[n_nodes*i + 4] = wx*wy*vz
+                V[n_nodes*i + 5] = vx*wy*vz
+                V[n_nodes*i + 6] = wx*vy*vz
+                V[n_nodes*i + 7] = vx*vy*vz
 
         Rn = self._deflate_nodes()
         return sp.csr_matrix((V, (I, J)), shape=(locs.shape[0],self.n_total_nodes))*Rn
 
-    def _getCellIntMat(self, locs, zeros_outside):
+    def _getCellIntMat(self, locs, zeros_outside, derivative=-1):
         cdef:
-            double[:, :] locations = locs
+            const double[:, :] locations = locs
             int_t dim = self._dim
             int_t dir0, dir1, dir2, temp
             int_t n_loc = locations.shape[0]
@@ -5768,7 +5947,7 @@ cdef class _TreeMesh:
 
             np.int64_t[:] row_inds
             np.float64_t[:] row_data
-            np.float64_t w0, w1, w2
+            np.float64_t w1, w2, w3, v1, v2, v3
 
             int_t ii, i
             c_Cell *i000
@@ -5783,6 +5962,7 @@ cdef class _TreeMesh:
             double x, y, z
             double eps = 100*np.finfo(float).eps
             int zeros_out = zeros_outside
+            int deriv = derivative
 
         dir0 = 0
         dir1 = 1
@@ -5887,7 +6067,6 @@ cdef class _TreeMesh:
                 else:
                     i010 = i000
                     i011 = i001
-                    w1 = 1.0
                 # Look -z and +z from previous four cells
                 if (
                     dim == 3
@@ -5940,40 +6119,42 @@ cdef class _TreeMesh:
                     i111 = i011
 
                 if i001.index != i000.index:
-                    w1 = ((i001.location[dir0] - locations[i, dir0])/
-                          (i001.location[dir0] - i000.location[dir0]))
+                    w1, v1 = _lin_weights(
+                        i000.location[dir0], i001.location[dir0], locations[i, dir0],
+                        deriv == dir0
+                    )
                 else:
-                   w1 = 1.0
+                    w1, v1 = _const_weights(deriv == dir0)
 
                 if i010.index != i000.index:
-                    w2 = ((i010.location[dir1] - locations[i, dir1])/
-                          (i010.location[dir1] - i000.location[dir1]))
+                    w2, v2 = _lin_weights(
+                        i000.location[dir1], i010.location[dir1], locations[i, dir1],
+                        deriv == dir1
+                    )
                 else:
-                    w2 = 1.0
+                    w2, v2 = _const_weights(deriv == dir1)
 
                 if dim == 3 and i100.index != i000.index:
-                    w3 = ((i100.location[dir2] - locations[i, dir2])/
-                          (i100.location[dir2] - i000.location[dir2]))
+                    w3, v3 = _lin_weights(
+                        i000.location[dir2], i100.location[dir2], locations[i, dir2],
+                        deriv == dir2
+                    )
                 else:
-                    w3 = 1.0
+                    w3, v3 = _const_weights(dim == 3 and deriv == dir2)
 
-
-                w1 = _clip01(w1)
-                w2 = _clip01(w2)
-                w3 = _clip01(w3)
                 row_data[0] = w1 * w2 * w3
-                row_data[1] = (1 - w1) * w2 * w3
-                row_data[2] = w1 * (1 - w2) * w3
-                row_data[3] = (1 - w1) * (1 - w2) * w3
+                row_data[1] = v1 * w2 * w3
+                row_data[2] = w1 * v2 * w3
+                row_data[3] = v1 * v2 * w3
                 row_inds[0] = i000.index
                 row_inds[1] = i001.index
                 row_inds[2] = i010.index
                 row_inds[3] = i011.index
                 if dim==3:
-                    row_data[4] = w1 * w2 * (1 - w3)
-                    row_data[5] = (1 - w1) * w2 * (1 - w3)
-                    row_data[6] = w1 * (1 - w2) * (1 - w3)
-                    row_data[7] = (1 - w1) * (1 - w2) * (1 - w3)
+                    row_data[4] = w1 * w2 * v3
+                    row_data[5] = v1 * w2 * v3
+                    row_data[6] = w1 * v2 * v3
+                    row_data[7] = v1 * v2 * v3
                     row_inds[4] = i100.index
                     row_inds[5] = i101.index
                     row_inds[6] = i110.index
@@ -6677,3 +6858,23 @@ cdef class _TreeMesh:
 
 cdef inline double _clip01(double x) nogil:
     return min(1, max(x, 0))
+
+cdef inline (double, double) _lin_weights(double x0, double x1, double x, bint derivative) nogil:
+    # weights of the values at x0 and x1 for linearly interpolating to x (clamped
+    # to [x0, x1]), or their derivatives with respect to x.
+    cdef double w
+    if x1 == x0:
+        return _const_weights(derivative)
+    w = (x1 - x)/(x1 - x0)
+    if derivative:
+        if w < 0 or w > 1:
+            return 0.0, 0.0
+        return -1.0/(x1 - x0), 1.0/(x1 - x0)
+    w = _clip01(w)
+    return w, 1 - w
+
+cdef inline (double, double) _const_weights(bint derivative) nogil:
+    # weights for a constant interpolant (when there is no neighbor to interpolate with)
+    if derivative:
+        return 0.0, 0.0
+    return 1.0, 0.0
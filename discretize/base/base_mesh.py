@@ -4,7 +4,14 @@ import scipy.sparse as sp
 import os
 import json
 from scipy.spatial import KDTree
-from discretize.utils import is_scalar, mkvc, sdiag, sdinv
+from discretize.utils import (
+    is_scalar,
+    mkvc,
+    sdiag,
+    sdinv,
+    WeightedProductPlan,
+    InterpolationPlan,
+)
 from discretize.utils.code_utils import (
     deprecate_property,
     deprecate_method,
@@ -1532,6 +1539,7 @@ class BaseMesh:
         invert_model=False,
         invert_matrix=False,
         do_fast=True,
+        batch=False,
         **kwargs,
     ):
         r"""Generate the face inner product matrix or its inverse.
@@ -1570,11 +1578,19 @@ class BaseMesh:
             The inverse not implemented for full tensor properties.
         do_fast : bool, optional
             Do a faster implementation (if available).
+        batch : bool, optional
+            Whether *model* is a batch of models. If *True*, the last axis of *model*
+            indexes ``n_models`` separate models; i.e. *model* has shape
+            *(n_cells, n_models)* for isotropic models, or
+            *(n_cells, n_param, n_models)* for anisotropic and full tensor models.
+            All of the models are evaluated in a single vectorized pass.
 
         Returns
         -------
-        (n_faces, n_faces) scipy.sparse.csr_matrix
-            inner product matrix
+        (n_faces, n_faces) scipy.sparse.csr_matrix or (n_faces, n_models) numpy.ndarray or list
+            inner product matrix. If *batch* is *True*, this is an array whose columns
+            are the diagonals of the inner product matrices when these are diagonal,
+            otherwise a list of the ``n_models`` inner product matrices.
 
         Notes
         -----
@@ -1709,6 +1725,7 @@ class BaseMesh:
         invert_model=False,
         invert_matrix=False,
         do_fast=True,
+        batch=False,
         **kwargs,
     ):
         r"""Generate the edge inner product matrix or its inverse.
@@ -1747,11 +1764,19 @@ class BaseMesh:
             The inverse not implemented for full tensor properties.
         do_fast : bool, optional
             Do a faster implementation (if available).
+        batch : bool, optional
+            Whether *model* is a batch of models. If *True*, the last axis of *model*
+            indexes ``n_models`` separate models; i.e. *model* has shape
+            *(n_cells, n_models)* for isotropic models, or
+            *(n_cells, n_param, n_models)* for anisotropic and full tensor models.
+            All of the models are evaluated in a single vectorized pass.
 
         Returns
         -------
-        (n_edges, n_edges) scipy.sparse.csr_matrix
-            inner product matrix
+        (n_edges, n_edges) scipy.sparse.csr_matrix or (n_edges, n_models) numpy.ndarray or list
+            inner product matrix. If *batch* is *True*, this is an array whose columns
+            are the diagonals of the inner product matrices when these are diagonal,
+            otherwise a list of the ``n_models`` inner product matrices.
 
         Notes
         -----
@@ -2303,7 +2328,13 @@ class BaseMesh:
             return M
 
     def get_face_inner_product_deriv(
-        self, model, do_fast=True, invert_model=False, invert_matrix=False, **kwargs
+        self,
+        model,
+        do_fast=True,
+        invert_model=False,
+        invert_matrix=False,
+        matrix_free=False,
+        **kwargs,
     ):
         r"""Get a function handle to multiply a vector with derivative of face inner product matrix (or its inverse).
 
@@ -2347,13 +2378,21 @@ class BaseMesh:
         invert_matrix : bool, optional
             Returns the inverse of the inner product matrix.
             The inverse not implemented for full tensor properties.
+        matrix_free : bool, optional
+            Return linear operators that apply the derivative to vectors without
+            forming the sparse matrix; see notes.
 
         Returns
         -------
         function
             The function handle :math:`\mathbf{F}(\mathbf{u})` which accepts a
             (``n_faces``) :class:`numpy.ndarray` :math:`\mathbf{u}`. The function
-            returns a (``n_faces``, ``n_params``) :class:`scipy.sparse.csr_matrix`.
+            returns a (``n_faces``, ``n_params``) :class:`scipy.sparse.csr_matrix`,
+            or a :class:`scipy.sparse.linalg.LinearOperator` if *matrix_free*.
+            Many vectors can be passed at once as the columns of a
+            (``n_faces``, ``n_v``) array, in which case the derivatives for every
+            column are stacked by rows into a (``n_faces * n_v``, ``n_params``)
+            matrix.
 
         Notes
         -----
@@ -2403,6 +2442,14 @@ class BaseMesh:
         The sparse matrix output by computing :math:`\mathbf{F}(\mathbf{u})`
         has shape (``n_faces``, ``n_params``).
 
+        **Matrix Free:** Sensitivity calculations usually only need the products
+        :math:`\mathbf{F}(\mathbf{u}) \, \mathbf{w}` and
+        :math:`\mathbf{F}(\mathbf{u})^T \, \mathbf{v}`. With ``matrix_free=True``,
+        :math:`\mathbf{F}(\mathbf{u})` is a :class:`scipy.sparse.linalg.LinearOperator`
+        that computes these products directly from the fixed sparsity pattern of
+        the inner product matrix, without forming the (``n_faces``, ``n_params``)
+        sparse matrix for every :math:`\mathbf{u}`.
+
         Examples
         --------
         Here, we construct a 4 cell by 4 cell tensor mesh. For our first example we
@@ -2486,7 +2533,13 @@ class BaseMesh:
         )
 
     def get_edge_inner_product_deriv(
-        self, model, do_fast=True, invert_model=False, invert_matrix=False, **kwargs
+        self,
+        model,
+        do_fast=True,
+        invert_model=False,
+        invert_matrix=False,
+        matrix_free=False,
+        **kwargs,
     ):
         r"""Get a function handle to multiply vector with derivative of edge inner product matrix (or its inverse).
 
@@ -2531,13 +2584,21 @@ class BaseMesh:
             The inverse not implemented for full tensor properties.
         do_fast : bool, optional
             Do a faster implementation (if available).
+        matrix_free : bool, optional
+            Return linear operators that apply the derivative to vectors without
+            forming the sparse matrix; see notes.
 
         Returns
         -------
         function
             The function handle :math:`\mathbf{F}(\mathbf{u})` which accepts a
             (``n_edges``) :class:`numpy.ndarray` :math:`\mathbf{u}`. The function
-            returns a (``n_edges``, ``n_params``) :class:`scipy.sparse.csr_matrix`.
+            returns a (``n_edges``, ``n_params``) :class:`scipy.sparse.csr_matrix`,
+            or a :class:`scipy.sparse.linalg.LinearOperator` if *matrix_free*.
+            Many vectors can be passed at once as the columns of a
+            (``n_edges``, ``n_v``) array, in which case the derivatives for every
+            column are stacked by rows into a (``n_edges * n_v``, ``n_params``)
+            matrix.
 
         Notes
         -----
@@ -2586,6 +2647,14 @@ class BaseMesh:
         a (``n_params``) :class:`numpy.ndarray`. The sparse matrix
         output by computing :math:`\mathbf{F}(\mathbf{u})` has shape (``n_edges``, ``n_params``).
 
+        **Matrix Free:** Sensitivity calculations usually only need the products
+        :math:`\mathbf{F}(\mathbf{u}) \, \mathbf{w}` and
+        :math:`\mathbf{F}(\mathbf{u})^T \, \mathbf{v}`. With ``matrix_free=True``,
+        :math:`\mathbf{F}(\mathbf{u})` is a :class:`scipy.sparse.linalg.LinearOperator`
+        that computes these products directly from the fixed sparsity pattern of
+        the inner product matrix, without forming the (``n_edges``, ``n_params``)
+        sparse matrix for every :math:`\mathbf{u}`.
+
         Examples
         --------
         Here, we construct a 4 cell by 4 cell tensor mesh. For our first example we
@@ -2921,6 +2990,61 @@ class BaseMesh:
         else:
             return None
 
+    def get_weighted_product_plan(self, operator):
+        r"""Get a reusable plan for a standard weighted system matrix.
+
+        Discretizations of second order problems repeatedly form system matrices
+        made of a differential operator, a diagonal weighting and the operator's
+        transpose. For *operator*, this returns a plan for:
+
+        - ``'face_divergence'``: :math:`\mathbf{D} \, diag(\mathbf{w}) \,
+          \mathbf{D}^T`, with weights on faces (e.g. the diagonal of the inverse
+          of a face inner product matrix).
+        - ``'edge_curl'``: :math:`\mathbf{C}^T diag(\mathbf{w}) \, \mathbf{C}`,
+          with weights on faces.
+        - ``'nodal_gradient'``: :math:`\mathbf{G}^T diag(\mathbf{w}) \,
+          \mathbf{G}`, with weights on edges.
+
+        The symbolic product is computed once and the plan is cached on the mesh,
+        so every new set of weights only refills the values of the matrix.
+
+        Parameters
+        ----------
+        operator : {'face_divergence', 'edge_curl', 'nodal_gradient'}
+            The differential operator of the system matrix.
+
+        Returns
+        -------
+        discretize.utils.WeightedProductPlan
+
+        Examples
+        --------
+        >>> from discretize import TensorMesh
+        >>> import numpy as np
+        >>> mesh = TensorMesh([16, 16, 16])
+        >>> plan = mesh.get_weighted_product_plan('face_divergence')
+        >>> sigma = np.random.rand(mesh.n_cells) + 1
+        >>> Mf = mesh.get_face_inner_product(sigma, invert_model=True)
+        >>> A = plan.update(1.0 / Mf.diagonal())
+        """
+        plans = getattr(self, "_weighted_product_plans", None)
+        if plans is None:
+            plans = self._weighted_product_plans = {}
+        if operator not in plans:
+            if operator == "face_divergence":
+                plan = WeightedProductPlan(self.face_divergence)
+            elif operator == "edge_curl":
+                plan = WeightedProductPlan(self.edge_curl.T)
+            elif operator == "nodal_gradient":
+                plan = WeightedProductPlan(self.nodal_gradient.T)
+            else:
+                raise ValueError(
+                    "operator must be one of 'face_divergence', 'edge_curl' or "
+                    f"'nodal_gradient', got {operator!r}."
+                )
+            plans[operator] = plan
+        return plans[operator]
+
     # Averaging
     @property
     def average_face_to_cell(self):
@@ -4005,7 +4129,10 @@ class BaseMesh:
         grid_loc : {'CC', 'N', 'Fx', 'Fy', 'Fz', 'Ex', 'Ex', 'Ey', 'Ez'}
             Specifies the grid on which points are being moved to.
         discard : bool, optional
-            Whether to discard the intenally created `scipy.spatial.KDTree`.
+            Whether to discard the intenally created `scipy.spatial.KDTree`. Otherwise
+            it is cached for the grid location, and rebuilt only if the grid array
+            returned by the mesh for that location is no longer the one it was
+            built from.
 
         Returns
         -------
@@ -4049,19 +4176,27 @@ class BaseMesh:
         locations = as_array_n_by_dim(locations, self.dim)
 
         grid_loc = self._parse_location_type(grid_loc)
-        tree_name = f"_{grid_loc}_tree"
-
-        tree = getattr(self, tree_name, None)
-        if tree is None:
-            grid = as_array_n_by_dim(getattr(self, grid_loc), self.dim)
-            tree = KDTree(grid)
-        _, ind = tree.query(locations)
-
-        if not discard:
-            setattr(self, tree_name, tree)
-
+        _, ind = self._get_grid_tree(grid_loc, cache=not discard).query(locations)
         return ind
 
+    def _get_grid_tree(self, grid_loc, cache=True):
+        """Get a KDTree of a grid location, cached until the mesh's grid array changes."""
+        tree_name = f"_{grid_loc}_tree"
+        grid = getattr(self, grid_loc)
+        tree, tree_grid = getattr(self, tree_name, None) or (None, None)
+        if tree is not None and (
+            tree_grid is grid
+            or (
+                np.shape(tree_grid) == np.shape(grid)
+                and np.array_equal(tree_grid, grid)
+            )
+        ):
+            return tree
+        tree = KDTree(as_array_n_by_dim(grid, self.dim))
+        if cache:
+            setattr(self, tree_name, (tree, grid))
+        return tree
+
     def point2index(self, locs):
         """Find cells that contain the given points.
 
@@ -4081,7 +4216,12 @@ class BaseMesh:
         raise NotImplementedError(f"point2index not implemented for {type(self)}")
 
     def get_interpolation_matrix(
-        self, loc, location_type="cell_centers", zeros_outside=False, **kwargs
+        self,
+        loc,
+        location_type="cell_centers",
+        zeros_outside=False,
+        derivative=None,
+        **kwargs,
     ):
         """Construct a linear interpolation matrix from mesh.
 
@@ -4110,6 +4250,10 @@ class BaseMesh:
             If *False*, nearest neighbour is used to compute the interpolate value
             at locations outside the mesh. If *True* , values at locations outside
             the mesh will be zero.
+        derivative : {None, 0, 1, 2, 'x', 'y', 'z'}, optional
+            If given, the matrix evaluates the derivative of the linear interpolant
+            along this axis at the locations, instead of its value. The derivative
+            is zero where the interpolant is clamped to its nearest neighbour.
 
         Returns
         -------
@@ -4173,11 +4317,76 @@ class BaseMesh:
         >>> ax2.set_title('Interpolated from Nodes')
         >>> ax3.set_title('Relative Error')
         >>> plt.show()
+
+        The derivatives of the interpolant, such as for receivers measuring the
+        gradient of a field, are built from the same search for the surrounding
+        locations. Here we interpolate the x-derivative of the Gaussian.
+
+        >>> Dx = mesh2D.get_interpolation_matrix(centers, 'nodes', derivative='x')
+        >>> dfdx_interp = Dx @ val_nodes
         """
         raise NotImplementedError(
             f"get_interpolation_matrix not implemented for {type(self)}"
         )
 
+    def get_interpolation_plan(
+        self, loc, location_type="cell_centers", zeros_outside=False, derivative=None
+    ):
+        """Get a reusable plan interpolating from the mesh to a set of points.
+
+        The plan applies the same operation as
+        :py:meth:`get_interpolation_matrix` with a compiled gather kernel, and
+        interpolates blocks of many fields in a single pass over the points. It
+        also applies the adjoint of the interpolation.
+
+        Parameters
+        ----------
+        loc : (n_pts, dim) numpy.ndarray
+            Location of points being to interpolate to.
+        location_type : str, optional
+            Tensor locations on the mesh being interpolated from. See
+            :py:meth:`get_interpolation_matrix` for the options.
+        zeros_outside : bool, optional
+            If *True*, values at locations outside the mesh will be zero.
+        derivative : {None, 0, 1, 2, 'x', 'y', 'z'}, optional
+            If given, the plan evaluates the derivative of the interpolant along
+            this axis.
+
+        Returns
+        -------
+        discretize.utils.InterpolationPlan
+
+        Examples
+        --------
+        >>> from discretize import TensorMesh
+        >>> import numpy as np
+        >>> mesh = TensorMesh([32, 32, 32])
+        >>> plan = mesh.get_interpolation_plan(np.random.rand(1000, 3))
+        >>> fields = np.random.rand(mesh.n_cells, 4)
+        >>> data = plan.apply(fields)
+        >>> gradient = plan.apply_adjoint(data)
+        """
+        return InterpolationPlan(
+            self.get_interpolation_matrix(
+                loc,
+                location_type=location_type,
+                zeros_outside=zeros_outside,
+                derivative=derivative,
+            )
+        )
+
+    def _parse_derivative(self, derivative):
+        """Convert a derivative axis to an integer, or None if it is None."""
+        if derivative is None:
+            return None
+        if isinstance(derivative, str):
+            derivative = {"x": 0, "y": 1, "z": 2}.get(derivative.lower(), -1)
+        if derivative not in range(self.dim):
+            raise ValueError(
+                f"derivative must be an axis of the {self.dim}D mesh, got {derivative}."
+            )
+        return int(derivative)
+
     def _parse_location_type(self, location_type):
         if len(location_type) == 0:
             return location_type
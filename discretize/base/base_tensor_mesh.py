@@ -10,10 +10,12 @@ from discretize.utils import (
     unpack_widths,
     mkvc,
     ndgrid,
+    TensorGrid,
     spzeros,
     sdiag,
     sdinv,
     TensorType,
+    inverse_property_tensor,
     interpolation_matrix,
     make_boundary_bool,
 )
@@ -21,6 +23,114 @@ from discretize.utils.code_utils import deprecate_method, deprecate_property
 import warnings
 
 
+def _bincount(x, weights, minlength):
+    """Sum weights into bins, supporting complex weights."""
+    if np.iscomplexobj(weights):
+        return np.bincount(x, weights.real, minlength) + 1j * np.bincount(
+            x, weights.imag, minlength
+        )
+    return np.bincount(x, weights, minlength)
+
+
+class _CoarsenHierarchyMixin:
+    """Mixin providing multigrid hierarchies of meshes.
+
+    Classes using it implement ``_coarsen``, returning the next coarser mesh, and
+    ``_get_prolongation``, returning the operator from a coarse mesh to the mesh.
+    """
+
+    def coarsen_hierarchy(self, n_levels):
+        r"""Build a geometric multigrid hierarchy of coarsened meshes.
+
+        Each level is obtained by merging the cells of the previous level in pairs
+        along every axis: a :class:`~discretize.TensorMesh` merges neighboring
+        cells (keeping the last cell of an axis with an odd number of cells), and
+        a :class:`~discretize.TreeMesh` moves every cell up one level of the tree.
+        Every coarse cell is therefore a union of fine cells.
+
+        Between every pair of levels, prolongation operators :math:`\mathbf{P}`
+        (coarse to fine) and restriction operators :math:`\mathbf{R}` (fine to
+        coarse) are built for each grid location. Cell centered quantities are
+        prolongated as piecewise constants. Face, edge and nodal quantities are
+        interpolated linearly from the coarse mesh. The restriction is the
+        weighted transpose of the prolongation,
+
+        .. math::
+            \mathbf{R} = \mathrm{diag}(\mathbf{P}^T \mathbf{w})^{-1}
+            \mathbf{P}^T \mathrm{diag}(\mathbf{w}),
+
+        with the fine cell volumes, face areas, edge lengths (or ones for nodes)
+        as the weights :math:`\mathbf{w}`, such that constants are preserved in
+        both directions and cell centered quantities are volume averaged.
+
+        Parameters
+        ----------
+        n_levels : int
+            The number of coarse levels to build. The hierarchy stops early if the
+            mesh can not be coarsened any further.
+
+        Returns
+        -------
+        meshes : list of discretize.TensorMesh or list of discretize.TreeMesh
+            The meshes from the finest (this mesh) to the coarsest.
+        restrictions : list of dict
+            ``restrictions[i]`` maps quantities on ``meshes[i]`` to
+            ``meshes[i + 1]``. Each dictionary holds a ``scipy.sparse.csr_matrix``
+            for the ``"cell_centers"``, ``"faces"``, ``"edges"`` and ``"nodes"``.
+        prolongations : list of dict
+            ``prolongations[i]`` maps quantities on ``meshes[i + 1]`` to
+            ``meshes[i]``, with the same keys as ``restrictions``.
+
+        Examples
+        --------
+        Build the Galerkin coarse operators of a cell centered Laplacian for a
+        multigrid preconditioner.
+
+        >>> from discretize import TensorMesh
+        >>> mesh = TensorMesh([32, 32])
+        >>> meshes, R, P = mesh.coarsen_hierarchy(3)
+        >>> [m.n_cells for m in meshes]
+        [1024, 256, 64, 16]
+        >>> A = mesh.face_divergence @ mesh.cell_gradient
+        >>> for Ri, Pi in zip(R, P):
+        ...     A = Ri["cell_centers"] @ A @ Pi["cell_centers"]
+        >>> A.shape
+        (16, 16)
+        """
+        n_levels = int(n_levels)
+        if n_levels < 0:
+            raise ValueError("n_levels must be non-negative")
+        weights = {
+            "cell_centers": "cell_volumes",
+            "faces": "face_areas",
+            "edges": "edge_lengths",
+            "nodes": None,
+        }
+        meshes = [self]
+        restrictions = []
+        prolongations = []
+        for _ in range(n_levels):
+            fine = meshes[-1]
+            coarse = fine._coarsen()
+            if coarse.n_cells == fine.n_cells:
+                break
+            R = {}
+            P = {}
+            for location_type, weight in weights.items():
+                Pi = fine._get_prolongation(coarse, location_type).tocsr()
+                if weight is None:
+                    w = np.ones(Pi.shape[0])
+                else:
+                    w = getattr(fine, weight)
+                PtW = Pi.T @ sdiag(w)
+                R[location_type] = (sdinv(sdiag(Pi.T @ w)) @ PtW).tocsr()
+                P[location_type] = Pi
+            meshes.append(coarse)
+            restrictions.append(R)
+            prolongations.append(P)
+        return meshes, restrictions, prolongations
+
+
 class BaseTensorMesh(BaseRegularMesh):
     """Base class for tensor-product style meshes.
 
@@ -305,7 +415,7 @@ class BaseTensorMesh(BaseRegularMesh):
         dim = self.dim
         if dim == 1:
             return self.nodes_x[[0, -1]]
-        return self.nodes[make_boundary_bool(self.shape_nodes)]
+        return self.get_tensor_grid("nodes")[make_boundary_bool(self.shape_nodes)]
 
     @property
     def h_gridded(self):
@@ -554,9 +664,12 @@ class BaseTensorMesh(BaseRegularMesh):
             ey = ndgrid(self.nodes_x[[0, -1]], self.cell_centers_y)
             return np.r_[ex, ey]
         if dim == 3:
-            ex = self.edges_x[make_boundary_bool(self.shape_edges_x, bdir="yz")]
-            ey = self.edges_y[make_boundary_bool(self.shape_edges_y, bdir="xz")]
-            ez = self.edges_z[make_boundary_bool(self.shape_edges_z, bdir="xy")]
+            ex = self.get_tensor_grid("edges_x")
+            ex = ex[make_boundary_bool(self.shape_edges_x, bdir="yz")]
+            ey = self.get_tensor_grid("edges_y")
+            ey = ey[make_boundary_bool(self.shape_edges_y, bdir="xz")]
+            ez = self.get_tensor_grid("edges_z")
+            ez = ez[make_boundary_bool(self.shape_edges_z, bdir="xy")]
             return np.r_[ex, ey, ez]
 
     def _getTensorGrid(self, key):
@@ -564,6 +677,36 @@ class BaseTensorMesh(BaseRegularMesh):
             setattr(self, "_" + key, ndgrid(self.get_tensor(key)))
         return getattr(self, "_" + key)
 
+    def get_tensor_grid(self, key):
+        """Return the lazy gridded locations of a specified mesh tensor.
+
+        Unlike the corresponding properties (e.g. ``cell_centers`` or
+        ``faces_x``), which build and store the full (n, dim) array of
+        locations, the returned :class:`~discretize.utils.TensorGrid` only stores
+        the 1D arrays of :py:meth:`get_tensor` and computes the locations that are
+        indexed, or iterated over in chunks.
+
+        Parameters
+        ----------
+        key : str
+            Specifies the tensor, see :py:meth:`get_tensor` for the options.
+
+        Returns
+        -------
+        discretize.utils.TensorGrid
+            The gridded locations of the tensor.
+
+        Examples
+        --------
+        >>> from discretize import TensorMesh
+        >>> mesh = TensorMesh([100, 100, 50])
+        >>> grid = mesh.get_tensor_grid('cell_centers')
+        >>> grid.shape
+        (500000, 3)
+        >>> z_top = grid[-mesh.shape_cells[0] * mesh.shape_cells[1]:, 2]
+        """
+        return TensorGrid(self.get_tensor(key))
+
     def get_tensor(self, key):
         """Return the base 1D arrays for a specified mesh tensor.
 
@@ -682,7 +825,7 @@ class BaseTensorMesh(BaseRegularMesh):
         return inside
 
     def _get_interpolation_matrix(
-        self, loc, location_type="cell_centers", zeros_outside=False
+        self, loc, location_type="cell_centers", zeros_outside=False, derivative=None
     ):
         """Produce an interpolation matrix.
 
@@ -708,6 +851,12 @@ class BaseTensorMesh(BaseRegularMesh):
                 'CCVy', 'cell_centers_y'  -> y-component of vector field defined on cell centers
                 'CCVz', 'cell_centers_z'  -> z-component of vector field defined on cell centers
 
+        zeros_outside : bool, optional
+            If *True*, values at locations outside the mesh will be zero.
+
+        derivative : {None, 0, 1, 2, 'x', 'y', 'z'}, optional
+            Axis of the derivative of the interpolant to evaluate, if given.
+
         Returns
         -------
         scipy.sparse.csr_matrix
@@ -724,6 +873,7 @@ class BaseTensorMesh(BaseRegularMesh):
             loc[indZeros, :] = np.array([v.mean() for v in self.get_tensor("CC")])
 
         location_type = self._parse_location_type(location_type)
+        derivative = self._parse_derivative(derivative)
 
         if location_type in [
             "faces_x",
@@ -741,16 +891,20 @@ class BaseTensorMesh(BaseRegularMesh):
             else:
                 items = (self.nEx, self.nEy, self.nEz)[: self.dim]
             components = [spzeros(loc.shape[0], n) for n in items]
-            components[ind] = interpolation_matrix(loc, *self.get_tensor(location_type))
+            components[ind] = interpolation_matrix(
+                loc, *self.get_tensor(location_type), derivative=derivative
+            )
             # remove any zero blocks (hstack complains)
             components = [comp for comp in components if comp.shape[1] > 0]
             Q = sp.hstack(components)
 
         elif location_type in ["cell_centers", "nodes"]:
-            Q = interpolation_matrix(loc, *self.get_tensor(location_type))
+            Q = interpolation_matrix(
+                loc, *self.get_tensor(location_type), derivative=derivative
+            )
 
         elif location_type in ["cell_centers_x", "cell_centers_y", "cell_centers_z"]:
-            Q = interpolation_matrix(loc, *self.get_tensor("CC"))
+            Q = interpolation_matrix(loc, *self.get_tensor("CC"), derivative=derivative)
             Z = spzeros(loc.shape[0], self.nC)
             if location_type[-1] == "x":
                 Q = sp.hstack([Q, Z, Z])
@@ -773,7 +927,12 @@ class BaseTensorMesh(BaseRegularMesh):
         return Q.tocsr()
 
     def get_interpolation_matrix(  # NOQA D102
-        self, loc, location_type="cell_centers", zeros_outside=False, **kwargs
+        self,
+        loc,
+        location_type="cell_centers",
+        zeros_outside=False,
+        derivative=None,
+        **kwargs,
     ):
         # Documentation inherited from discretize.base.BaseMesh
         if "locType" in kwargs:
@@ -786,14 +945,17 @@ class BaseTensorMesh(BaseRegularMesh):
                 "The zerosOutside keyword argument has been removed, please use zeros_outside. "
                 "This will be removed in discretize 1.0.0",
             )
-        return self._get_interpolation_matrix(loc, location_type, zeros_outside)
+        return self._get_interpolation_matrix(
+            loc, location_type, zeros_outside, derivative
+        )
 
     def _fastInnerProduct(
         self, projection_type, model=None, invert_model=False, invert_matrix=False
     ):
         """Fast version of get_face_inner_product_deriv.
 
-        This does not handle the case of a full tensor property.
+        Full tensor properties are only handled when the mesh supplies the
+        couplings of its cells, and when the matrix is not inverted.
 
         Parameters
         ----------
@@ -819,6 +981,11 @@ class BaseTensorMesh(BaseRegularMesh):
         if model is None:
             model = np.ones(self.nC)
 
+        if TensorType(self, model) == 3:
+            return self._fastFullTensorInnerProduct(
+                projection_type, model, invert_model, invert_matrix
+            )
+
         if invert_model:
             model = 1.0 / model
 
@@ -887,6 +1054,10 @@ class BaseTensorMesh(BaseRegularMesh):
             raise ValueError("projection_type must be 'F' for faces or 'E' for edges")
 
         tensorType = TensorType(self, model)
+        if tensorType == 3:
+            return self._fastFullTensorInnerProductDeriv(
+                projection_type, model, invert_model, invert_matrix
+            )
 
         dMdprop = None
 
@@ -984,12 +1155,193 @@ class BaseTensorMesh(BaseRegularMesh):
                         stacklevel=2,
                     )
                     return dMdprop
+                v = np.asarray(v)
+                if v.ndim == 2:
+                    # stack the derivatives of every column of v
+                    return sdiag(mkvc(v)) * sp.vstack([dMdprop] * v.shape[1])
                 return sdiag(v) * dMdprop
 
             return innerProductDeriv
         else:
             return None
 
+    @property
+    def _tensor_stencil(self):
+        """Index of the full tensor model component for each (row, column)."""
+        if self.dim == 2:
+            return [[0, 2], [2, 1]]
+        return [[0, 3, 4], [3, 1, 5], [4, 5, 2]]
+
+    def _full_tensor_inner_product_terms(self, projection_type):
+        """Cell couplings of the full tensor inner product.
+
+        Meshes supporting a direct assembly of full tensor inner products
+        override this to return every term of the sum
+        ``M[row, col] += weight * model[param]``.
+
+        Parameters
+        ----------
+        projection_type : {'F', 'E'}
+            'F' for faces 'E' for edges
+
+        Returns
+        -------
+        tuple of numpy.ndarray or None
+            (rows, cols, weights, params), or None if the mesh does not support it.
+        """
+        return None
+
+    def _get_full_tensor_inner_product_pattern(self, projection_type):
+        """Fixed assembly pattern of the full tensor inner product.
+
+        The terms returned by ``_full_tensor_inner_product_terms`` only depend on
+        the mesh, so the CSR structures of the inner product and of its derivative
+        are computed once, and the data is then summed directly into them with
+        :func:`numpy.bincount` for every model.
+
+        Parameters
+        ----------
+        projection_type : {'F', 'E'}
+            'F' for faces 'E' for edges
+
+        Returns
+        -------
+        dict or None
+            The assembly pattern, or None if the mesh does not support it.
+        """
+        if self.cache_inner_product_projections:
+            cache = getattr(self, "_inner_product_projections", None)
+            if cache is None:
+                cache = self._inner_product_projections = {}
+            key = ("full_tensor", projection_type)
+            if key in cache:
+                return cache[key]
+
+        terms = self._full_tensor_inner_product_terms(projection_type)
+        if terms is None:
+            return None
+        rows, cols, weights, params = terms
+
+        n = getattr(self, "n" + projection_type)
+        n_params = (self.dim * (self.dim + 1) // 2) * self.nC
+
+        # structure of the inner product matrix
+        keys, entry = np.unique(rows * n + cols, return_inverse=True)
+        indptr = np.r_[0, np.cumsum(np.bincount(keys // n, minlength=n))]
+
+        # structure of the derivative (n, n_params) matrix
+        deriv_keys, deriv_entry = np.unique(
+            rows * n_params + params, return_inverse=True
+        )
+        deriv_indptr = np.r_[
+            0, np.cumsum(np.bincount(deriv_keys // n_params, minlength=n))
+        ]
+
+        pattern = {
+            "cols": cols,
+            "weights": weights,
+            "params": params,
+            "entry": entry.reshape(-1),
+            "indices": keys % n,
+            "indptr": indptr,
+            "deriv_entry": deriv_entry.reshape(-1),
+            "deriv_indices": deriv_keys % n_params,
+            "deriv_indptr": deriv_indptr,
+        }
+        if self.cache_inner_product_projections:
+            cache[key] = pattern
+        return pattern
+
+    def _fastFullTensorInnerProduct(
+        self, projection_type, model, invert_model=False, invert_matrix=False
+    ):
+        """Directly assemble the inner product of a full tensor property.
+
+        Parameters
+        ----------
+        projection_type : {'F', 'E'}
+            'F' for faces 'E' for edges
+        model : numpy.ndarray
+            full tensor material property at each cell center (nC, (3 or 6))
+        invert_model : bool
+            inverts the material property
+        invert_matrix : bool
+            inverts the matrix
+
+        Returns
+        -------
+        (n_faces, n_faces) scipy.sparse.csr_matrix or None
+            M, the inner product matrix, or None if it can not be assembled directly.
+        """
+        if invert_matrix:
+            return None
+        pattern = self._get_full_tensor_inner_product_pattern(projection_type)
+        if pattern is None:
+            return None
+        if invert_model:
+            model = inverse_property_tensor(self, model)
+        model = mkvc(model)
+
+        n = getattr(self, "n" + projection_type)
+        data = _bincount(
+            pattern["entry"],
+            pattern["weights"] * model[pattern["params"]],
+            len(pattern["indices"]),
+        )
+        return sp.csr_matrix(
+            (data, pattern["indices"], pattern["indptr"]), shape=(n, n)
+        )
+
+    def _fastFullTensorInnerProductDeriv(
+        self, projection_type, model, invert_model=False, invert_matrix=False
+    ):
+        """Directly assemble the derivative of a full tensor inner product.
+
+        Parameters
+        ----------
+        projection_type : {'F', 'E'}
+            'F' for faces 'E' for edges
+        model : numpy.ndarray
+            full tensor material property at each cell center (nC, (3 or 6))
+        invert_model : bool
+            inverts the material property
+        invert_matrix : bool
+            inverts the matrix
+
+        Returns
+        -------
+        function or None
+            dMdmu, the derivative of the inner product matrix, or None if it can
+            not be assembled directly.
+        """
+        if invert_model or invert_matrix:
+            return None
+        pattern = self._get_full_tensor_inner_product_pattern(projection_type)
+        if pattern is None:
+            return None
+
+        n = getattr(self, "n" + projection_type)
+        n_params = model.size
+
+        def innerProductDeriv(v):
+            if v is None:
+                raise Exception("v must be supplied for this implementation.")
+            v = np.asarray(v)
+            n_v = 1 if v.ndim == 1 else v.shape[1]
+            n_data = len(pattern["deriv_indices"])
+            # sum the derivative of every column of v into its own block of rows
+            entry = pattern["deriv_entry"] + n_data * np.arange(n_v)[:, None]
+            vals = pattern["weights"] * v[pattern["cols"]].T
+            data = _bincount(entry.reshape(-1), vals.reshape(-1), n_v * n_data)
+            indptr = pattern["deriv_indptr"]
+            indptr = np.r_[0, np.cumsum(np.tile(np.diff(indptr), n_v))]
+            return sp.csr_matrix(
+                (data, np.tile(pattern["deriv_indices"], n_v), indptr),
+                shape=(n_v * n, n_params),
+            )
+
+        return innerProductDeriv
+
     # DEPRECATED
     @property
     def hx(self):
@@ -1,4 +1,5 @@
 """Module containing the cylindrical mesh implementation."""
+import weakref
 import numpy as np
 import scipy.sparse as sp
 from scipy.constants import pi
@@ -16,6 +17,7 @@ from discretize.utils import (
     cyl2cart,
     as_array_n_by_dim,
     Identity,
+    InterpolationPlan,
 )
 from discretize.base import BaseTensorMesh, BaseRectangularMesh
 from discretize.operators import DiffOperators, InnerProducts
@@ -146,6 +148,12 @@ class CylindricalMesh(
             cartesian_origin = np.zeros(self.dim)
         self.cartesian_origin = cartesian_origin
 
+    def __getstate__(self):
+        """Return the state to pickle, without the cached interpolation plans."""
+        state = self.__dict__.copy()
+        state.pop("_cartesian_plans", None)
+        return state
+
     @property
     def cartesian_origin(self):
         """Cartesian origin of the mesh.
@@ -1763,7 +1771,12 @@ class CylindricalMesh(
     ####################################################
 
     def get_interpolation_matrix(
-        self, loc, location_type="cell_centers", zeros_outside=False, **kwargs
+        self,
+        loc,
+        location_type="cell_centers",
+        zeros_outside=False,
+        derivative=None,
+        **kwargs,
     ):
         r"""Construct interpolation matrix from mesh.
 
@@ -1796,6 +1809,10 @@ class CylindricalMesh(
             If *False* , nearest neighbour is used to compute the value for
             locations outside the mesh. If *True* , values outside the mesh
             will be equal to zero.
+        derivative : {None, 0, 1, 2, 'x', 'y', 'z'}, optional
+            If given, the matrix evaluates the derivative of the interpolant with
+            respect to this cylindrical coordinate, i.e. :math:`r`, :math:`\phi` or
+            :math:`z`, instead of its value.
 
         Returns
         -------
@@ -1815,6 +1832,7 @@ class CylindricalMesh(
             )
 
         location_type = self._parse_location_type(location_type)
+        derivative = self._parse_derivative(derivative)
         if self.is_symmetric and location_type in ["edges_x", "edges_z", "faces_y"]:
             raise ValueError(
                 "Symmetric CylindricalMesh does not support {0!s} interpolation, "
@@ -1825,7 +1843,9 @@ class CylindricalMesh(
         loc[:, 1] = loc[:, 1] % (2 * np.pi)
 
         if location_type in ["cell_centers_x", "cell_centers_y", "cell_centers_z"]:
-            Q = interpolation_matrix(loc, *self.get_tensor("cell_centers"))
+            Q = interpolation_matrix(
+                loc, *self.get_tensor("cell_centers"), derivative=derivative
+            )
             Z = spzeros(loc.shape[0], self.nC)
             if location_type[-1] == "x":
                 Q = sp.hstack([Q, Z])
@@ -1838,7 +1858,7 @@ class CylindricalMesh(
             rtz = [self.nodes_x, self._nodes_y_full]
             if self.dim == 3:
                 rtz.append(self.nodes_z)
-            Q = interpolation_matrix(loc, *rtz)
+            Q = interpolation_matrix(loc, *rtz, derivative=derivative)
             Q = Q @ self._deflation_matrix("nodes", as_ones=True).T
         elif location_type == "cell_centers":
             rtz = [
@@ -1857,7 +1877,7 @@ class CylindricalMesh(
                 rtz.append(self.cell_centers_y)
             if self.dim == 3:
                 rtz.append(self.cell_centers_z)
-            Q = interpolation_matrix(loc, *rtz)
+            Q = interpolation_matrix(loc, *rtz, derivative=derivative)
             if self.is_wrapped:
                 irs, its, izs = np.unravel_index(
                     Q.indices, self.shape_cells + np.r_[0, 2, 0], order="F"
@@ -1906,7 +1926,7 @@ class CylindricalMesh(
                     rtz.append(self.cell_centers_y)
                 if self.dim == 3:
                     rtz.append(self.cell_centers_z)
-                Q = interpolation_matrix(loc, *rtz)
+                Q = interpolation_matrix(loc, *rtz, derivative=derivative)
                 # unwrap the theta indices
                 if self.is_wrapped:
                     irs, its, izs = np.unravel_index(
@@ -1928,7 +1948,7 @@ class CylindricalMesh(
                 ]
                 if self.dim == 3:
                     rtz.append(self.cell_centers_z)
-                Q = interpolation_matrix(loc, *rtz)
+                Q = interpolation_matrix(loc, *rtz, derivative=derivative)
                 Q = Q @ self._deflation_matrix("faces_y", as_ones=True).T
                 components[1] = Q
             elif location_type == "faces_z":
@@ -1947,7 +1967,7 @@ class CylindricalMesh(
                 else:
                     rtz.append(self.cell_centers_y)
                 rtz.append(self.nodes_z)
-                Q = interpolation_matrix(loc, *rtz)
+                Q = interpolation_matrix(loc, *rtz, derivative=derivative)
                 if self.is_wrapped:
                     # unwrap the theta indices
                     irs, its, izs = np.unravel_index(
@@ -1969,7 +1989,7 @@ class CylindricalMesh(
                 ]
                 if self.dim == 3:
                     rtz.append(self.nodes_z)
-                Q = interpolation_matrix(loc, *rtz)
+                Q = interpolation_matrix(loc, *rtz, derivative=derivative)
                 Q = Q @ self._deflation_matrix("edges_x", as_ones=True).T
                 components[0] = Q
             elif location_type == "edges_y":
@@ -1991,7 +2011,7 @@ class CylindricalMesh(
                     rtz.append(self.cell_centers_y)
                 if self.dim == 3:
                     rtz.append(self.nodes_z)
-                Q = interpolation_matrix(loc, *rtz)
+                Q = interpolation_matrix(loc, *rtz, derivative=derivative)
                 if self.is_wrapped:
                     irs, its, izs = np.unravel_index(
                         Q.indices, self.shape_edges_y + np.r_[0, 2, 0], order="F"
@@ -2007,7 +2027,7 @@ class CylindricalMesh(
                 components[1] = Q
             elif location_type == "edges_z":
                 rtz = [self.nodes_x, self._nodes_y_full, self.cell_centers_z]
-                Q = interpolation_matrix(loc, *rtz)
+                Q = interpolation_matrix(loc, *rtz, derivative=derivative)
                 Q = Q @ self._deflation_matrix("edges_z", as_ones=True).T
                 components[2] = Q
             # remove any zero blocks (hstack complains)
@@ -2089,6 +2109,69 @@ class CylindricalMesh(
                 "This will be removed in discretize 1.0.0"
             )
 
+        location_type, location_type_to = self._parse_cartesian_location_types(
+            location_type, location_type_to
+        )
+        return self._cartesian_mesh_interpolation(
+            Mrect, location_type, location_type_to
+        )
+
+    def get_interpolation_plan_cartesian_mesh(
+        self, Mrect, location_type="cell_centers", location_type_to=None
+    ):
+        """Get a cached plan interpolating from the ``CylindricalMesh`` to another mesh.
+
+        The plan applies the operation of
+        :py:meth:`get_interpolation_matrix_cartesian_mesh` with a compiled gather
+        kernel (see :class:`~discretize.utils.InterpolationPlan`), and is built once
+        for every target mesh and pair of location types. Later calls with the same
+        (unchanged) target mesh return the same plan, so fields of many sources can
+        be moved between the meshes without rebuilding it.
+
+        Parameters
+        ----------
+        Mrect : discretize.base.BaseMesh
+            the mesh we are interpolating onto
+        location_type : {'CC', 'N', 'Ex', 'Ey', 'Ez', 'Fx', 'Fy', 'Fz'}
+            gridded locations of the cylindrical mesh.
+        location_type_to : {None, 'CC', 'N', 'Ex', 'Ey', 'Ez', 'Fx', 'Fy', 'Fz'}
+            gridded locations being interpolated to on the other mesh.
+            If *None*, this method will use the same type as *location_type*.
+
+        Returns
+        -------
+        discretize.utils.InterpolationPlan
+
+        Examples
+        --------
+        >>> from discretize import CylindricalMesh, TensorMesh
+        >>> import numpy as np
+        >>> cyl = CylindricalMesh([np.full(10, 0.1), 1, np.full(10, 0.1)])
+        >>> mesh = TensorMesh([10, 10, 10], origin=[-0.5, -0.5, 0])
+        >>> plan = cyl.get_interpolation_plan_cartesian_mesh(mesh, "faces")
+        >>> fields = np.random.rand(cyl.n_faces, 4)
+        >>> fields_cartesian = plan.apply(fields)
+        >>> plan is cyl.get_interpolation_plan_cartesian_mesh(mesh, "faces")
+        True
+        """
+        location_type, location_type_to = self._parse_cartesian_location_types(
+            location_type, location_type_to
+        )
+        if getattr(self, "_cartesian_plans", None) is None:
+            # the plans of a mesh are dropped along with it
+            self._cartesian_plans = weakref.WeakKeyDictionary()
+        plans = self._cartesian_plans.setdefault(Mrect, {})
+        key = (location_type, location_type_to)
+        if key not in plans:
+            plans[key] = InterpolationPlan(
+                self._cartesian_mesh_interpolation(
+                    Mrect, location_type, location_type_to
+                )
+            )
+        return plans[key]
+
+    def _parse_cartesian_location_types(self, location_type, location_type_to):
+        """Validate the location types of an interpolation to a Cartesian mesh."""
         location_type = self._parse_location_type(location_type)
 
         if not self.is_symmetric:
@@ -2100,73 +2183,90 @@ class CylindricalMesh(
         if location_type_to is None:
             location_type_to = location_type
         location_type_to = self._parse_location_type(location_type_to)
+        return location_type, location_type_to
+
+    def _cartesian_mesh_interpolation(self, Mrect, location_type, location_type_to):
+        """Build the interpolation matrix to the gridded locations of another mesh.
 
+        The locations of every component are converted to cylindrical coordinates
+        together, interpolated with a single call for each consecutive run of
+        components interpolated from the same cylindrical locations, and the
+        projection of the vector components onto the Cartesian directions is
+        applied to the matrix entries.
+        """
+        # (cylindrical locations, locations on Mrect, projection) of each block of rows
         if location_type == "faces":
-            # do this three times for each component
-            X = self.get_interpolation_matrix_cartesian_mesh(
-                Mrect, location_type="faces_x", location_type_to=location_type_to + "_x"
-            )
-            Y = self.get_interpolation_matrix_cartesian_mesh(
-                Mrect, location_type="faces_y", location_type_to=location_type_to + "_y"
-            )
-            Z = self.get_interpolation_matrix_cartesian_mesh(
-                Mrect, location_type="faces_z", location_type_to=location_type_to + "_z"
-            )
-            return sp.vstack((X, Y, Z))
-        if location_type == "edges":
-            X = self.get_interpolation_matrix_cartesian_mesh(
-                Mrect, location_type="edges_x", location_type_to=location_type_to + "_x"
-            )
-            Y = self.get_interpolation_matrix_cartesian_mesh(
-                Mrect, location_type="edges_y", location_type_to=location_type_to + "_y"
-            )
-            Z = spzeros(getattr(Mrect, "n_" + location_type_to + "_z"), self.n_edges)
-            return sp.vstack((X, Y, Z))
+            blocks = [
+                ("faces_x", location_type_to + "_x", "faces"),
+                ("faces_x", location_type_to + "_y", "faces"),
+                ("faces_z", location_type_to + "_z", None),
+            ]
+        elif location_type == "edges":
+            blocks = [
+                ("edges_y", location_type_to + "_x", "edges"),
+                ("edges_y", location_type_to + "_y", "edges"),
+                (None, location_type_to + "_z", None),
+            ]
+        elif location_type in ["faces_x", "faces_y"]:
+            blocks = [("faces_x", location_type_to, "faces")]
+        elif location_type in ["edges_x", "edges_y"]:
+            blocks = [("edges_y", location_type_to, "edges")]
+        else:
+            blocks = [(location_type, location_type_to, None)]
+        n_cols = {"faces": self.n_faces, "edges": self.n_edges}.get(
+            location_type.split("_")[0], None
+        )
 
-        grid = getattr(Mrect, location_type_to)
+        grid = np.vstack([getattr(Mrect, loc_to) for _, loc_to, _ in blocks])
         # This is unit circle stuff, 0 to 2*pi, starting at x-axis, rotating
         # counter clockwise in an x-y slice
-        theta = (
-            -np.arctan2(
-                grid[:, 0] - self.cartesian_origin[0],
-                grid[:, 1] - self.cartesian_origin[1],
-            )
-            + np.pi / 2
-        )
+        x = grid[:, 0] - self.cartesian_origin[0]
+        y = grid[:, 1] - self.cartesian_origin[1]
+        theta = np.arctan2(y, x)
         theta[theta < 0] += np.pi * 2.0
-        r = (
-            (grid[:, 0] - self.cartesian_origin[0]) ** 2
-            + (grid[:, 1] - self.cartesian_origin[1]) ** 2
-        ) ** 0.5
+        G = np.c_[np.sqrt(x**2 + y**2), theta, grid[:, 2]]
+
+        proj = np.ones(len(grid))
+        blocks_Q = []
+        start = 0
+        for i, (loc, loc_to, projection) in enumerate(blocks):
+            stop = start + len(getattr(Mrect, loc_to))
+            if projection is not None:
+                component = loc_to.split("_")
+                if component[0] == "faces":
+                    directions = Mrect.face_normals
+                    offsets = np.cumsum([0, Mrect.nFx, Mrect.nFy, Mrect.nFz])
+                else:
+                    directions = Mrect.edge_tangents
+                    offsets = np.cumsum([0, Mrect.nEx, Mrect.nEy, Mrect.nEz])
+                axis = "xyz".index(component[1])
+                directions = directions[offsets[axis] : offsets[axis + 1]]
+                if projection == "faces":
+                    proj[start:stop] = (
+                        np.cos(theta[start:stop]) * directions[:, 0]
+                        + np.sin(theta[start:stop]) * directions[:, 1]
+                    )
+                else:
+                    proj[start:stop] = (
+                        -np.sin(theta[start:stop]) * directions[:, 0]
+                        + np.cos(theta[start:stop]) * directions[:, 1]
+                    )
+            if i > 0 and blocks[i - 1][0] == loc:
+                # extend the previous run of rows from the same locations
+                blocks_Q[-1][2] = stop
+            else:
+                blocks_Q.append([loc, start, stop])
+            start = stop
 
-        if location_type in ["cell_centers", "nodes", "faces_z", "edges_z"]:
-            G, proj = np.c_[r, theta, grid[:, 2]], np.ones(r.size)
-        else:
-            dotMe = {
-                "faces_x": Mrect.face_normals[: Mrect.nFx, :],
-                "faces_y": Mrect.face_normals[Mrect.nFx : (Mrect.nFx + Mrect.nFy), :],
-                "faces_z": Mrect.face_normals[-Mrect.nFz :, :],
-                "edges_x": Mrect.edge_tangents[: Mrect.nEx, :],
-                "edges_y": Mrect.edge_tangents[Mrect.nEx : (Mrect.nEx + Mrect.nEy), :],
-                "edges_z": Mrect.edge_tangents[-Mrect.nEz :, :],
-            }[location_type_to]
-            if "faces" in location_type:
-                normals = np.c_[np.cos(theta), np.sin(theta), np.zeros(theta.size)]
-                proj = (normals * dotMe).sum(axis=1)
-            elif "edges" in location_type:
-                tangents = np.c_[-np.sin(theta), np.cos(theta), np.zeros(theta.size)]
-                proj = (tangents * dotMe).sum(axis=1)
-            G = np.c_[r, theta, grid[:, 2]]
-
-        interp_type = location_type
-        if interp_type == "faces_y":
-            interp_type = "faces_x"
-        elif interp_type == "edges_x":
-            interp_type = "edges_y"
-
-        Pc2r = self.get_interpolation_matrix(G, interp_type)
-        Proj = sdiag(proj)
-        return Proj * Pc2r
+        Qs = []
+        for loc, start, stop in blocks_Q:
+            if loc is None:
+                Qs.append(spzeros(stop - start, n_cols))
+            else:
+                Qs.append(self.get_interpolation_matrix(G[start:stop], loc))
+        Q = sp.vstack(Qs, format="csr") if len(Qs) > 1 else Qs[0].tocsr()
+        Q.data *= np.repeat(proj, np.diff(Q.indptr))
+        return Q
 
     # DEPRECATIONS
     areaFx = deprecate_property(
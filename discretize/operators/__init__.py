@@ -14,7 +14,8 @@ Operator Classes
 
   DiffOperators
   InnerProducts
+  InnerProductPlan
 """
 
 from discretize.operators.differential_operators import DiffOperators
-from discretize.operators.inner_products import InnerProducts
+from discretize.operators.inner_products import InnerProducts, InnerProductPlan
@@ -992,6 +992,9 @@ class DiffOperators(BaseMesh):
             - :py:attr:`~discretize.operators.DiffOperators.stencil_cell_gradient_y`
             - :py:attr:`~discretize.operators.DiffOperators.stencil_cell_gradient_z`
 
+        The cell gradient built for a set of boundary conditions is cached, so
+        returning to previously used boundary conditions does not rebuild it.
+
         By default, the mesh assumes a zero Neumann boundary condition on the
         entire boundary. To define robin boundary conditions, see
         :py:attr:`~discretize.operators.DiffOperators.cell_gradient_weak_form_robin`.
@@ -1037,12 +1040,20 @@ class DiffOperators(BaseMesh):
         for i, bc_i in enumerate(BC):
             BC[i] = _validate_BC(bc_i)
 
-        # ensure we create a new gradient next time we call it
-        self._cell_gradient = None
+        # reuse the gradient previously built for these conditions, if any
+        key = tuple(tuple(bc_i) for bc_i in BC)
+        self._cell_gradient = self._cell_gradient_cache.get(key, None)
         self._cell_gradient_BC = None
         self._cell_gradient_BC_list = BC
         return BC
 
+    @property
+    def _cell_gradient_cache(self):
+        """Cell gradient operators keyed by boundary conditions."""
+        if getattr(self, "_cell_gradients", None) is None:
+            self._cell_gradients = {}
+        return self._cell_gradients
+
     @property
     def stencil_cell_gradient_x(self):
         r"""Differencing operator along x-direction (cell centers to x-faces).
@@ -1590,6 +1601,8 @@ class DiffOperators(BaseMesh):
                 self.aveCC2F * self.cell_volumes
             )  # Average volume between adjacent cells
             self._cell_gradient = sdiag(S / V) * G
+            key = tuple(tuple(bc_i) for bc_i in self._cell_gradient_BC_list)
+            self._cell_gradient_cache[key] = self._cell_gradient
         return self._cell_gradient
 
     def cell_gradient_weak_form_robin(self, alpha=0.0, beta=1.0, gamma=0.0):
@@ -2296,6 +2309,9 @@ class DiffOperators(BaseMesh):
     def get_BC_projections(self, BC, discretization="CC"):
         """Create the weak form boundary condition projection matrices.
 
+        The projection matrices are cached for each set of boundary conditions,
+        so switching between a few boundary conditions does not rebuild them.
+
         Examples
         --------
         .. code:: python
@@ -2325,80 +2341,38 @@ class DiffOperators(BaseMesh):
         for i, bc_i in enumerate(BC):
             BC[i] = _validate_BC(bc_i)
 
-        def projDirichlet(n, bc):
-            bc = _validate_BC(bc)
-            ij = ([0, n], [0, 1])
-            vals = [0, 0]
-            if bc[0] == "dirichlet":
-                vals[0] = -1
-            if bc[1] == "dirichlet":
-                vals[1] = 1
-            return sp.csr_matrix((vals, ij), shape=(n + 1, 2))
-
-        def projNeumannIn(n, bc):
-            bc = _validate_BC(bc)
-            P = sp.identity(n + 1).tocsr()
-            if bc[0] == "neumann":
-                P = P[1:, :]
-            if bc[1] == "neumann":
-                P = P[:-1, :]
-            return P
-
-        def projNeumannOut(n, bc):
-            bc = _validate_BC(bc)
-            ij = ([0, 1], [0, n])
-            vals = [0, 0]
-            if bc[0] == "neumann":
-                vals[0] = 1
-            if bc[1] == "neumann":
-                vals[1] = 1
-            return sp.csr_matrix((vals, ij), shape=(2, n + 1))
-
-        n = self.vnC
-        indF = self.face_boundary_indices
-        if self.dim == 1:
-            Pbc = projDirichlet(n[0], BC[0])
-            indF = indF[0] | indF[1]
-            Pbc = Pbc * sdiag(self.face_areas[indF])
-
-            Pin = projNeumannIn(n[0], BC[0])
-
-            Pout = projNeumannOut(n[0], BC[0])
-
-        elif self.dim == 2:
-            Pbc1 = sp.kron(speye(n[1]), projDirichlet(n[0], BC[0]))
-            Pbc2 = sp.kron(projDirichlet(n[1], BC[1]), speye(n[0]))
-            Pbc = sp.block_diag((Pbc1, Pbc2), format="csr")
-            indF = np.r_[(indF[0] | indF[1]), (indF[2] | indF[3])]
-            Pbc = Pbc * sdiag(self.face_areas[indF])
-
-            P1 = sp.kron(speye(n[1]), projNeumannIn(n[0], BC[0]))
-            P2 = sp.kron(projNeumannIn(n[1], BC[1]), speye(n[0]))
-            Pin = sp.block_diag((P1, P2), format="csr")
-
-            P1 = sp.kron(speye(n[1]), projNeumannOut(n[0], BC[0]))
-            P2 = sp.kron(projNeumannOut(n[1], BC[1]), speye(n[0]))
-            Pout = sp.block_diag((P1, P2), format="csr")
-
-        elif self.dim == 3:
-            Pbc1 = kron3(speye(n[2]), speye(n[1]), projDirichlet(n[0], BC[0]))
-            Pbc2 = kron3(speye(n[2]), projDirichlet(n[1], BC[1]), speye(n[0]))
-            Pbc3 = kron3(projDirichlet(n[2], BC[2]), speye(n[1]), speye(n[0]))
-            Pbc = sp.block_diag((Pbc1, Pbc2, Pbc3), format="csr")
-            indF = np.r_[(indF[0] | indF[1]), (indF[2] | indF[3]), (indF[4] | indF[5])]
-            Pbc = Pbc * sdiag(self.face_areas[indF])
-
-            P1 = kron3(speye(n[2]), speye(n[1]), projNeumannIn(n[0], BC[0]))
-            P2 = kron3(speye(n[2]), projNeumannIn(n[1], BC[1]), speye(n[0]))
-            P3 = kron3(projNeumannIn(n[2], BC[2]), speye(n[1]), speye(n[0]))
-            Pin = sp.block_diag((P1, P2, P3), format="csr")
+        key = tuple(tuple(bc_i) for bc_i in BC)
+        cache = self._BC_projection_cache
+        if key not in cache:
+            faces, axes, sides = self._cell_centered_boundary_faces
+            n_faces = self.nF
+            n_boundary = len(faces)
+            is_dirichlet = np.array([[bc_i == "dirichlet" for bc_i in bc] for bc in BC])
+            dirichlet = is_dirichlet[axes, sides]
+
+            # -1 on the lower side and 1 on the upper side of Dirichlet boundaries
+            b_ind = np.where(dirichlet)[0]
+            vals = (2 * sides[b_ind] - 1) * self.face_areas[faces[b_ind]]
+            Pbc = sp.csr_matrix(
+                (vals, (faces[b_ind], b_ind)), shape=(n_faces, n_boundary)
+            )
 
-            P1 = kron3(speye(n[2]), speye(n[1]), projNeumannOut(n[0], BC[0]))
-            P2 = kron3(speye(n[2]), projNeumannOut(n[1], BC[1]), speye(n[0]))
-            P3 = kron3(projNeumannOut(n[2], BC[2]), speye(n[1]), speye(n[0]))
-            Pout = sp.block_diag((P1, P2, P3), format="csr")
+            # select every face not on a Neumann boundary
+            interior = np.ones(n_faces, dtype=bool)
+            interior[faces[~dirichlet]] = False
+            in_faces = np.where(interior)[0]
+            Pin = sp.csr_matrix(
+                (np.ones(len(in_faces)), (np.arange(len(in_faces)), in_faces)),
+                shape=(len(in_faces), n_faces),
+            )
 
-        return Pbc, Pin, Pout
+            b_ind = np.where(~dirichlet)[0]
+            Pout = sp.csr_matrix(
+                (np.ones(len(b_ind)), (b_ind, faces[b_ind])),
+                shape=(n_boundary, n_faces),
+            )
+            cache[key] = (Pbc, Pin, Pout)
+        return cache[key]
 
     def get_BC_projections_simple(self, discretization="CC"):
         """Create weak form boundary condition projection matrices for mixed boundary condition."""
@@ -2407,60 +2381,65 @@ class DiffOperators(BaseMesh):
                 "Boundary conditions only implemented" "for CC discretization."
             )
 
-        def projBC(n):
-            ij = ([0, n], [0, 1])
-            vals = [0, 0]
-            vals[0] = 1
-            vals[1] = 1
-            return sp.csr_matrix((vals, ij), shape=(n + 1, 2))
-
-        def projDirichlet(n, bc):
-            bc = _validate_BC(bc)
-            ij = ([0, n], [0, 1])
-            vals = [0, 0]
-            if bc[0] == "dirichlet":
-                vals[0] = -1
-            if bc[1] == "dirichlet":
-                vals[1] = 1
-            return sp.csr_matrix((vals, ij), shape=(n + 1, 2))
-
-        BC = [
-            ["dirichlet", "dirichlet"],
-            ["dirichlet", "dirichlet"],
-            ["dirichlet", "dirichlet"],
-        ]
-        n = self.vnC
-        indF = self.face_boundary_indices
+        cache = self._BC_projection_cache
+        if "simple" not in cache:
+            faces, axes, sides = self._cell_centered_boundary_faces
+            n_boundary = len(faces)
+            Pbc = sp.csr_matrix(
+                (
+                    (2 * sides - 1) * self.face_areas[faces],
+                    (faces, np.arange(n_boundary)),
+                ),
+                shape=(self.nF, n_boundary),
+            )
+            B = sp.csr_matrix(
+                (np.ones(n_boundary), (np.arange(n_boundary), faces)),
+                shape=(n_boundary, self.nF),
+            )
+            cache["simple"] = (Pbc, B)
+        return cache["simple"]
 
-        if self.dim == 1:
-            Pbc = projDirichlet(n[0], BC[0])
-            B = projBC(n[0])
-            indF = indF[0] | indF[1]
-            Pbc = Pbc * sdiag(self.face_areas[indF])
+    @property
+    def _BC_projection_cache(self):
+        """Boundary condition projection matrices keyed by boundary conditions."""
+        if getattr(self, "_BC_projections", None) is None:
+            self._BC_projections = {}
+        return self._BC_projections
 
-        elif self.dim == 2:
-            Pbc1 = sp.kron(speye(n[1]), projDirichlet(n[0], BC[0]))
-            Pbc2 = sp.kron(projDirichlet(n[1], BC[1]), speye(n[0]))
-            Pbc = sp.block_diag((Pbc1, Pbc2), format="csr")
-            B1 = sp.kron(speye(n[1]), projBC(n[0]))
-            B2 = sp.kron(projBC(n[1]), speye(n[0]))
-            B = sp.block_diag((B1, B2), format="csr")
-            indF = np.r_[(indF[0] | indF[1]), (indF[2] | indF[3])]
-            Pbc = Pbc * sdiag(self.face_areas[indF])
+    @property
+    def _cell_centered_boundary_faces(self):
+        """Boundary faces of a tensor product grid of cells.
 
-        elif self.dim == 3:
-            Pbc1 = kron3(speye(n[2]), speye(n[1]), projDirichlet(n[0], BC[0]))
-            Pbc2 = kron3(speye(n[2]), projDirichlet(n[1], BC[1]), speye(n[0]))
-            Pbc3 = kron3(projDirichlet(n[2], BC[2]), speye(n[1]), speye(n[0]))
-            Pbc = sp.block_diag((Pbc1, Pbc2, Pbc3), format="csr")
-            B1 = kron3(speye(n[2]), speye(n[1]), projBC(n[0]))
-            B2 = kron3(speye(n[2]), projBC(n[1]), speye(n[0]))
-            B3 = kron3(projBC(n[2]), speye(n[1]), speye(n[0]))
-            B = sp.block_diag((B1, B2, B3), format="csr")
-            indF = np.r_[(indF[0] | indF[1]), (indF[2] | indF[3]), (indF[4] | indF[5])]
-            Pbc = Pbc * sdiag(self.face_areas[indF])
-
-        return Pbc, B.T
+        Returns
+        -------
+        faces : (n_boundary_faces,) numpy.ndarray of int
+            The index of every boundary face, in face order.
+        axes : (n_boundary_faces,) numpy.ndarray of int
+            The axis each face is normal to.
+        sides : (n_boundary_faces,) numpy.ndarray of int
+            0 for faces on the lower side of the domain, 1 for the upper side.
+        """
+        if getattr(self, "_cell_centered_boundary_faces_cache", None) is None:
+            n = self.vnC
+            faces, axes, sides = [], [], []
+            offset = 0
+            for axis in range(self.dim):
+                shape = list(n)
+                shape[axis] += 1
+                ind = np.arange(np.prod(shape)).reshape(shape, order="F")
+                ind = np.take(ind, [0, n[axis]], axis=axis)
+                side = np.zeros(ind.shape, dtype=int)
+                np.moveaxis(side, axis, 0)[1] = 1
+                faces.append(ind.reshape(-1, order="F") + offset)
+                sides.append(side.reshape(-1, order="F"))
+                axes.append(np.full(ind.size, axis))
+                offset += np.prod(shape)
+            self._cell_centered_boundary_faces_cache = (
+                np.concatenate(faces),
+                np.concatenate(axes),
+                np.concatenate(sides),
+            )
+        return self._cell_centered_boundary_faces_cache
 
     ###########################################################################
     #                                                                         #
@@ -1,5 +1,6 @@
 """Construct inner product operators for tensor like meshes."""
 from scipy import sparse as sp
+from scipy.sparse.linalg import LinearOperator
 from discretize.base import BaseMesh
 from discretize.utils import (
     sub2ind,
@@ -11,11 +12,11 @@ from discretize.utils import (
     inverse_2x2_block_diagonal,
     get_subarray,
     inverse_3x3_block_diagonal,
-    spzeros,
     sdinv,
     mkvc,
     is_scalar,
 )
+from discretize.utils.matrix_utils import _row_outer_triplets
 import numpy as np
 
 
@@ -37,6 +38,7 @@ class InnerProducts(BaseMesh):
         invert_model=False,
         invert_matrix=False,
         do_fast=True,
+        batch=False,
         **kwargs,
     ):
         # Inherited documentation from discretize.base.BaseMesh
@@ -57,6 +59,13 @@ class InnerProducts(BaseMesh):
             )
             do_fast = kwargs["doFast"]
 
+        if batch:
+            return self._getBatchInnerProduct(
+                "F",
+                model,
+                invert_model=invert_model,
+                invert_matrix=invert_matrix,
+            )
         return self._getInnerProduct(
             "F",
             model=model,
@@ -71,6 +80,7 @@ class InnerProducts(BaseMesh):
         invert_model=False,
         invert_matrix=False,
         do_fast=True,
+        batch=False,
         **kwargs,
     ):
         # Inherited documentation from discretize.base.BaseMesh
@@ -89,6 +99,13 @@ class InnerProducts(BaseMesh):
                 "The doFast keyword argument has been removed, please use do_fast. "
                 "This will be removed in discretize 1.0.0",
             )
+        if batch:
+            return self._getBatchInnerProduct(
+                "E",
+                model,
+                invert_model=invert_model,
+                invert_matrix=invert_matrix,
+            )
         return self._getInnerProduct(
             "E",
             model=model,
@@ -97,6 +114,80 @@ class InnerProducts(BaseMesh):
             do_fast=do_fast,
         )
 
+    @property
+    def cache_inner_product_projections(self):
+        """Whether inner product projection matrices are cached on the mesh.
+
+        The general inner product construction requires :math:`2^{dim}`
+        projection matrices for faces or edges. These depend only on the
+        geometry of the mesh, so by default they are built on the first call and
+        re-used for every subsequent model (as are the inner product plans used
+        for batches of models). Set this to *False* to free the cached matrices and
+        rebuild them on every call instead, trading speed for memory.
+
+        Returns
+        -------
+        bool
+        """
+        return getattr(self, "_cache_inner_product_projections", True)
+
+    @cache_inner_product_projections.setter
+    def cache_inner_product_projections(self, value):
+        value = bool(value)
+        if not value:
+            self._inner_product_projections = None
+        self._cache_inner_product_projections = value
+
+    def get_face_inner_product_plan(self, model=None):
+        """Create a reusable plan for face inner products with a fixed sparsity.
+
+        The sparsity pattern of the face inner product matrix only depends on the
+        mesh and on the type of the model (scalar, isotropic, diagonal anisotropic
+        or full tensor). The returned plan pre-computes this pattern once, and then
+        only refills the data of a pre-allocated CSR matrix for every new model.
+
+        Parameters
+        ----------
+        model : None, float or numpy.ndarray, optional
+            A template model used to determine the tensor type of the plan. See
+            :py:meth:`~discretize.base.BaseMesh.get_face_inner_product` for the
+            accepted shapes. *None* is treated as a scalar model.
+
+        Returns
+        -------
+        discretize.operators.InnerProductPlan
+
+        See Also
+        --------
+        get_face_inner_product
+        """
+        return InnerProductPlan(self, "F", model)
+
+    def get_edge_inner_product_plan(self, model=None):
+        """Create a reusable plan for edge inner products with a fixed sparsity.
+
+        The sparsity pattern of the edge inner product matrix only depends on the
+        mesh and on the type of the model (scalar, isotropic, diagonal anisotropic
+        or full tensor). The returned plan pre-computes this pattern once, and then
+        only refills the data of a pre-allocated CSR matrix for every new model.
+
+        Parameters
+        ----------
+        model : None, float or numpy.ndarray, optional
+            A template model used to determine the tensor type of the plan. See
+            :py:meth:`~discretize.base.BaseMesh.get_edge_inner_product` for the
+            accepted shapes. *None* is treated as a scalar model.
+
+        Returns
+        -------
+        discretize.operators.InnerProductPlan
+
+        See Also
+        --------
+        get_edge_inner_product
+        """
+        return InnerProductPlan(self, "E", model)
+
     def get_edge_inner_product_surface(  # NOQA D102
         self, model=None, invert_model=False, invert_matrix=False, **kwargs
     ):
@@ -217,6 +308,69 @@ class InnerProducts(BaseMesh):
 
         return A
 
+    def _getBatchInnerProduct(
+        self, projection_type, models, invert_model=False, invert_matrix=False
+    ):
+        """Get the inner product matrices for a batch of models.
+
+        Parameters
+        ----------
+        projection_type : str
+            'F' for faces 'E' for edges
+        models : numpy.ndarray
+            material properties with the models along the last axis;
+            (nC, n_models) or (nC, (3 or 6), n_models)
+        invert_model : bool
+            inverts the material properties
+        invert_matrix : bool
+            inverts the matrices
+
+        Returns
+        -------
+        numpy.ndarray or list of scipy.sparse.csr_matrix
+            (n, n_models) diagonals of the inner product matrices if they are
+            diagonal, otherwise a list of the n_models inner product matrices.
+        """
+        models = np.asarray(models)
+        if models.ndim < 2:
+            raise ValueError(
+                "A batch of models must have at least 2 dimensions, "
+                f"got an array with shape {models.shape}."
+            )
+        n_models = models.shape[-1]
+        models = models.reshape((-1, n_models), order="F")
+
+        plan = self._get_inner_product_plan(projection_type, models[:, 0])
+        if invert_model:
+            models = np.stack(
+                [inverse_property_tensor(self, m) for m in models.T], axis=-1
+            )
+        values = plan.values(models)
+
+        if plan.is_diagonal:
+            if invert_matrix:
+                values = 1.0 / values
+            return values
+        if invert_matrix:
+            raise Exception("Solver needed to invert A.")
+        M = plan.matrix
+        return [
+            sp.csr_matrix((vals, M.indices, M.indptr), shape=M.shape)
+            for vals in values.T
+        ]
+
+    def _get_inner_product_plan(self, projection_type, model):
+        """Get an inner product plan, cached by projection and tensor type."""
+        if not self.cache_inner_product_projections:
+            return InnerProductPlan(self, projection_type, model)
+        cache = getattr(self, "_inner_product_projections", None)
+        if cache is None:
+            cache = self._inner_product_projections = {}
+        key = ("plan", projection_type, TensorType(self, model)._tt)
+        if key not in cache:
+            cache[key] = InnerProductPlan(self, projection_type, model)
+        return cache[key]
+
     def _getInnerProductProjectionMatrices(self, projection_type, tensorType):
         """Get the inner product projection matrices.
 
@@ -236,6 +390,16 @@ class InnerProducts(BaseMesh):
         if projection_type not in ["F", "E"]:
             raise TypeError("projection_type must be 'F' for faces or 'E' for edges")
 
+        # The projections only depend on the mesh geometry (not on the tensor
+        # type), so a single set per projection type can be re-used.
+        use_cache = self.cache_inner_product_projections
+        if use_cache:
+            cache = getattr(self, "_inner_product_projections", None)
+            if cache is None:
+                cache = self._inner_product_projections = {}
+            if projection_type in cache:
+                return cache[projection_type]
+
         d = self.dim
         # We will multiply by sqrt on each side to keep symmetry
         V = sp.kron(sp.identity(d), sdiag(np.sqrt((2 ** (-d)) * self.cell_volumes)))
@@ -268,10 +432,19 @@ class InnerProducts(BaseMesh):
             }
             proj = getattr(self, "_getEdgeP" + ("x" * d))()
 
-        return [V * proj(*locs[node][d - 1]) for node in nodes]
+        Ps = [V * proj(*locs[node][d - 1]) for node in nodes]
+        if use_cache:
+            cache[projection_type] = Ps
+        return Ps
 
     def get_face_inner_product_deriv(  # NOQA D102
-        self, model, do_fast=True, invert_model=False, invert_matrix=False, **kwargs
+        self,
+        model,
+        do_fast=True,
+        invert_model=False,
+        invert_matrix=False,
+        matrix_free=False,
+        **kwargs,
     ):
         # Inherited documentation from discretize.base.BaseMesh
         if "invProp" in kwargs:
@@ -295,10 +468,17 @@ class InnerProducts(BaseMesh):
             do_fast=do_fast,
             invert_model=invert_model,
             invert_matrix=invert_matrix,
+            matrix_free=matrix_free,
         )
 
     def get_edge_inner_product_deriv(  # NOQA D102
-        self, model, do_fast=True, invert_model=False, invert_matrix=False, **kwargs
+        self,
+        model,
+        do_fast=True,
+        invert_model=False,
+        invert_matrix=False,
+        matrix_free=False,
+        **kwargs,
     ):
         # Inherited documentation from discretize.base.BaseMesh
         if "invProp" in kwargs:
@@ -322,6 +502,7 @@ class InnerProducts(BaseMesh):
             do_fast=do_fast,
             invert_model=invert_model,
             invert_matrix=invert_matrix,
+            matrix_free=matrix_free,
         )
 
     def get_edge_inner_product_surface_deriv(  # NOQA D102
@@ -399,6 +580,9 @@ class InnerProducts(BaseMesh):
         if dMdprop is not None:
 
             def innerProductDeriv(v):
+                v = np.asarray(v)
+                if v.ndim == 2:
+                    return sdiag(mkvc(v)) * sp.vstack([dMdprop] * v.shape[1])
                 return sdiag(v) * dMdprop
 
             return innerProductDeriv
@@ -412,6 +596,7 @@ class InnerProducts(BaseMesh):
         do_fast=True,
         invert_model=False,
         invert_matrix=False,
+        matrix_free=False,
     ):
         """Get the inner product projection derivative function.
 
@@ -427,12 +612,24 @@ class InnerProducts(BaseMesh):
             inverts the material property
         invert_matrix : bool
             inverts the matrix
+        matrix_free : bool
+            return linear operators instead of sparse matrices
 
         Returns
         -------
         callable
             dMdm, the derivative of the inner product matrix (nE, nC*nA)
         """
+        if matrix_free:
+            plan = self._get_inner_product_plan(projection_type, model)
+
+            def innerProductDeriv(v):
+                return plan.deriv(
+                    v, model, invert_model=invert_model, invert_matrix=invert_matrix
+                )
+
+            return innerProductDeriv
+
         fast = None
         if hasattr(self, "_fastInnerProductDeriv") and do_fast:
             fast = self._fastInnerProductDeriv(
@@ -467,7 +664,8 @@ class InnerProducts(BaseMesh):
         model : numpy.ndarray
             material property (tensor properties are possible) at each cell center (nC, (1, 3, or 6))
         v : numpy.ndarray
-            vector to multiply (required in the general implementation)
+            vector (n,), or vectors (n, n_v), to multiply (required in the general
+            implementation)
         P : list
             list of projection matrices
         projection_type : str
@@ -476,13 +674,12 @@ class InnerProducts(BaseMesh):
         Returns
         -------
         scipy.sparse.csr_matrix
-            dMdm, the derivative of the inner product matrix (n, nC*nA)
+            dMdm, the derivative of the inner product matrix (n, nC*nA), or of
+            each of its products with the columns of v stacked (n*n_v, nC*nA)
         """
         if projection_type not in ["F", "E"]:
             raise TypeError("projection_type must be 'F' for faces or 'E' for edges")
 
-        n = getattr(self, "n" + projection_type)
-
         if tensorType == -1:
             return None
 
@@ -490,82 +687,49 @@ class InnerProducts(BaseMesh):
             raise Exception("v must be supplied for this implementation.")
 
         d = self.dim
-        Z = spzeros(self.nC, self.nC)
-
+        n_c = self.nC
+        v = np.asarray(v)
+        n_v = 1 if v.ndim == 1 else v.shape[1]
+
+        # Each projected row (component a of cell c) scales the model parameters
+        # in ``params`` by the projected vector entries in ``sources``.
+        comps = np.repeat(np.arange(d), n_c)
+        cells = np.tile(np.arange(n_c), d)
         if tensorType == 0:
-            dMdm = spzeros(n, 1)
-            for p in P:
-                dMdm = dMdm + sp.csr_matrix(
-                    (p.T * (p * v), (range(n), np.zeros(n))), shape=(n, 1)
-                )
-        if d == 1:
-            if tensorType == 1:
-                dMdm = spzeros(n, self.nC)
-                for p in P:
-                    dMdm = dMdm + p.T * sdiag(p * v)
-        elif d == 2:
-            if tensorType == 1:
-                dMdm = spzeros(n, self.nC)
-                for p in P:
-                    Y = p * v
-                    y1 = Y[: self.nC]
-                    y2 = Y[self.nC :]
-                    dMdm = dMdm + p.T * sp.vstack((sdiag(y1), sdiag(y2)))
-            elif tensorType == 2:
-                dMdms = [spzeros(n, self.nC) for _ in range(2)]
-                for p in P:
-                    Y = p * v
-                    y1 = Y[: self.nC]
-                    y2 = Y[self.nC :]
-                    dMdms[0] = dMdms[0] + p.T * sp.vstack((sdiag(y1), Z))
-                    dMdms[1] = dMdms[1] + p.T * sp.vstack((Z, sdiag(y2)))
-                dMdm = sp.hstack(dMdms)
-            elif tensorType == 3:
-                dMdms = [spzeros(n, self.nC) for _ in range(3)]
-                for p in P:
-                    Y = p * v
-                    y1 = Y[: self.nC]
-                    y2 = Y[self.nC :]
-                    dMdms[0] = dMdms[0] + p.T * sp.vstack((sdiag(y1), Z))
-                    dMdms[1] = dMdms[1] + p.T * sp.vstack((Z, sdiag(y2)))
-                    dMdms[2] = dMdms[2] + p.T * sp.vstack((sdiag(y2), sdiag(y1)))
-                dMdm = sp.hstack(dMdms)
-        elif d == 3:
-            if tensorType == 1:
-                dMdm = spzeros(n, self.nC)
-                for p in P:
-                    Y = p * v
-                    y1 = Y[: self.nC]
-                    y2 = Y[self.nC : self.nC * 2]
-                    y3 = Y[self.nC * 2 :]
-                    dMdm = dMdm + p.T * sp.vstack((sdiag(y1), sdiag(y2), sdiag(y3)))
-            elif tensorType == 2:
-                dMdms = [spzeros(n, self.nC) for _ in range(3)]
-                for p in P:
-                    Y = p * v
-                    y1 = Y[: self.nC]
-                    y2 = Y[self.nC : self.nC * 2]
-                    y3 = Y[self.nC * 2 :]
-                    dMdms[0] = dMdms[0] + p.T * sp.vstack((sdiag(y1), Z, Z))
-                    dMdms[1] = dMdms[1] + p.T * sp.vstack((Z, sdiag(y2), Z))
-                    dMdms[2] = dMdms[2] + p.T * sp.vstack((Z, Z, sdiag(y3)))
-                dMdm = sp.hstack(dMdms)
-            elif tensorType == 3:
-                dMdms = [spzeros(n, self.nC) for _ in range(6)]
-                for p in P:
-                    Y = p * v
-                    y1 = Y[: self.nC]
-                    y2 = Y[self.nC : self.nC * 2]
-                    y3 = Y[self.nC * 2 :]
-                    dMdms[0] = dMdms[0] + p.T * sp.vstack((sdiag(y1), Z, Z))
-                    dMdms[1] = dMdms[1] + p.T * sp.vstack((Z, sdiag(y2), Z))
-                    dMdms[2] = dMdms[2] + p.T * sp.vstack((Z, Z, sdiag(y3)))
-                    dMdms[3] = dMdms[3] + p.T * sp.vstack((sdiag(y2), sdiag(y1), Z))
-                    dMdms[4] = dMdms[4] + p.T * sp.vstack((sdiag(y3), Z, sdiag(y1)))
-                    dMdms[5] = dMdms[5] + p.T * sp.vstack((Z, sdiag(y3), sdiag(y2)))
-                dMdm = sp.hstack(dMdms)
-
-        return dMdm
+            n_params = 1
+            params = np.zeros((d * n_c, 1), dtype=int)
+        elif tensorType == 1:
+            n_params = n_c
+            params = cells[:, None]
+        elif tensorType == 2:
+            n_params = d * n_c
+            params = np.arange(d * n_c)[:, None]
+        elif tensorType == 3:
+            if d == 2:
+                stencil = np.array([[0, 2], [2, 1]])
+            else:
+                stencil = np.array([[0, 3, 4], [3, 1, 5], [4, 5, 2]])
+            n_params = (d * (d + 1) // 2) * n_c
+            params = stencil[comps] * n_c + cells[:, None]
+        if tensorType == 3:
+            sources = np.arange(d) * n_c + cells[:, None]
+        else:
+            sources = np.arange(d * n_c)[:, None]
+        n_per_row = params.shape[1]
+        n_rows = n_v * d * n_c
+        indices = np.tile(params.reshape(-1), n_v)
+        indptr = n_per_row * np.arange(n_rows + 1)
+
+        dMdm = None
+        for p in P:
+            Y = (p @ v).reshape((d * n_c, n_v), order="F")
+            Y = Y[sources].transpose((2, 0, 1)).reshape(-1)
+            D = sp.csr_matrix((Y, indices, indptr), shape=(n_rows, n_params))
+            if n_v > 1:
+                p = sp.kron(sp.identity(n_v), p, format="csr")
+            term = p.T @ D
+            dMdm = term if dMdm is None else dMdm + term
+        return dMdm.tocsr()
 
     # ------------------------ Geometries ------------------------------
     #
@@ -876,3 +1040,346 @@ class InnerProducts(BaseMesh):
             return PXXX
 
         return Pxxx
+
+
+class InnerProductPlan(object):
+    r"""Reusable inner product matrix with a fixed sparsity pattern.
+
+    An inner product matrix is linear in the model parameters, so its non-zero
+    values can be written as :math:`\mathbf{G \, m}`, where :math:`\mathbf{G}`
+    only depends on the mesh, the projection type and the tensor type of the
+    model. The plan builds :math:`\mathbf{G}` and the CSR structure of the
+    inner product matrix once; updating it for a new model then only refills
+    the ``data`` array of the pre-allocated matrix. Because the structure of the
+    matrix never changes, symbolic factorizations of it can also be re-used.
+
+    Instances are usually created with
+    :py:meth:`~discretize.operators.InnerProducts.get_face_inner_product_plan` or
+    :py:meth:`~discretize.operators.InnerProducts.get_edge_inner_product_plan`.
+
+    Parameters
+    ----------
+    mesh : discretize.operators.InnerProducts
+        The mesh to build the inner products on.
+    projection_type : {'F', 'E'}
+        'F' for faces, 'E' for edges.
+    model : None, float or numpy.ndarray, optional
+        A template model defining the tensor type of the plan. *None* is treated
+        as a scalar model.
+
+    Notes
+    -----
+    The matrix returned by :py:meth:`update` is the same object on every call, and
+    its values are overwritten by subsequent updates. Copy it if you need to keep
+    the values for a previous model. It is only replaced by a new matrix (with the
+    same structure) when the data type of the values changes, e.g. for a complex
+    model after a real one.
+
+    Examples
+    --------
+    >>> from discretize import TensorMesh
+    >>> import numpy as np
+    >>> mesh = TensorMesh([8, 8, 8])
+    >>> plan = mesh.get_face_inner_product_plan(np.ones((mesh.n_cells, 6)))
+    >>> for _ in range(3):
+    ...     sigma = np.c_[np.random.rand(mesh.n_cells, 3) + 1, np.zeros((mesh.n_cells, 3))]
+    ...     Mf = plan.update(sigma)
+    """
+
+    def __init__(self, mesh, projection_type, model=None):
+        projection_type = projection_type[0].upper()
+        if projection_type not in ["F", "E"]:
+            raise TypeError("projection_type must be 'F' for faces or 'E' for edges")
+        if model is None:
+            model = 1.0
+        self._mesh = mesh
+        self._projection_type = projection_type
+        self._tensor_type = TensorType(mesh, model)
+
+        n = getattr(mesh, "n" + projection_type)
+        G = None
+        if self._tensor_type < 3 and hasattr(mesh, "_fastInnerProductDeriv"):
+            # the fast path is diagonal, and linear in the model
+            deriv = mesh._fastInnerProductDeriv(projection_type, model)
+            if deriv is not None:
+                G = deriv(np.ones(n)).tocsr()
+                indices = np.arange(n)
+                indptr = np.arange(n + 1)
+        if G is None:
+            G, indices, indptr = self._get_general_mapping(n)
+        self._G = G
+        self._n_params = G.shape[1]
+        self._is_diagonal = len(indices) == n and np.all(indices == np.arange(n))
+        self._matrix = sp.csr_matrix(
+            (
+                np.zeros(len(indices), dtype=np.result_type(np.asarray(model), float)),
+                indices,
+                indptr,
+            ),
+            shape=(n, n),
+        )
+
+    def _get_general_mapping(self, n):
+        """Build the mapping from the model to the matrix values from projections."""
+        mesh = self._mesh
+        n_cells = mesh.nC
+        d = mesh.dim
+        tensor_type = self._tensor_type
+        Ps = mesh._getInnerProductProjectionMatrices(self._projection_type, tensor_type)
+        if tensor_type == 3:
+            if d == 2:
+                stencil = np.array([[0, 2], [2, 1]])
+            else:
+                stencil = np.array([[0, 3, 4], [3, 1, 5], [4, 5, 2]])
+            pairs = [(a, b) for a in range(d) for b in range(d)]
+        else:
+            pairs = [(a, a) for a in range(d)]
+
+        rows, cols, params, vals = [], [], [], []
+        for P in Ps:
+            P = P.tocsr()
+            blocks = [P[a * n_cells : (a + 1) * n_cells] for a in range(d)]
+            for a, b in pairs:
+                i, j, c, v = _row_outer_triplets(blocks[a], blocks[b])
+                if tensor_type == 0:
+                    c = np.zeros_like(c)
+                elif tensor_type == 2:
+                    c = c + a * n_cells
+                elif tensor_type == 3:
+                    c = c + stencil[a, b] * n_cells
+                rows.append(i)
+                cols.append(j)
+                params.append(c)
+                vals.append(v)
+        rows = np.concatenate(rows).astype(np.int64)
+        cols = np.concatenate(cols).astype(np.int64)
+        params = np.concatenate(params)
+        vals = np.concatenate(vals)
+
+        # sorted, unique (row, col) pairs give the canonical CSR structure
+        keys, entry = np.unique(rows * n + cols, return_inverse=True)
+        indices = keys % n
+        indptr = np.r_[0, np.cumsum(np.bincount(keys // n, minlength=n))]
+        if tensor_type == 0:
+            n_params = 1
+        elif tensor_type == 1:
+            n_params = n_cells
+        elif tensor_type == 2:
+            n_params = d * n_cells
+        else:
+            n_params = (d * (d + 1) // 2) * n_cells
+        G = sp.csr_matrix(
+            (vals, (entry.reshape(-1), params)), shape=(len(keys), n_params)
+        )
+        return G, indices, indptr
+
+    @property
+    def projection_type(self):
+        """The projection type of the inner product, 'F' or 'E'.
+
+        Returns
+        -------
+        str
+        """
+        return self._projection_type
+
+    @property
+    def tensor_type(self):
+        """The type of model this plan was built for.
+
+        Returns
+        -------
+        discretize.utils.TensorType
+        """
+        return self._tensor_type
+
+    @property
+    def is_diagonal(self):
+        """Whether the inner product matrix of this plan is diagonal.
+
+        Returns
+        -------
+        bool
+        """
+        return self._is_diagonal
+
+    @property
+    def matrix(self):
+        """The pre-allocated inner product matrix.
+
+        This holds the values from the most recent call to :py:meth:`update`.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+        """
+        return self._matrix
+
+    def values(self, model):
+        """Evaluate the non-zero values of the inner product matrix.
+
+        Parameters
+        ----------
+        model : (n_param) or (n_param, n_models) numpy.ndarray
+            One model vector, or many model vectors stacked as columns. Complex
+            valued models are supported.
+
+        Returns
+        -------
+        (nnz) or (nnz, n_models) numpy.ndarray
+            The values of the matrix, in the order of the ``data`` array of
+            :py:attr:`matrix`.
+        """
+        model = np.asarray(model)
+        if model.shape[0] != self._n_params:
+            raise ValueError(
+                f"model must have {self._n_params} parameters along its first axis, "
+                f"got {model.shape[0]}."
+            )
+        return self._G @ model
+
+    def update(self, model, invert_model=False):
+        """Refill the inner product matrix for a new model.
+
+        Parameters
+        ----------
+        model : float or numpy.ndarray
+            The new model, which must have the same tensor type as the plan.
+        invert_model : bool, optional
+            The inverse of *model* is used as the physical property.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+            The updated inner product matrix. This is the same object as long as
+            the data type of the values does not change.
+        """
+        if TensorType(self._mesh, model) != self._tensor_type._tt:
+            raise ValueError(
+                "model is not of the same tensor type as the plan, "
+                f"expected {self._tensor_type}"
+            )
+        if invert_model:
+            model = inverse_property_tensor(self._mesh, model)
+        if is_scalar(model):
+            model = np.full(self._n_params, model, dtype=np.result_type(model, float))
+        values = self._G @ mkvc(model)
+        M = self._matrix
+        if values.dtype != M.data.dtype:
+            # e.g. a complex model, the matrix can not hold its values
+            self._matrix = sp.csr_matrix(
+                (values, M.indices, M.indptr), shape=M.shape, copy=False
+            )
+        else:
+            M.data[:] = values
+        return self._matrix
+
+    def deriv(self, v, model=None, invert_model=False, invert_matrix=False):
+        r"""Matrix-free derivative of the inner product matrix times a vector.
+
+        Returns the operator :math:`\partial (\mathbf{M}(\mathbf{m}) \mathbf{v})
+        / \partial \mathbf{m}` without forming it. Since the values of the
+        inner product matrix are :math:`\mathbf{G \, m}`, its product with a
+        model perturbation is :math:`\mathbf{S}_v \mathbf{G} \, \mathbf{w}`,
+        where the sparse :math:`\mathbf{S}_v` scatters every value of the matrix,
+        times the matching entry of :math:`\mathbf{v}`, into its row. Both the
+        forward and the adjoint products are then only two sparse products.
+
+        Parameters
+        ----------
+        v : (n) or (n, n_v) numpy.ndarray
+            The vector multiplying the inner product matrix. For many vectors, the
+            derivatives of the products with every column are stacked by rows.
+        model : float or numpy.ndarray, optional
+            The model to evaluate the derivative at. Only needed if *invert_model*
+            or *invert_matrix*, as the inner product matrix is otherwise linear in
+            the model.
+        invert_model : bool, optional
+            The inverse of *model* is used as the physical property. This is not
+            implemented for full tensor properties.
+        invert_matrix : bool, optional
+            Use the inverse of the inner product matrix. This is only implemented
+            for diagonal inner product matrices.
+
+        Returns
+        -------
+        scipy.sparse.linalg.LinearOperator
+            The (n * n_v, n_params) derivative operator. Products with it (and
+            with its transpose) accept both vectors and matrices.
+        """
+        G = self._G
+        M = self._matrix
+        n = M.shape[0]
+        v = np.asarray(v)
+        if v.shape[0] != n or v.ndim > 2:
+            raise ValueError(f"v must have shape ({n},) or ({n}, n_v), got {v.shape}.")
+        n_v = 1 if v.ndim == 1 else v.shape[1]
+        scale = v.reshape((n, n_v), order="F")[M.indices]
+
+        dprop = None
+        if invert_model or invert_matrix:
+            if model is None:
+                raise ValueError(
+                    "model must be supplied to differentiate an inverted model or matrix."
+                )
+            if TensorType(self._mesh, model) != self._tensor_type._tt:
+                raise ValueError(
+                    "model is not of the same tensor type as the plan, "
+                    f"expected {self._tensor_type}"
+                )
+            if is_scalar(model):
+                model = np.full(
+                    self._n_params, model, dtype=np.result_type(model, float)
+                )
+            prop = mkvc(model)
+            if invert_model:
+                if self._tensor_type == 3:
+                    raise NotImplementedError(
+                        "Inverted model derivatives are not implemented for full tensors."
+                    )
+                prop = 1.0 / prop
+                dprop = -(prop**2)
+            if invert_matrix:
+                if not self._is_diagonal:
+                    raise NotImplementedError(
+                        "Inverted matrix derivatives are only implemented for "
+                        "diagonal inner products."
+                    )
+                scale = -scale / ((G @ prop) ** 2)[:, None]
+
+        n_data = G.shape[0]
+        indptr = np.r_[0, np.cumsum(np.tile(np.diff(M.indptr), n_v))]
+        S = sp.csr_matrix(
+            (scale.T.reshape(-1), np.tile(np.arange(n_data), n_v), indptr),
+            shape=(n * n_v, n_data),
+        )
+        if getattr(self, "_rows", None) is None:
+            self._rows = np.repeat(np.arange(n), np.diff(M.indptr))
+        rows = self._rows
+        scale_conj = scale.T.conj()[:, :, None]
+
+        def scale_model(w):
+            if dprop is None:
+                return w
+            if w.ndim == 2:
+                return dprop[:, None] * w
+            return dprop * w
+
+        def matvec(w):
+            return S @ (G @ scale_model(w))
+
+        def rmatvec(u):
+            # gather the rows of every block of u, and sum the blocks
+            u_data = (u.reshape((n_v, n, -1))[:, rows] * scale_conj).sum(axis=0)
+            if u.ndim == 1:
+                u_data = u_data[:, 0]
+            return scale_model(G.T @ u_data)
+
+        return LinearOperator(
+            (n * n_v, self._n_params),
+            matvec=matvec,
+            rmatvec=rmatvec,
+            matmat=matvec,
+            rmatmat=rmatvec,
+            dtype=np.result_type(scale.dtype, G.dtype),
+        )
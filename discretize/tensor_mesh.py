@@ -1,16 +1,107 @@
 """Module housing the TensorMesh implementation."""
 import itertools
 import numpy as np
+import scipy.fft
+import scipy.sparse as sp
+import scipy.linalg
+from scipy.sparse.linalg import LinearOperator
 
 from discretize.base import BaseRectangularMesh, BaseTensorMesh
+from discretize.base.base_tensor_mesh import _CoarsenHierarchyMixin
 from discretize.operators import DiffOperators, InnerProducts
+from discretize.operators.differential_operators import _validate_BC, _ddxCellGrad
 from discretize.mixins import InterfaceMixins, TensorMeshIO
-from discretize.utils import mkvc
+from discretize.utils import (
+    mkvc,
+    sub2ind,
+    sdiag,
+    speye,
+    ddx,
+    av,
+    av_extrap,
+    KroneckerOperator,
+)
 from discretize.utils.code_utils import deprecate_property
 
 from .tensor_cell import TensorCell
 
 
+def _coarsen_axis(h):
+    """Coarsen the cell widths of an axis by merging neighboring cells in pairs.
+
+    Returns the coarse widths and the 1D prolongation operators, mapping coarse
+    to fine, for cell centered (piecewise constant) and nodal (linear) values.
+    """
+    n = len(h)
+    h_coarse = h[: n - n % 2].reshape(-1, 2).sum(axis=1)
+    if n % 2:
+        h_coarse = np.r_[h_coarse, h[-1]]
+    n_coarse = len(h_coarse)
+    P_cell = sp.csr_matrix(
+        (np.ones(n), (np.arange(n), np.arange(n) // 2)), shape=(n, n_coarse)
+    )
+
+    # the coarse nodes are a subset of the fine nodes
+    nodes = np.r_[0, np.cumsum(h)]
+    coarse_nodes = np.r_[0, np.cumsum(h_coarse)]
+    j = np.minimum(np.arange(n + 1) // 2, n_coarse - 1)
+    t = (nodes - coarse_nodes[j]) / h_coarse[j]
+    rows = np.r_[np.arange(n + 1), np.arange(n + 1)]
+    P_node = sp.csr_matrix(
+        (np.r_[1 - t, t], (rows, np.r_[j, j + 1])), shape=(n + 1, n_coarse + 1)
+    )
+    P_node.eliminate_zeros()
+    return h_coarse, P_cell, P_node
+
+
+def _laplacian_axis_transforms(h, bc):
+    """Transforms diagonalizing the 1D cell centered Laplacian along one axis.
+
+    Returns the forward and inverse transforms, as functions of an array and the
+    axis to apply them along, and the eigenvalues of the 1D Laplacian.
+    """
+    n = len(h)
+    k = np.arange(n)
+    if np.allclose(h, h[0]):
+        # the ghost point at each boundary is symmetric (Neumann) or
+        # anti-symmetric (Dirichlet), so the eigenvectors are DCTs or DSTs.
+        if bc[0] == bc[1]:
+            transform_type = 2
+            theta = (k if bc[0] == "neumann" else k + 1) / (2 * n)
+        else:
+            transform_type = 4
+            theta = (2 * k + 1) / (4 * n)
+        if bc[0] == "neumann":
+            fft, ifft = scipy.fft.dct, scipy.fft.idct
+        else:
+            fft, ifft = scipy.fft.dst, scipy.fft.idst
+        eigenvalues = -4.0 / h[0] ** 2 * np.sin(np.pi * theta) ** 2
+
+        def forward(x, axis):
+            return fft(x, type=transform_type, axis=axis, norm="ortho")
+
+        def inverse(x, axis):
+            return ifft(x, type=transform_type, axis=axis, norm="ortho")
+
+    else:
+        # L = V^-1 S with S symmetric, so use the V-orthonormal eigenvectors
+        widths = np.r_[h[0], (h[1:] + h[:-1]) / 2, h[-1]]
+        S = (ddx(n) @ sdiag(1.0 / widths) @ _ddxCellGrad(n, bc)).toarray()
+        eigenvalues, X = scipy.linalg.eigh(S, np.diag(h))
+        X_inv = X.T * h
+
+        def apply(A, x, axis):
+            return np.moveaxis(np.tensordot(A, x, axes=(1, axis)), 0, axis)
+
+        def forward(x, axis):
+            return apply(X_inv, x, axis)
+
+        def inverse(x, axis):
+            return apply(X, x, axis)
+
+    return forward, inverse, eigenvalues
+
+
 class TensorMesh(
     DiffOperators,
     InnerProducts,
@@ -18,6 +109,7 @@ class TensorMesh(
     BaseRectangularMesh,
     TensorMeshIO,
     InterfaceMixins,
+    _CoarsenHierarchyMixin,
 ):
     """
     Tensor mesh class.
@@ -571,24 +663,7 @@ class TensorMesh(
         >>> ax.scatter(*mesh.faces_x[ind_Bx1].T)
         >>> plt.show()
         """
-        if self.dim == 1:
-            indxd = self.gridFx == min(self.gridFx)
-            indxu = self.gridFx == max(self.gridFx)
-            return indxd, indxu
-        elif self.dim == 2:
-            indxd = self.gridFx[:, 0] == min(self.gridFx[:, 0])
-            indxu = self.gridFx[:, 0] == max(self.gridFx[:, 0])
-            indyd = self.gridFy[:, 1] == min(self.gridFy[:, 1])
-            indyu = self.gridFy[:, 1] == max(self.gridFy[:, 1])
-            return indxd, indxu, indyd, indyu
-        elif self.dim == 3:
-            indxd = self.gridFx[:, 0] == min(self.gridFx[:, 0])
-            indxu = self.gridFx[:, 0] == max(self.gridFx[:, 0])
-            indyd = self.gridFy[:, 1] == min(self.gridFy[:, 1])
-            indyu = self.gridFy[:, 1] == max(self.gridFy[:, 1])
-            indzd = self.gridFz[:, 2] == min(self.gridFz[:, 2])
-            indzu = self.gridFz[:, 2] == max(self.gridFz[:, 2])
-            return indxd, indxu, indyd, indyu, indzd, indzu
+        return self._boundary_indices(["faces_x", "faces_y", "faces_z"])
 
     @property
     def cell_nodes(self):
@@ -714,24 +789,387 @@ class TensorMesh(
         >>> ax.scatter(*mesh.cell_centers[ind_Bx1].T)
         >>> plt.show()
         """
-        if self.dim == 1:
-            indxd = self.gridCC == min(self.gridCC)
-            indxu = self.gridCC == max(self.gridCC)
-            return indxd, indxu
-        elif self.dim == 2:
-            indxd = self.gridCC[:, 0] == min(self.gridCC[:, 0])
-            indxu = self.gridCC[:, 0] == max(self.gridCC[:, 0])
-            indyd = self.gridCC[:, 1] == min(self.gridCC[:, 1])
-            indyu = self.gridCC[:, 1] == max(self.gridCC[:, 1])
-            return indxd, indxu, indyd, indyu
-        elif self.dim == 3:
-            indxd = self.gridCC[:, 0] == min(self.gridCC[:, 0])
-            indxu = self.gridCC[:, 0] == max(self.gridCC[:, 0])
-            indyd = self.gridCC[:, 1] == min(self.gridCC[:, 1])
-            indyu = self.gridCC[:, 1] == max(self.gridCC[:, 1])
-            indzd = self.gridCC[:, 2] == min(self.gridCC[:, 2])
-            indzu = self.gridCC[:, 2] == max(self.gridCC[:, 2])
-            return indxd, indxu, indyd, indyu, indzd, indzu
+        return self._boundary_indices(["cell_centers"] * 3)
+
+    def _boundary_indices(self, keys):
+        """Lower and upper boundary indicators along each axis of the given grids."""
+        inds = []
+        for axis in range(self.dim):
+            # only a single column of the grid is computed
+            x = self.get_tensor_grid(keys[axis])[:, axis]
+            inds += [x == x.min(), x == x.max()]
+        return tuple(inds)
+
+    # --------------- Inner Products ---------------------
+    def _full_tensor_inner_product_terms(self, projection_type):
+        """Cell couplings of the full tensor inner product on a tensor mesh.
+
+        On a tensor mesh, every cell couples the vector component ``a`` at one of
+        its faces (or edges) with the component ``b`` at another through the
+        ``(a, b)`` entry of the property tensor. These couplings only depend on the
+        regular structure of the mesh.
+
+        Parameters
+        ----------
+        projection_type : {'F', 'E'}
+            'F' for faces 'E' for edges
+
+        Returns
+        -------
+        rows, cols : numpy.ndarray of int
+            The face (or edge) indices coupled by each term.
+        weights : numpy.ndarray of float
+            The weight of each term.
+        params : numpy.ndarray of int
+            The index of the (flattened) model entry scaling each term.
+        """
+        d = self.dim
+        n_c = self.nC
+        stencil = self._tensor_stencil
+        cell_subs = np.stack(
+            np.meshgrid(*[np.arange(n) for n in self.shape_cells], indexing="ij"),
+            axis=-1,
+        ).reshape((-1, d), order="F")
+        if projection_type == "F":
+            shapes = [self.shape_faces_x, self.shape_faces_y, self.shape_faces_z]
+            offsets = np.r_[0, np.cumsum(self.vnF)]
+        else:
+            shapes = [self.shape_edges_x, self.shape_edges_y, self.shape_edges_z]
+            offsets = np.r_[0, np.cumsum(self.vnE)]
+
+        def item_shift(a, corner):
+            # which side of the cell the component ``a`` lives on at this corner
+            shift = np.zeros(d, dtype=int)
+            if projection_type == "F":
+                shift[a] = corner[a]
+            else:
+                shift[:] = corner
+                shift[a] = 0
+            return tuple(shift)
+
+        # Count the number of corners sharing each (a, b) coupling.
+        terms = {}
+        for corner in itertools.product([0, 1], repeat=d):
+            for a in range(d):
+                for b in range(d):
+                    term = (a, b, item_shift(a, corner), item_shift(b, corner))
+                    terms[term] = terms.get(term, 0) + 1
+
+        item_inds = {}
+
+        def get_item_inds(a, shift):
+            if (a, shift) not in item_inds:
+                item_inds[(a, shift)] = (
+                    sub2ind(shapes[a], cell_subs + np.array(shift)) + offsets[a]
+                )
+            return item_inds[(a, shift)]
+
+        rows, cols, weights, params = [], [], [], []
+        w = self.cell_volumes / 2**d
+        cells = np.arange(n_c)
+        for (a, b, shift_a, shift_b), count in terms.items():
+            rows.append(get_item_inds(a, shift_a))
+            cols.append(get_item_inds(b, shift_b))
+            weights.append(count * w)
+            params.append(stencil[a][b] * n_c + cells)
+        return (
+            np.concatenate(rows),
+            np.concatenate(cols),
+            np.concatenate(weights),
+            np.concatenate(params),
+        )
+
+    # --------------- Solvers ---------------------
+    def get_poisson_solver(self, BC=None):
+        r"""Get a fast direct solver for the cell centered Laplacian.
+
+        The cell centered Laplacian :math:`\mathbf{L} = \mathbf{D \, G}`
+        (``face_divergence @ cell_gradient``) of a tensor mesh, with zero Dirichlet
+        or Neumann boundary conditions, is a sum of 1D operators acting along
+        each axis. It is diagonalized by transforming along every axis with the
+        eigenvectors of the 1D operators. Along axes with uniform cell widths these
+        are discrete cosine or sine transforms, which are applied in
+        :math:`\mathcal{O}(n \log n)` with :mod:`scipy.fft`. Along axes with
+        variable widths, the (dense) eigenvectors of the 1D operator are used
+        instead. No sparse factorization is needed in either case.
+
+        Parameters
+        ----------
+        BC : str or list, optional
+            The boundary conditions, in the format accepted by
+            :py:meth:`~discretize.operators.DiffOperators.set_cell_gradient_BC`.
+            Defaults to the boundary conditions currently set on the mesh.
+
+        Returns
+        -------
+        (n_cells, n_cells) scipy.sparse.linalg.LinearOperator
+            The operator applying :math:`\mathbf{L}^{-1}`. It accepts vectors or
+            matrices of right hand sides. With Neumann conditions on every boundary
+            :math:`\mathbf{L}` is singular, and the solution with a zero volume
+            weighted mean is returned.
+
+        See Also
+        --------
+        get_poisson_preconditioner
+
+        Examples
+        --------
+        >>> from discretize import TensorMesh
+        >>> import numpy as np
+        >>> mesh = TensorMesh([32, 32, 32])
+        >>> BC = mesh.set_cell_gradient_BC('dirichlet')
+        >>> L = mesh.face_divergence @ mesh.cell_gradient
+        >>> Linv = mesh.get_poisson_solver()
+        >>> q = np.random.rand(mesh.n_cells)
+        >>> np.allclose(L @ (Linv @ q), q)
+        True
+        """
+        return self._get_separable_laplacian_inverse(BC, self.h)
+
+    def get_poisson_preconditioner(self, BC=None):
+        r"""Get a fast preconditioner for the cell centered Laplacian.
+
+        This applies the inverse of the cell centered Laplacian of a mesh with
+        the same number of cells but uniform cell widths (the mean width along each
+        axis), using only discrete cosine and sine transforms. On a uniform mesh it
+        is the exact inverse; on a variable width mesh it is a
+        :math:`\mathcal{O}(n \log n)` preconditioner for iterative solvers.
+
+        Parameters
+        ----------
+        BC : str or list, optional
+            The boundary conditions, in the format accepted by
+            :py:meth:`~discretize.operators.DiffOperators.set_cell_gradient_BC`.
+            Defaults to the boundary conditions currently set on the mesh.
+
+        Returns
+        -------
+        (n_cells, n_cells) scipy.sparse.linalg.LinearOperator
+            The operator approximating :math:`\mathbf{L}^{-1}`. Like
+            :math:`\mathbf{L}`, it is negative (semi-) definite, so negate both
+            for solvers expecting positive definite systems.
+
+        See Also
+        --------
+        get_poisson_solver
+
+        Examples
+        --------
+        >>> from discretize import TensorMesh
+        >>> from scipy.sparse.linalg import cg
+        >>> import numpy as np
+        >>> mesh = TensorMesh([[(1, 5, -1.3), (1, 20), (1, 5, 1.3)]] * 2)
+        >>> BC = mesh.set_cell_gradient_BC('dirichlet')
+        >>> L = mesh.face_divergence @ mesh.cell_gradient
+        >>> M = mesh.get_poisson_preconditioner()
+        >>> q = np.random.rand(mesh.n_cells)
+        >>> u, info = cg(-L, -q, M=-M)
+        """
+        h = [np.full(len(h), np.mean(h)) for h in self.h]
+        return self._get_separable_laplacian_inverse(BC, h)
+
+    def _get_separable_laplacian_inverse(self, BC, widths):
+        """Inverse of the Laplacian of a tensor mesh with the given cell widths."""
+        if BC is None:
+            BC = self._cell_gradient_BC_list
+        if isinstance(BC, str):
+            BC = [BC] * self.dim
+        elif isinstance(BC, list):
+            if len(BC) != self.dim:
+                raise ValueError("BC list must be the size of your mesh")
+        else:
+            raise TypeError("BC must be a str or a list.")
+        BC = [_validate_BC(bc) for bc in BC]
+
+        shape = tuple(self.shape_cells)
+        axes = [_laplacian_axis_transforms(h, bc) for h, bc in zip(widths, BC)]
+        eigenvalues = np.zeros(shape)
+        for i, (_, _, lam) in enumerate(axes):
+            lam_shape = [1] * self.dim
+            lam_shape[i] = -1
+            eigenvalues = eigenvalues + lam.reshape(lam_shape)
+        # the constant null space of the all Neumann Laplacian is projected out
+        null = np.abs(eigenvalues) <= 1e-12 * np.abs(eigenvalues).max()
+        inv_eigenvalues = np.zeros(shape)
+        inv_eigenvalues[~null] = 1.0 / eigenvalues[~null]
+        volumes = mkvc(np.prod(np.meshgrid(*widths, indexing="ij"), axis=0))
+
+        def matmat(rhs):
+            rhs = np.asarray(rhs)
+            x = rhs.reshape(shape + (-1,), order="F")
+            for i, (forward, _, _) in enumerate(axes):
+                x = forward(x, i)
+            x = x * inv_eigenvalues[..., None]
+            for i, (_, inverse, _) in enumerate(axes):
+                x = inverse(x, i)
+            return x.reshape(rhs.shape, order="F")
+
+        def rmatmat(rhs):
+            # the Laplacian is self adjoint in the volume weighted inner product
+            rhs = np.asarray(rhs)
+            w = volumes.reshape((-1,) + (1,) * (rhs.ndim - 1))
+            return w * matmat(rhs / w)
+
+        return LinearOperator(
+            (self.n_cells, self.n_cells),
+            matvec=matmat,
+            matmat=matmat,
+            rmatvec=rmatmat,
+            rmatmat=rmatmat,
+            dtype=float,
+        )
+
+    # --------------- Kronecker operators ---------------------
+
+    def get_kronecker_operator(self, name):
+        r"""Get an operator of the mesh in Kronecker factored form.
+
+        The differential and averaging operators of a tensor mesh are (blocks of)
+        Kronecker products of 1D operators acting along each axis, with the cell
+        widths folded into the 1D factors. This returns the operator as a
+        :class:`~discretize.utils.KroneckerOperator`, which stores only the 1D
+        factors (:math:`\mathcal{O}(n_x + n_y + n_z)` memory) and applies them
+        successively along each axis. The factors are accessible for solvers
+        exploiting separability, such as fast diagonalization.
+
+        Parameters
+        ----------
+        name : {"face_divergence", "cell_gradient", "nodal_gradient", "edge_curl", \
+                "average_face_to_cell", "average_edge_to_cell", \
+                "average_node_to_cell", "average_cell_to_face", \
+                "average_node_to_face", "average_node_to_edge"}
+            The operator. ``"cell_gradient"`` uses the boundary conditions
+            currently set with
+            :py:meth:`~discretize.operators.DiffOperators.set_cell_gradient_BC`.
+
+        Returns
+        -------
+        discretize.utils.KroneckerOperator
+            The factored operator, equal to the sparse matrix property of the
+            same name.
+
+        Examples
+        --------
+        >>> from discretize import TensorMesh
+        >>> import numpy as np
+        >>> mesh = TensorMesh([64, 64, 64])
+        >>> D = mesh.get_kronecker_operator("face_divergence")
+        >>> u = np.random.rand(mesh.n_faces)
+        >>> np.allclose(D @ u, mesh.face_divergence @ u)
+        True
+        """
+        dim = self.dim
+        n = self.shape_cells
+        # 1D operators along each axis between cell centers and nodes
+        eye_cell = [speye(n_i) for n_i in n]
+        eye_node = [speye(n_i + 1) for n_i in n]
+        av_node = [av(n_i) for n_i in n]
+        av_cell = [av_extrap(n_i) for n_i in n]
+        diff_node = [sdiag(1 / h) @ ddx(n_i) for h, n_i in zip(self.h, n)]
+
+        def term(node_in, node_out, axis_ops):
+            # factors mapping the grid with nodal axes node_in to node_out, with
+            # axis_ops overriding the factors of specific axes
+            factors = []
+            for i in range(dim):
+                if i in axis_ops:
+                    factors.append(axis_ops[i])
+                elif node_in[i] and node_out[i]:
+                    factors.append(eye_node[i])
+                elif node_in[i]:
+                    factors.append(av_node[i])
+                elif node_out[i]:
+                    factors.append(av_cell[i])
+                else:
+                    factors.append(eye_cell[i])
+            return [tuple(factors)]
+
+        cells = [False] * dim
+        nodes = [True] * dim
+        faces = [[i == d for i in range(dim)] for d in range(dim)]
+        edges = [[i != d for i in range(dim)] for d in range(dim)]
+
+        if name == "face_divergence":
+            blocks = [[term(faces[d], cells, {d: diff_node[d]}) for d in range(dim)]]
+        elif name == "cell_gradient":
+            BC = self.set_cell_gradient_BC(self._cell_gradient_BC_list)
+            blocks = [
+                [
+                    term(
+                        cells,
+                        faces[d],
+                        {
+                            d: sdiag(1 / (av_cell[d] @ self.h[d]))
+                            @ _ddxCellGrad(n[d], BC[d])
+                        },
+                    )
+                ]
+                for d in range(dim)
+            ]
+        elif name == "nodal_gradient":
+            blocks = [[term(nodes, edges[d], {d: diff_node[d]})] for d in range(dim)]
+        elif name == "edge_curl":
+            if dim == 2:
+                blocks = [
+                    [
+                        term(edges[0], cells, {1: -diff_node[1]}),
+                        term(edges[1], cells, {0: diff_node[0]}),
+                    ]
+                ]
+            elif dim == 3:
+                # curl_i = d_j E_k - d_k E_j for cyclic (i, j, k)
+                blocks = [[None] * 3 for _ in range(3)]
+                for i in range(3):
+                    j, k = (i + 1) % 3, (i + 2) % 3
+                    blocks[i][k] = term(edges[k], faces[i], {j: diff_node[j]})
+                    blocks[i][j] = term(edges[j], faces[i], {k: -diff_node[k]})
+            else:
+                raise NotImplementedError("Edge Curl only programed for 2 or 3D.")
+        elif name in ["average_face_to_cell", "average_edge_to_cell"]:
+            grids = faces if name == "average_face_to_cell" else edges
+            blocks = [[term(grid, cells, {}) for grid in grids]]
+            # the scaling is applied to the factor of the first axis
+            for terms in blocks[0]:
+                terms[0] = (terms[0][0] / dim,) + terms[0][1:]
+        elif name == "average_node_to_cell":
+            blocks = [[term(nodes, cells, {})]]
+        elif name == "average_cell_to_face":
+            blocks = [[term(cells, face, {})] for face in faces]
+        elif name == "average_node_to_face":
+            blocks = [[term(nodes, face, {})] for face in faces]
+        elif name == "average_node_to_edge":
+            blocks = [[term(nodes, edge, {})] for edge in edges]
+        else:
+            raise ValueError(f"Unrecognized operator {name}")
+        return KroneckerOperator(blocks)
+
+    # --------------- Multigrid ---------------------
+
+    def _coarsen(self):
+        """Merge neighboring cells in pairs along every axis."""
+        return TensorMesh([_coarsen_axis(h)[0] for h in self.h], origin=self.origin)
+
+    def _get_prolongation(self, coarse, location_type):
+        """Separable prolongation from the coarse mesh to this mesh."""
+        axes = [_coarsen_axis(h)[1:] for h in self.h]
+
+        def kron(node_type):
+            # node_type[i] selects the nodal operator along axis i
+            P = sp.identity(1, format="csr")
+            for (P_cell, P_node), is_node in zip(axes, node_type):
+                P = sp.kron(P_node if is_node else P_cell, P, format="csr")
+            return P
+
+        dims = range(self.dim)
+        if location_type == "cell_centers":
+            return kron([False] * self.dim)
+        if location_type == "nodes":
+            return kron([True] * self.dim)
+        if location_type == "faces":
+            return sp.block_diag([kron([i == d for i in dims]) for d in dims])
+        if location_type == "edges":
+            return sp.block_diag([kron([i != d for i in dims]) for d in dims])
+        raise ValueError(f"Unrecognized location_type {location_type}")
 
     def _repr_attributes(self):
         """Represent attributes of the mesh."""
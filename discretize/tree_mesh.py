@@ -87,14 +87,15 @@
 #      0    e3     1
 
 from discretize.base import BaseTensorMesh
+from discretize.base.base_tensor_mesh import _CoarsenHierarchyMixin
 from discretize.operators import InnerProducts, DiffOperators
 from discretize.mixins import InterfaceMixins, TreeMeshIO
-from discretize.utils import as_array_n_by_dim
+from discretize.utils import as_array_n_by_dim, volume_average
 from discretize._extensions.tree_ext import _TreeMesh, TreeCell  # NOQA F401
 import numpy as np
 import scipy.sparse as sp
 from discretize.utils.code_utils import deprecate_property
-from scipy.spatial import Delaunay
+from discretize.utils.mesh_utils import _cached_spatial_index
 
 
 class TreeMesh(
@@ -104,6 +105,7 @@ class TreeMesh(
     BaseTensorMesh,
     TreeMeshIO,
     InterfaceMixins,
+    _CoarsenHierarchyMixin,
 ):
     """Class for QuadTree (2D) and OcTree (3D) meshes.
 
@@ -702,7 +704,7 @@ class TreeMesh(
                 simps = np.asarray(simps)
             else:
                 xyz = np.asarray(xyz)
-                triang = Delaunay(xyz[:, :2])
+                triang = _cached_spatial_index(xyz[:, :2], "delaunay")
                 simps = triang.simplices
             n_ps = len(xyz)
 
@@ -945,7 +947,12 @@ class TreeMesh(
         return self._cell_levels_by_indexes(indices)
 
     def get_interpolation_matrix(  # NOQA D102
-        self, locs, location_type="cell_centers", zeros_outside=False, **kwargs
+        self,
+        locs,
+        location_type="cell_centers",
+        zeros_outside=False,
+        derivative=None,
+        **kwargs,
     ):
         # Documentation inherited from discretize.base.BaseMesh
         if "locType" in kwargs:
@@ -960,6 +967,9 @@ class TreeMesh(
             )
         locs = as_array_n_by_dim(locs, self.dim)
         location_type = self._parse_location_type(location_type)
+        derivative = self._parse_derivative(derivative)
+        if derivative is None:
+            derivative = -1
 
         if self.dim == 2 and "z" in location_type:
             raise NotImplementedError("Unable to interpolate from Z edges/faces in 2D")
@@ -967,13 +977,13 @@ class TreeMesh(
         locs = np.require(np.atleast_2d(locs), dtype=np.float64, requirements="C")
 
         if location_type == "nodes":
-            Av = self._getNodeIntMat(locs, zeros_outside)
+            Av = self._getNodeIntMat(locs, zeros_outside, derivative)
         elif location_type in ["edges_x", "edges_y", "edges_z"]:
-            Av = self._getEdgeIntMat(locs, zeros_outside, location_type[-1])
+            Av = self._getEdgeIntMat(locs, zeros_outside, location_type[-1], derivative)
         elif location_type in ["faces_x", "faces_y", "faces_z"]:
-            Av = self._getFaceIntMat(locs, zeros_outside, location_type[-1])
+            Av = self._getFaceIntMat(locs, zeros_outside, location_type[-1], derivative)
         elif location_type in ["cell_centers"]:
-            Av = self._getCellIntMat(locs, zeros_outside)
+            Av = self._getCellIntMat(locs, zeros_outside, derivative)
         else:
             raise ValueError(
                 "Location must be a grid location, not {}".format(location_type)
@@ -1046,6 +1056,32 @@ class TreeMesh(
         indexes, levels = self.__getstate__()
         return {"indexes": indexes.tolist(), "levels": levels.tolist()}
 
+    def _coarsen(self):
+        """Move every cell of the mesh up one level of the tree."""
+        levels = self.cell_levels_by_index(np.arange(self.n_cells))
+        coarse = TreeMesh(self.h, self.origin, diagonal_balance=self._diagonal_balance)
+        coarse.insert_cells(self.cell_centers, np.maximum(levels - 1, 0))
+        return coarse
+
+    def _get_prolongation(self, coarse, location_type):
+        """Prolongation from the coarse mesh to this mesh."""
+        if location_type == "cell_centers":
+            return volume_average(coarse, self)
+        if location_type == "nodes":
+            return coarse.get_interpolation_matrix(self.nodes, "nodes")
+        if location_type in ["faces", "edges"]:
+            # the interpolation matrices act on every face (edge) component
+            return sp.vstack(
+                [
+                    coarse.get_interpolation_matrix(
+                        getattr(self, f"{location_type}_{comp}"),
+                        f"{location_type}_{comp}",
+                    )
+                    for comp in "xyz"[: self.dim]
+                ]
+            )
+        raise ValueError(f"Unrecognized location_type {location_type}")
+
     def validate(self):  # NOQA D102
         # Documentation inherited from discretize.base.BaseMesh
         return self.finalized
@@ -8,8 +8,10 @@ from discretize._extensions.simplex_helpers import (
     _build_faces_edges,
     _build_adjacency,
     _directed_search,
+    _bucket_search,
     _interp_cc,
 )
+from discretize._extensions.interputils_cython import _bucket_grid
 from discretize.mixins import InterfaceMixins, SimplexMeshIO
 
 
@@ -690,51 +692,67 @@ class SimplexMesh(BaseMesh, SimplexMeshIO, InterfaceMixins):
             self._cc_tree = KDTree(self.cell_centers)
         return self._cc_tree
 
+    @property
+    def _simplex_grid(self):
+        """A uniform grid of buckets holding the simplices overlapping each bucket."""
+        if getattr(self, "_simplex_buckets", None) is None:
+            corners = self.nodes[self.simplices]
+            box_min = np.ascontiguousarray(corners.min(axis=1))
+            box_max = np.ascontiguousarray(corners.max(axis=1))
+            self._simplex_buckets = _bucket_grid(
+                box_min, box_max, box_min.min(axis=0), box_max.max(axis=0)
+            )
+        return self._simplex_buckets
+
+    def _find_simplices(self, locs, zeros_outside=False):
+        """Find the simplex containing each location, and its barycentric coordinates.
+
+        Locations outside of the mesh have an index of -1 if *zeros_outside*,
+        otherwise they are assigned to the simplex that a directed search from the
+        nearest cell center ends at.
+        """
+        locs = np.ascontiguousarray(np.atleast_2d(locs), dtype=np.float64)
+        transform, shift = self.transform_and_shift
+        inds, barys = _bucket_search(locs, *self._simplex_grid, transform, shift)
+        outside = inds == -1
+        if not zeros_outside and np.any(outside):
+            _, nearest_cc = self.cell_centers_tree.query(locs[outside])
+            inds[outside], barys[outside] = _directed_search(
+                locs[outside],
+                np.atleast_1d(nearest_cc),
+                self.nodes,
+                self.simplices,
+                self.neighbors,
+                transform,
+                shift,
+                return_bary=True,
+            )
+        return inds, barys
+
     def point2index(self, locs):  # NOQA D102
         # Documentation inherited from discretize.base.BaseMesh
-        tree = self.cell_centers_tree
-        # for each location, find the nearest cell center as an initial guess for
-        # the nearest simplex, then use a directed search to further refine
-        _, nearest_cc = tree.query(locs)
-        nodes = self.nodes
-        simplex_nodes = self.simplices
-        transform, shift = self.transform_and_shift
-        return _directed_search(
-            np.atleast_2d(locs),
-            np.atleast_1d(nearest_cc),
-            nodes,
-            simplex_nodes,
-            self.neighbors,
-            transform,
-            shift,
-            return_bary=False,
-        )
+        inds, _ = self._find_simplices(locs)
+        return inds
 
     def get_interpolation_matrix(  # NOQA D102
-        self, loc, location_type="cell_centers", zeros_outside=False, **kwargs
+        self,
+        loc,
+        location_type="cell_centers",
+        zeros_outside=False,
+        derivative=None,
+        **kwargs,
     ):
         # Documentation inherited from discretize.base.BaseMesh
         location_type = self._parse_location_type(location_type)
-        tree = self.cell_centers_tree
-        # for each location, find the nearest cell center as an initial guess for
-        # the nearest simplex, then use a directed search to further refine
+        derivative = self._parse_derivative(derivative)
+        if derivative is not None and location_type != "nodes":
+            raise NotImplementedError(
+                "SimplexMesh only supports derivatives of the interpolation from nodes."
+            )
         loc = np.atleast_2d(loc)
-        _, nearest_cc = tree.query(loc)
-        nodes = self.nodes
         simplex_nodes = self.simplices
         transform, shift = self.transform_and_shift
-
-        inds, barys = _directed_search(
-            loc,
-            nearest_cc,
-            nodes,
-            simplex_nodes,
-            self.neighbors,
-            transform,
-            shift,
-            zeros_outside=zeros_outside,
-            return_bary=True,
-        )
+        inds, barys = self._find_simplices(loc, zeros_outside=zeros_outside)
 
         if zeros_outside:
             barys[inds == -1] = 0.0
@@ -745,7 +763,15 @@ class SimplexMesh(BaseMesh, SimplexMeshIO, InterfaceMixins):
             nodes_per_cell = self.dim + 1
             ind_ptr = nodes_per_cell * np.arange(n_loc + 1)
             col_inds = simplex_nodes[inds].reshape(-1)
-            Aij = barys.reshape(-1)
+            if derivative is not None:
+                # the barycentric coordinates are linear within each simplex
+                ts = transform[inds, :, derivative]
+                ts = np.hstack((ts, -ts.sum(axis=1)[:, None]))
+                if zeros_outside:
+                    ts[inds == -1] = 0.0
+                Aij = ts.reshape(-1)
+            else:
+                Aij = barys.reshape(-1)
             n_items = self.n_nodes
         elif location_type == "cell_centers":
             # detemine which node each point is closest to.
@@ -13,6 +13,10 @@ Utility Classes
   :toctree: generated/
 
   TensorType
+  TensorGrid
+  WeightedProductPlan
+  KroneckerOperator
+  InterpolationPlan
   Zero
   Identity
 
@@ -44,6 +48,7 @@ Interpolation Utilities
   :toctree: generated/
 
   interpolation_matrix
+  interpolate_in_chunks
   volume_average
 
 IO utilities
@@ -89,6 +94,7 @@ Mesh Utilities
   random_model
   refine_tree_xyz
   active_from_xyz
+  clear_spatial_index_cache
   mesh_builder_xyz
 
 Utilities for Curvilinear Meshes
@@ -114,6 +120,7 @@ from discretize.utils.matrix_utils import (
     av,
     av_extrap,
     ndgrid,
+    TensorGrid,
     make_boundary_bool,
     ind2sub,
     sub2ind,
@@ -124,6 +131,8 @@ from discretize.utils.matrix_utils import (
     TensorType,
     make_property_tensor,
     inverse_property_tensor,
+    WeightedProductPlan,
+    KroneckerOperator,
     Zero,
     Identity,
 )
@@ -134,6 +143,7 @@ from discretize.utils.mesh_utils import (
     random_model,
     refine_tree_xyz,
     active_from_xyz,
+    clear_spatial_index_cache,
     mesh_builder_xyz,
     example_simplex_mesh,
 )
@@ -143,7 +153,12 @@ from discretize.utils.curvilinear_utils import (
     face_info,
     index_cube,
 )
-from discretize.utils.interpolation_utils import interpolation_matrix, volume_average
+from discretize.utils.interpolation_utils import (
+    interpolation_matrix,
+    interpolate_in_chunks,
+    InterpolationPlan,
+    volume_average,
+)
 from discretize.utils.coordinate_utils import (
     rotate_points_from_normals,
     rotation_matrix_from_normals,
@@ -1,7 +1,8 @@
 """Utilities for creating averaging operators."""
+import itertools
 import numpy as np
 import scipy.sparse as sp
-from discretize.utils.matrix_utils import mkvc, sub2ind
+from discretize.utils.matrix_utils import mkvc, KroneckerOperator
 from discretize.utils.code_utils import deprecate_function
 
 try:
@@ -12,6 +13,11 @@ try:
     _interpmat2D = pyx._interpmat2D
     _interpmat3D = pyx._interpmat3D
     _vol_interp = pyx._tensor_volume_averaging
+    _vol_avg_weights = pyx._volume_avg_weights
+    _gather_rows = pyx._gather_rows
+    _scatter_rows = pyx._scatter_rows
+    _box_overlap_pairs = pyx._box_overlap_pairs
+    _simplex_overlap_volumes = pyx._simplex_overlap_volumes
     _interpCython = True
 except ImportError as err:
     print(err)
@@ -40,7 +46,7 @@ except ImportError as err:
     _interpCython = False
 
 
-def interpolation_matrix(locs, x, y=None, z=None):
+def interpolation_matrix(locs, x, y=None, z=None, derivative=None):
     """
     Generate interpolation matrix which maps a tensor quantity to a set of locations.
 
@@ -66,6 +72,11 @@ def interpolation_matrix(locs, x, y=None, z=None):
     z : (nz) numpy.ndarray, optional
         Vector defining the locations of the tensor along the z-axis. Required if
         ``dim`` is 3.
+    derivative : int, optional
+        If given, the matrix evaluates the derivative of the interpolant along this
+        axis (0, 1 or 2) at the locations instead of its value. The derivative is
+        zero outside of the tensor, where the interpolant is clamped to the nearest
+        location.
 
     Returns
     -------
@@ -150,29 +161,501 @@ def interpolation_matrix(locs, x, y=None, z=None):
     >>> plt.show()
     """
     npts = locs.shape[0]
-    locs = locs.astype(float)
-    x = x.astype(float)
+    locs = np.asarray(locs, dtype=np.float64)
     if y is None and z is None:
-        shape = [x.size]
-        inds, vals = _interpmat1D(mkvc(locs), x)
+        axes = [x]
     elif z is None:
-        y = y.astype(float)
-        shape = [x.size, y.size]
-        inds, vals = _interpmat2D(locs, x, y)
+        axes = [x, y]
     else:
-        y = y.astype(float)
-        z = z.astype(float)
-        shape = [x.size, y.size, z.size]
-        inds, vals = _interpmat3D(locs, x, y, z)
-
-    I = np.repeat(range(npts), 2 ** len(shape))
-    J = sub2ind(shape, inds)
-    Q = sp.csr_matrix((vals, (I, J)), shape=(npts, np.prod(shape)))
+        axes = [x, y, z]
+    axes = [np.ascontiguousarray(axis, dtype=np.float64) for axis in axes]
+    if derivative is None:
+        derivative = -1
+    elif derivative not in range(len(axes)):
+        raise ValueError(
+            f"derivative must be an axis of the {len(axes)}D tensor, got {derivative}."
+        )
+    n_cols = int(np.prod([axis.size for axis in axes]))
+    n_per_row = 2 ** len(axes)
+    nnz = npts * n_per_row
+
+    # the kernels write the CSR arrays directly, with 2**dim entries per row
+    if max(n_cols, nnz) <= np.iinfo(np.int32).max:
+        idx_dtype = np.int32
+    else:
+        idx_dtype = np.int64
+    indices = np.empty(nnz, dtype=idx_dtype)
+    data = np.empty(nnz, dtype=np.float64)
+    if len(axes) == 1:
+        _interpmat1D(mkvc(locs), *axes, indices, data, derivative)
+    elif len(axes) == 2:
+        _interpmat2D(locs, *axes, indices, data, derivative)
+    else:
+        _interpmat3D(locs, *axes, indices, data, derivative)
+    indptr = np.arange(0, nnz + 1, n_per_row, dtype=idx_dtype)
+
+    Q = sp.csr_matrix((data, indices, indptr), shape=(npts, n_cols))
+    # points on or outside the ends of the grid have duplicate columns
+    Q.sum_duplicates()
     return Q
 
 
-def volume_average(mesh_in, mesh_out, values=None, output=None):
-    """Volume averaging interpolation between meshes.
+class InterpolationPlan(object):
+    r"""Reusable interpolation from a mesh to a fixed set of points.
+
+    Interpolating to a point combines the values at a few nearby locations of the
+    mesh. The plan stores the indices and weights of these locations once, as
+    ``(n_points, width)`` arrays padded with zero weights, and applies them with
+    a compiled gather kernel that runs in parallel over the points. Applying the
+    plan to an ``(n_values, k)`` block of fields does a single pass over the
+    points rather than a sparse matrix product per field.
+
+    Parameters
+    ----------
+    matrix : (n_points, n_values) scipy.sparse.spmatrix
+        The interpolation matrix, such as the output of
+        :py:meth:`~discretize.base.BaseMesh.get_interpolation_matrix`.
+
+    See Also
+    --------
+    discretize.base.BaseMesh.get_interpolation_plan
+
+    Examples
+    --------
+    >>> from discretize import TensorMesh
+    >>> import numpy as np
+    >>> mesh = TensorMesh([16, 16])
+    >>> locs = np.random.rand(100, 2)
+    >>> plan = mesh.get_interpolation_plan(locs, 'nodes')
+    >>> fields = np.random.rand(mesh.n_nodes, 5)
+    >>> plan.apply(fields).shape
+    (100, 5)
+    >>> Q = mesh.get_interpolation_matrix(locs, 'nodes')
+    >>> np.allclose(plan.apply(fields), Q @ fields)
+    True
+    """
+
+    def __init__(self, matrix):
+        Q = sp.csr_matrix(matrix, copy=True)
+        Q.sum_duplicates()
+        n, m = Q.shape
+        counts = np.diff(Q.indptr)
+        width = int(counts.max()) if n > 0 else 0
+
+        if m <= np.iinfo(np.int32).max:
+            idx_dtype = np.int32
+        else:
+            idx_dtype = np.int64
+        self._indices = np.zeros((n, width), dtype=idx_dtype)
+        self._weights = np.zeros((n, width), dtype=np.result_type(Q.dtype, float))
+        # the position of every entry within its row
+        rows = np.repeat(np.arange(n), counts)
+        cols = np.arange(Q.nnz) - np.repeat(Q.indptr[:-1], counts)
+        self._indices[rows, cols] = Q.indices
+        self._weights[rows, cols] = Q.data
+        self._shape = (n, m)
+
+    @property
+    def shape(self):
+        """The shape of the equivalent interpolation matrix.
+
+        Returns
+        -------
+        tuple of int
+            ``(n_points, n_values)``
+        """
+        return self._shape
+
+    @property
+    def indices(self):
+        """The indices of the values combined at every point.
+
+        Returns
+        -------
+        (n_points, width) numpy.ndarray of int
+        """
+        return self._indices
+
+    @property
+    def weights(self):
+        """The weights of the values combined at every point.
+
+        Padded entries have zero weight.
+
+        Returns
+        -------
+        (n_points, width) numpy.ndarray
+        """
+        return self._weights
+
+    def _check_values(self, values, n):
+        values = np.asarray(values)
+        if values.shape[0] != n:
+            raise ValueError(f"values must have {n} rows, got {values.shape[0]}.")
+        return values
+
+    def _run_kernel(self, kernel, values, n_out):
+        """Run a compiled kernel, or return None if it does not support the types."""
+        if not _interpCython or self._weights.dtype != np.float64:
+            return None
+        dtype = np.result_type(values, np.float64)
+        values = np.ascontiguousarray(values, dtype=dtype)
+        out = np.empty((n_out,) + values.shape[1:], dtype=dtype)
+        k = int(np.prod(values.shape[1:]))
+        kernel(
+            self._indices,
+            self._weights,
+            values.reshape(values.shape[0], k),
+            out.reshape(n_out, k),
+        )
+        return out
+
+    def apply(self, values):
+        """Interpolate values from the mesh to the points.
+
+        Parameters
+        ----------
+        values : (n_values) or (n_values, k) numpy.ndarray
+            A single field, or a block of ``k`` fields, on the mesh.
+
+        Returns
+        -------
+        (n_points) or (n_points, k) numpy.ndarray
+        """
+        values = self._check_values(values, self._shape[1])
+        out = self._run_kernel(_gather_rows, values, self._shape[0])
+        if out is None:
+            out = np.einsum("ij,ij...->i...", self._weights, values[self._indices])
+        return out
+
+    def apply_adjoint(self, values):
+        """Apply the adjoint (transpose) of the interpolation.
+
+        This maps values at the points back onto the mesh, such as to form the
+        gradient of a misfit with respect to the field on the mesh.
+
+        Parameters
+        ----------
+        values : (n_points) or (n_points, k) numpy.ndarray
+            A single set, or a block of ``k`` sets, of values at the points.
+
+        Returns
+        -------
+        (n_values) or (n_values, k) numpy.ndarray
+        """
+        values = self._check_values(values, self._shape[0])
+        out = self._run_kernel(_scatter_rows, values, self._shape[1])
+        if out is None:
+            out = self.tocsr().T @ values
+        return out
+
+    def tocsr(self):
+        """Assemble the equivalent interpolation matrix.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+        """
+        n, width = self._indices.shape
+        Q = sp.csr_matrix(
+            (
+                self._weights.flatten(),
+                self._indices.flatten(),
+                np.arange(n + 1) * width,
+            ),
+            shape=self._shape,
+        )
+        Q.sum_duplicates()
+        Q.eliminate_zeros()
+        return Q
+
+
+def _tensor_volume_average_factors(mesh_in, mesh_out):
+    """Return the 1D volume averaging matrices along each axis of two TensorMeshes."""
+    factors = []
+    for nodes_in, nodes_out, h_out in zip(
+        mesh_in.get_tensor("nodes"), mesh_out.get_tensor("nodes"), mesh_out.h
+    ):
+        # lengths of the overlaps of the input and output cells
+        lengths, i_in, i_out = _vol_avg_weights(nodes_in, nodes_out)
+        factors.append(
+            sp.csr_matrix(
+                (lengths / h_out[i_out], (i_out, i_in)),
+                shape=(len(nodes_out) - 1, len(nodes_in) - 1),
+            )
+        )
+    return tuple(factors)
+
+
+# largest azimuthal width of the chord polyhedra approximating cylindrical cells
+_max_cyl_angle = np.pi / 16
+
+
+def _kuhn_simplices(corners):
+    """Split cells, given by their ``2**dim`` logical corners, into simplices.
+
+    Corner ``c`` of a cell is its logical corner with bit ``d`` of ``c`` set along
+    axis ``d``. Every cell is split along its main diagonal into ``dim!``
+    simplices, which conform across neighboring cells.
+    """
+    dim = corners.shape[-1]
+    paths = []
+    for perm in itertools.permutations(range(dim)):
+        path = [0]
+        for axis in perm:
+            path.append(path[-1] + (1 << axis))
+        paths.append(path)
+    return corners[:, paths].reshape(-1, dim + 1, dim)
+
+
+def _cell_simplices(mesh):
+    """Decompose the cells of a mesh into simplices.
+
+    Returns
+    -------
+    simplices : (n_simplices, dim + 1, dim) numpy.ndarray
+        The simplices, ordered by the cell they belong to.
+    ptr : (n_cells + 1) numpy.ndarray of int
+        The simplices of cell ``i`` are ``simplices[ptr[i]:ptr[i + 1]]``.
+    scale : (n_simplices) numpy.ndarray
+        Factor scaling the volume of each simplex to its share of the cell volume.
+    """
+    mesh_type = mesh._meshType
+    dim = mesh.dim
+    bits = (np.arange(2**dim)[:, None] >> np.arange(dim)) & 1
+    if mesh_type == "simplex":
+        simplices = mesh.nodes[mesh.simplices]
+        n_per_cell = np.ones(mesh.n_cells, dtype=np.int64)
+        scale = np.ones(len(simplices))
+    elif mesh_type in ["TENSOR", "TREE"]:
+        lower = mesh.cell_centers - mesh.h_gridded / 2
+        corners = lower[:, None, :] + bits * mesh.h_gridded[:, None, :]
+        simplices = _kuhn_simplices(corners)
+        n_per_cell = np.full(mesh.n_cells, len(simplices) // mesh.n_cells)
+        scale = np.ones(len(simplices))
+    elif mesh_type == "Curv":
+        shape = mesh.shape_cells
+        corners = np.empty((mesh.n_cells, 2**dim, dim))
+        for c, bit in enumerate(bits):
+            slices = tuple(slice(b, b + n) for b, n in zip(bit, shape))
+            for axis, nodes in enumerate(mesh.node_list):
+                corners[:, c, axis] = nodes[slices].reshape(-1, order="F")
+        simplices = _kuhn_simplices(corners)
+        n_per_cell = np.full(mesh.n_cells, len(simplices) // mesh.n_cells)
+        scale = np.ones(len(simplices))
+    elif mesh_type == "CYL":
+        if dim != 3:
+            raise NotImplementedError(
+                "Volume averaging is only implemented for 3D CylindricalMesh"
+            )
+        bounds = [o + np.r_[0, np.cumsum(h)] for o, h in zip(mesh.origin, mesh.h)]
+        lower = np.stack(
+            np.meshgrid(*[b[:-1] for b in bounds], indexing="ij"), axis=-1
+        ).reshape(-1, 3, order="F")
+        widths = np.stack(np.meshgrid(*mesh.h, indexing="ij"), axis=-1).reshape(
+            -1, 3, order="F"
+        )
+        # approximate each cell by chord polyhedra spanning small azimuthal pieces,
+        # whose volumes are rescaled to the volumes of the pieces they replace
+        n_pieces = np.ceil(widths[:, 1] / _max_cyl_angle).astype(np.int64)
+        cell = np.repeat(np.arange(mesh.n_cells), n_pieces)
+        piece = np.arange(len(cell)) - np.repeat(
+            np.cumsum(n_pieces) - n_pieces, n_pieces
+        )
+        d_theta = widths[cell, 1] / n_pieces[cell]
+        lower = lower[cell]
+        lower[:, 1] += piece * d_theta
+        widths = widths[cell]
+        widths[:, 1] = d_theta
+        logical = lower[:, None, :] + bits * widths[:, None, :]
+        r, theta, z = logical[..., 0], logical[..., 1], logical[..., 2]
+        corners = np.stack(
+            [
+                r * np.cos(theta) + mesh.cartesian_origin[0],
+                r * np.sin(theta) + mesh.cartesian_origin[1],
+                z + mesh.cartesian_origin[2],
+            ],
+            axis=-1,
+        )
+        simplices = _kuhn_simplices(corners)
+        n_per_cell = 6 * n_pieces
+        scale = np.repeat(d_theta / np.sin(d_theta), 6)
+    else:
+        raise TypeError(f"Unsupported mesh type {type(mesh).__name__}")
+    ptr = np.r_[0, np.cumsum(n_per_cell)].astype(np.int64)
+    return np.ascontiguousarray(simplices, dtype=np.float64), ptr, scale
+
+
+def _overlap_volume_average(mesh_in, mesh_out):
+    """Volume averaging matrix from the overlaps of the cells of any two meshes."""
+    cells_in = _cell_simplices(mesh_in)
+    cells_out = _cell_simplices(mesh_out)
+    boxes = []
+    for simplices, ptr, _ in [cells_out, cells_in]:
+        boxes.append(np.minimum.reduceat(simplices.min(axis=1), ptr[:-1]))
+        boxes.append(np.maximum.reduceat(simplices.max(axis=1), ptr[:-1]))
+    i_out, i_in = _box_overlap_pairs(*boxes)
+    volumes = np.empty(len(i_out))
+    _simplex_overlap_volumes(i_out, i_in, *cells_out, *cells_in, volumes)
+
+    W = sp.csr_matrix(
+        (volumes, (i_out, i_in)), shape=(mesh_out.n_cells, mesh_in.n_cells)
+    )
+    W.eliminate_zeros()
+    # normalize by the overlapped volume of each output cell, so the parts of the
+    # cells outside of mesh_in are ignored rather than extended as constants
+    totals = np.asarray(W.sum(axis=1)).reshape(-1)
+    totals[totals > 0] = 1.0 / totals[totals > 0]
+    return sp.diags(totals) @ W
+
+
+def _apply_in_chunks(row_blocks, values, output):
+    """Apply blocks of rows of a sparse operator to values, filling output.
+
+    Only the entries of *values* used by each block of rows are read, so *values*
+    and *output* can be memory-mapped arrays larger than the available memory.
+    """
+    for start, stop, P in row_blocks:
+        P = P.tocsr()
+        columns, indices = np.unique(P.indices, return_inverse=True)
+        P = sp.csr_matrix(
+            (P.data, indices.reshape(-1), P.indptr), shape=(P.shape[0], len(columns))
+        )
+        output[start:stop] = P @ np.asarray(values[columns])
+    if isinstance(output, np.memmap):
+        output.flush()
+    return output
+
+
+def _chunked_output(values, n, output):
+    """Allocate (or check) the output array of a chunked operation on values."""
+    dtype = values.dtype if hasattr(values, "dtype") else np.asarray(values).dtype
+    dtype = np.result_type(dtype, float)
+    if output is None:
+        return np.empty((n,) + np.shape(values)[1:], dtype=dtype)
+    if len(output) != n:
+        raise ValueError(f"output must have length {n}, got {len(output)}")
+    if not np.can_cast(dtype, output.dtype, casting="same_kind"):
+        raise ValueError(
+            f"output of dtype {output.dtype} can not hold values of dtype {dtype}"
+        )
+    return output
+
+
+def _volume_average_row_blocks(mesh_in, mesh_out, chunk_size):
+    """Yield blocks of about chunk_size rows of the volume averaging operator."""
+    if mesh_in._meshType == "TENSOR" and mesh_out._meshType == "TENSOR":
+        # build the operator one slab of output cells (along the last axis) at a time
+        *inner, last = _tensor_volume_average_factors(mesh_in, mesh_out)
+        P_inner = sp.csr_matrix(np.ones((1, 1)))
+        for factor in inner:
+            P_inner = sp.kron(factor, P_inner, format="csr")
+        n_slab = P_inner.shape[0]
+        n_layers = max(1, chunk_size // n_slab)
+        for k in range(0, last.shape[0], n_layers):
+            P = sp.kron(last[k : k + n_layers], P_inner, format="csr")
+            yield k * n_slab, k * n_slab + P.shape[0], P
+    else:
+        P = volume_average(mesh_in, mesh_out).tocsr()
+        for start in range(0, P.shape[0], chunk_size):
+            yield start, min(start + chunk_size, P.shape[0]), P[
+                start : start + chunk_size
+            ]
+
+
+def interpolate_in_chunks(
+    mesh,
+    loc,
+    values,
+    location_type="cell_centers",
+    zeros_outside=False,
+    derivative=None,
+    output=None,
+    chunk_size=65536,
+):
+    """Interpolate values from a mesh to many points, in blocks of points.
+
+    This performs the same operation as
+    ``mesh.get_interpolation_matrix(loc, ...) @ values`` without forming the full
+    interpolation matrix. The points are processed in blocks of *chunk_size*, and
+    each block only reads the entries of *values* it interpolates from and writes
+    its part of *output*. *values* and *output* can therefore be memory-mapped
+    arrays (e.g. from ``numpy.load(..., mmap_mode="r")`` and
+    ``numpy.lib.format.open_memmap``) larger than the available memory.
+
+    Parameters
+    ----------
+    mesh : discretize.base.BaseMesh
+        The mesh to interpolate from.
+    loc : (n_pts, dim) array_like
+        Location of points to interpolate to. Any array supporting slicing of
+        rows, such as a memory-mapped array or a :class:`~discretize.utils.TensorGrid`.
+    values : (n_loc) or (n_loc, k) array_like
+        Values defined at the *location_type* of the mesh, or a block of ``k``
+        such arrays.
+    location_type : str, optional
+        Tensor locations on the mesh being interpolated from. See
+        :py:meth:`~discretize.base.BaseMesh.get_interpolation_matrix` for the options.
+    zeros_outside : bool, optional
+        If *True*, values at locations outside the mesh will be zero.
+    derivative : {None, 0, 1, 2, 'x', 'y', 'z'}, optional
+        If given, interpolate the derivative of the interpolant along this axis.
+    output : (n_pts) or (n_pts, k) numpy.ndarray, optional
+        Output array to be overwritten. Its dtype must be able to hold the
+        interpolated values (e.g. complex for complex *values*). By default, an
+        array of the floating point (or complex) type of *values* is allocated.
+    chunk_size : int, optional
+        The maximum number of points interpolated at a time.
+
+    Returns
+    -------
+    (n_pts) or (n_pts, k) numpy.ndarray
+        The interpolated values, *output* if it was given.
+
+    Examples
+    --------
+    Interpolate a model stored on disk to the cell centers of another mesh, one
+    block of points at a time.
+
+    >>> from discretize import TensorMesh
+    >>> from discretize.utils import interpolate_in_chunks
+    >>> import numpy as np
+    >>> mesh = TensorMesh([32, 32, 32])
+    >>> model = np.random.rand(mesh.n_cells)
+    >>> grid = TensorMesh([20, 20, 20]).get_tensor_grid("cell_centers")
+    >>> data = interpolate_in_chunks(mesh, grid, model, chunk_size=1000)
+    >>> np.allclose(data, mesh.get_interpolation_matrix(grid[:]) @ model)
+    True
+    """
+    chunk_size = int(chunk_size)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+    n_pts = len(loc)
+    output = _chunked_output(values, n_pts, output)
+
+    def row_blocks():
+        for start in range(0, n_pts, chunk_size):
+            stop = min(start + chunk_size, n_pts)
+            P = mesh.get_interpolation_matrix(
+                np.asarray(loc[start:stop]),
+                location_type=location_type,
+                zeros_outside=zeros_outside,
+                derivative=derivative,
+            )
+            if P.shape[1] != len(values):
+                raise ValueError(
+                    f"values must have length {P.shape[1]} to interpolate from the "
+                    f"{location_type} of the mesh, got {len(values)}"
+                )
+            yield start, stop, P
+
+    return _apply_in_chunks(row_blocks(), values, output)
+
+
+def volume_average(
+    mesh_in, mesh_out, values=None, output=None, kronecker=False, chunk_size=None
+):
+    r"""Volume averaging interpolation between meshes.
 
     This volume averaging function looks for overlapping cells in each mesh,
     and weights the output values by the partial volume ratio of the overlapping
@@ -191,20 +674,54 @@ def volume_average(mesh_in, mesh_out, values=None, output=None):
     If *output* is given as well, it will be filled with the values of the
     operation and then returned (assuming it has the correct ``dtype``).
 
+    Between two :class:`~discretize.TensorMesh`, the operation is the Kronecker
+    product of 1D volume averages along each axis. It is applied to *values* as
+    successive 1D averages, and with ``kronecker=True`` the operator is returned
+    as a :class:`~discretize.utils.KroneckerOperator` storing only the 1D
+    averaging matrices, using :math:`\mathcal{O}(n_x + n_y + n_z)` memory
+    instead of the :math:`\mathcal{O}(n_{cells})` non-zeros of the sparse matrix.
+
+    Any other combination of meshes (including a
+    :class:`~discretize.CylindricalMesh`, :class:`~discretize.CurvilinearMesh`
+    or :class:`~discretize.SimplexMesh`) is averaged using the exact overlap
+    volumes of their cells, split into triangles (2D) or tetrahedra (3D).
+    Cylindrical cells are represented by polyhedra spanning small azimuthal
+    arcs, rescaled to the cells' true volumes. Curvilinear cells with non-planar
+    faces are approximated by their split into tetrahedra.
+    Unlike the tensor and tree averages, this path does not extend the input
+    values as constants beyond the input mesh: output cells partly outside of it
+    are the average over only their overlap with the input cells, and output
+    cells that do not overlap it at all are set to zero.
+
+    With *chunk_size*, *values* is averaged in blocks of about *chunk_size* output
+    cells, reading only the input values overlapping each block, so that
+    *values* and *output* can be memory-mapped arrays larger than the available
+    memory. Between two :class:`~discretize.TensorMesh`, each block of the
+    operator is built on the fly from slabs of output cells along the last axis.
+
     Parameters
     ----------
-    mesh_in : ~discretize.TensorMesh or ~discretize.TreeMesh
+    mesh_in : discretize.base.BaseMesh
         Input mesh (the mesh you are interpolating from)
-    mesh_out : ~discretize.TensorMesh or ~discretize.TreeMesh
+    mesh_out : discretize.base.BaseMesh
         Output mesh (the mesh you are interpolating to)
-    values : (mesh_in.n_cells) numpy.ndarray, optional
-        Array with values defined at the cells of ``mesh_in``
-    output : (mesh_out.n_cells) numpy.ndarray of float, optional
+    values : (mesh_in.n_cells) or (mesh_in.n_cells, k) numpy.ndarray, optional
+        Array with values defined at the cells of ``mesh_in``, or a block of ``k``
+        such arrays.
+    output : (mesh_out.n_cells) or (mesh_out.n_cells, k) numpy.ndarray of float, optional
         Output array to be overwritten
+    kronecker : bool, optional
+        If *True* and both meshes are a :class:`~discretize.TensorMesh`, return the
+        operator as a :class:`~discretize.utils.KroneckerOperator` when *values* is
+        not given.
+    chunk_size : int, optional
+        If given, *values* is averaged in blocks of about this many output cells.
+        Requires *values*. Complex *values* are then supported, and *output*
+        must be able to hold values of their type.
 
     Returns
     -------
-    (mesh_out.n_cells, mesh_in.n_cells) scipy.sparse.csr_matrix or (mesh_out.n_cells) numpy.ndarray
+    (mesh_out.n_cells, mesh_in.n_cells) scipy.sparse.csr_matrix or discretize.utils.KroneckerOperator or numpy.ndarray
         If *values* = *None* , the returned value is a matrix representing this
         operation, otherwise it is a :class:`numpy.ndarray` of the result of the
         operation.
@@ -240,6 +757,26 @@ def volume_average(mesh_in, mesh_out, values=None, output=None):
     >>> mesh_out.plot_image(model2, ax=ax2)
     >>> plt.show()
 
+    Between tensor meshes, the operator can be kept in its factored form and
+    applied to many models at once.
+
+    >>> P = volume_average(mesh_in, mesh_out, kronecker=True)
+    >>> models = np.random.rand(mesh_in.n_cells, 3)
+    >>> np.allclose(P @ models, volume_average(mesh_in, mesh_out) @ models)
+    True
+
+    Models too large to fit in memory can be averaged between files, in blocks.
+
+    >>> import os, tempfile
+    >>> tmp = tempfile.mkdtemp()
+    >>> np.save(os.path.join(tmp, "model1.npy"), model1)
+    >>> model_in = np.load(os.path.join(tmp, "model1.npy"), mmap_mode="r")
+    >>> model_out = np.lib.format.open_memmap(
+    ...     os.path.join(tmp, "model2.npy"), mode="w+", shape=(mesh_out.n_cells,)
+    ... )
+    >>> out = volume_average(mesh_in, mesh_out, model_in, model_out, chunk_size=64)
+    >>> np.allclose(model_out, model2)
+    True
     """
     try:
         in_type = mesh_in._meshType
@@ -247,10 +784,11 @@ def volume_average(mesh_in, mesh_out, values=None, output=None):
     except AttributeError:
         raise TypeError("Both input and output mesh must be valid discetize meshes")
 
-    valid_meshs = ["TENSOR", "TREE"]
+    valid_meshs = ["TENSOR", "TREE", "CYL", "Curv", "simplex"]
     if in_type not in valid_meshs or out_type not in valid_meshs:
         raise NotImplementedError(
-            f"Volume averaging is only implemented for TensorMesh and TreeMesh, "
+            f"Volume averaging is only implemented for TensorMesh, TreeMesh, "
+            f"CylindricalMesh, CurvilinearMesh and SimplexMesh, "
             f"not {type(mesh_in).__name__} and/or {type(mesh_out).__name__}"
         )
 
@@ -266,16 +804,52 @@ def volume_average(mesh_in, mesh_out, values=None, output=None):
             "Output array does not have the same length as the number of cells in output mesh"
         )
 
+    if chunk_size is not None:
+        chunk_size = int(chunk_size)
+        if values is None:
+            raise ValueError("chunk_size requires values to average")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+        output = _chunked_output(values, mesh_out.n_cells, output)
+        return _apply_in_chunks(
+            _volume_average_row_blocks(mesh_in, mesh_out, chunk_size), values, output
+        )
+
     if values is not None:
         values = np.asarray(values, dtype=np.float64)
     if output is not None:
         output = np.asarray(output, dtype=np.float64)
 
+    if in_type not in ["TENSOR", "TREE"] or out_type not in ["TENSOR", "TREE"]:
+        P = _overlap_volume_average(mesh_in, mesh_out)
+        if values is None:
+            return P
+        if output is None:
+            return P @ values
+        output[...] = P @ values
+        return output
+
+    if in_type == "TENSOR" and out_type == "TENSOR":
+        if values is None and not kronecker:
+            return _vol_interp(mesh_in, mesh_out)
+        P = KroneckerOperator([[[_tensor_volume_average_factors(mesh_in, mesh_out)]]])
+        if values is None:
+            return P
+        if output is None:
+            return P @ values
+        output[...] = P @ values
+        return output
+
+    if values is not None and values.ndim > 1:
+        # the tree kernels average a single model at a time
+        if output is None:
+            output = np.empty((mesh_out.n_cells,) + values.shape[1:])
+        for j in range(values.shape[1]):
+            output[:, j] = volume_average(mesh_in, mesh_out, values[:, j])
+        return output
+
     if in_type == "TENSOR":
-        if out_type == "TENSOR":
-            return _vol_interp(mesh_in, mesh_out, values, output)
-        elif out_type == "TREE":
-            return mesh_out._vol_avg_from_tens(mesh_in, values, output)
+        return mesh_out._vol_avg_from_tens(mesh_in, values, output)
     elif in_type == "TREE":
         if out_type == "TENSOR":
             return mesh_in._vol_avg_to_tens(mesh_out, values, output)
@@ -1,9 +1,16 @@
 """Useful functions for working with vectors and matrices."""
+import functools
 import numpy as np
 import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator
 from discretize.utils.code_utils import is_scalar, deprecate_function
 import warnings
 
+try:
+    from discretize._extensions import matutils_cython as _pyx
+except ImportError:
+    _pyx = None
+
 
 def mkvc(x, n_dims=1, **kwargs):
     """Coerce a vector to the specified dimensionality.
@@ -25,7 +32,9 @@ def mkvc(x, n_dims=1, **kwargs):
     Returns
     -------
     numpy.ndarray
-        The output vector, with at least ``n_dims`` axes.
+        The output vector, with at least ``n_dims`` axes. This is a view of *x*
+        whenever possible (e.g. for vectors and Fortran contiguous arrays), so copy
+        it before modifying it in place if *x* must be preserved.
 
     Examples
     --------
@@ -73,11 +82,11 @@ def mkvc(x, n_dims=1, **kwargs):
         raise TypeError("Vector must be a numpy array")
 
     if n_dims == 1:
-        return x.flatten(order="F")
+        return x.ravel(order="F")
     elif n_dims == 2:
-        return x.flatten(order="F")[:, np.newaxis]
+        return x.ravel(order="F")[:, np.newaxis]
     elif n_dims == 3:
-        return x.flatten(order="F")[:, np.newaxis, np.newaxis]
+        return x.ravel(order="F")[:, np.newaxis, np.newaxis]
 
 
 def sdiag(v):
@@ -369,13 +378,197 @@ def ndgrid(*args, vector=True, order="F"):
     try:
         if len(xin) == 1:
             return np.array(xin[0])
-        meshed = np.meshgrid(*xin, indexing="ij")
+        if vector:
+            return _fill_grid([np.asarray(x).ravel() for x in xin], order=order)
+        return np.meshgrid(*xin, indexing="ij")
     except Exception:
         raise TypeError("All arguments must be array like")
 
-    if vector:
-        return np.column_stack([x.reshape(-1, order=order) for x in meshed])
-    return meshed
+
+def _fill_grid(axes, order="F", out=None):
+    """Write the gridded locations of 1D axes into an (n, dim) array.
+
+    Each column is filled through a reshaped view of ``out``, which avoids the
+    intermediate full size arrays of :func:`numpy.meshgrid`.
+    """
+    shape = tuple(len(x) for x in axes)
+    if out is None:
+        dtype = np.result_type(*axes)
+        out = np.empty((int(np.prod(shape)), len(axes)), dtype=dtype)
+    for i, x in enumerate(axes):
+        x_shape = [1] * len(axes)
+        x_shape[i] = -1
+        out[:, i].reshape(shape, order=order)[...] = np.reshape(x, x_shape)
+    return out
+
+
+class TensorGrid(object):
+    """Lazy gridded locations of a tensor product of 1D axes.
+
+    A ``TensorGrid`` behaves like the (n, dim) array returned by
+    :func:`ndgrid` (in Fortran order, so the first axis changes fastest), but only
+    stores the 1D axes. Rows, columns or any subset of the locations are computed
+    on demand when indexed, and :py:meth:`chunks` iterates over the locations in
+    blocks of bounded size. Converting it with :func:`numpy.asarray` materializes
+    the full array.
+
+    Parameters
+    ----------
+    *axes : (n_i) numpy.ndarray
+        The locations along each axis. A single list of the axes is also accepted.
+
+    Examples
+    --------
+    >>> from discretize.utils import TensorGrid, ndgrid
+    >>> import numpy as np
+    >>> x, y = np.r_[1., 2., 3.], np.r_[2., 4.]
+    >>> grid = TensorGrid(x, y)
+    >>> grid.shape
+    (6, 2)
+    >>> grid[[0, 4]]
+    array([[1., 2.],
+           [2., 4.]])
+    >>> np.array_equal(grid, ndgrid(x, y))
+    True
+    """
+
+    def __init__(self, *axes):
+        if len(axes) == 1 and isinstance(axes[0], (list, tuple)):
+            axes = axes[0]
+        axes = tuple(np.asarray(x) for x in axes)
+        if len(axes) == 0 or any(x.ndim != 1 for x in axes):
+            raise ValueError("TensorGrid requires at least one 1D axis.")
+        self._axes = axes
+        self._axes_shape = tuple(len(x) for x in axes)
+        self._n = int(np.prod(self._axes_shape))
+
+    @property
+    def axes(self):
+        """The 1D axes of the tensor product.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+        """
+        return self._axes
+
+    @property
+    def shape(self):
+        """The shape of the equivalent array, (n, dim).
+
+        Returns
+        -------
+        tuple of int
+        """
+        return (self._n, len(self._axes))
+
+    @property
+    def ndim(self):
+        """The number of dimensions of the equivalent array, 2.
+
+        Returns
+        -------
+        int
+        """
+        return 2
+
+    @property
+    def size(self):
+        """The number of elements of the equivalent array.
+
+        Returns
+        -------
+        int
+        """
+        return self._n * len(self._axes)
+
+    @property
+    def dtype(self):
+        """The data type of the locations.
+
+        Returns
+        -------
+        numpy.dtype
+        """
+        return np.result_type(*self._axes)
+
+    def __len__(self):
+        """Return the number of locations."""
+        return self._n
+
+    def __repr__(self):
+        """Represent the tensor grid by its shape."""
+        return f"TensorGrid(shape={self.shape}, dtype={self.dtype})"
+
+    def __array__(self, dtype=None, copy=None):
+        """Materialize the full (n, dim) array of locations."""
+        out = _fill_grid(self._axes)
+        if dtype is not None:
+            out = out.astype(dtype, copy=False)
+        return out
+
+    def _row_indices(self, rows):
+        """Convert a row index into an array of indices, or an int."""
+        n = self._n
+        if isinstance(rows, slice):
+            return np.arange(*rows.indices(n))
+        if rows is Ellipsis:
+            return np.arange(n)
+        if np.ndim(rows) == 0:
+            rows = int(rows)
+            if rows < -n or rows >= n:
+                raise IndexError(f"index {rows} is out of bounds for size {n}")
+            return rows % n
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            if rows.shape != (n,):
+                raise IndexError(f"boolean index must have shape ({n},)")
+            return np.flatnonzero(rows)
+        if rows.size and (rows.min() < -n or rows.max() >= n):
+            raise IndexError(f"index is out of bounds for size {n}")
+        return rows % n
+
+    def __getitem__(self, key):
+        """Compute the indexed locations."""
+        if isinstance(key, tuple):
+            if len(key) > 2:
+                raise IndexError("too many indices for TensorGrid")
+            rows, cols = key if len(key) == 2 else (key[0], slice(None))
+        else:
+            rows, cols = key, slice(None)
+        columns = np.arange(len(self._axes))[cols]
+        rows = self._row_indices(rows)
+        subs = np.unravel_index(rows, self._axes_shape, order="F")
+        if np.ndim(columns) == 0:
+            return self._axes[columns][subs[columns]]
+        out = np.empty(np.shape(rows) + (len(columns),), dtype=self.dtype)
+        for i, c in enumerate(columns):
+            out[..., i] = self._axes[c][subs[c]]
+        return out
+
+    def __iter__(self):
+        """Iterate over the locations."""
+        for chunk in self.chunks():
+            yield from chunk
+
+    def chunks(self, chunk_size=65536):
+        """Iterate over the locations in blocks of rows.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            The maximum number of locations in each block.
+
+        Yields
+        ------
+        (n_chunk, dim) numpy.ndarray
+            Consecutive blocks of the locations.
+        """
+        chunk_size = int(chunk_size)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+        for start in range(0, self._n, chunk_size):
+            yield self[start : start + chunk_size]
 
 
 def make_boundary_bool(shape, bdir="xyz", **kwargs):
@@ -601,6 +794,26 @@ def get_subarray(A, ind):
         raise Exception("get_subarray does not support dimension asked.")
 
 
+def _invert_stacked_blocks(blocks, return_matrix):
+    """Invert the (n, d, d) blocks with the compiled kernel, if possible.
+
+    Returns the (n, d, d) inverses, or the (d * n, d * n) sparse block matrix of the
+    inverses built directly in CSR format if *return_matrix*. Returns None if the
+    kernel does not support the blocks.
+    """
+    if _pyx is None or blocks.dtype not in (np.float64, np.complex128):
+        return None
+    n, d = blocks.shape[:2]
+    if not return_matrix:
+        # invert in place
+        _pyx._invert_blocks(blocks, blocks.reshape(-1), True)
+        return blocks
+    data = np.empty(n * d * d, dtype=blocks.dtype)
+    _pyx._invert_blocks(blocks, data, False)
+    indices, indptr, _ = _property_tensor_structure(n, d, 3)
+    return sp.csr_matrix((data, indices, indptr), shape=(d * n, d * n))
+
+
 def inverse_3x3_block_diagonal(
     a11, a12, a13, a21, a22, a23, a31, a32, a33, return_matrix=True, **kwargs
 ):
@@ -617,7 +830,7 @@ def inverse_3x3_block_diagonal(
 
     Returns
     -------
-    (3 * n_blocks, 3 * n_blocks) scipy.sparse.coo_matrix or list of (n_blocks)
+    (3 * n_blocks, 3 * n_blocks) scipy.sparse.csr_matrix or list of (n_blocks)
         numpy.ndarray. If *return_matrix = False*, the function will return vectors
         *b11, b12, b13, b21, b22, b23, b31, b32, b33*. If *return_matrix = True*, the
         function will return the block matrix *M*.
@@ -728,6 +941,19 @@ def inverse_3x3_block_diagonal(
     a32 = mkvc(a32)
     a33 = mkvc(a33)
 
+    blocks = np.empty(
+        (len(a11), 3, 3),
+        dtype=np.result_type(a11, a12, a13, a21, a22, a23, a31, a32, a33),
+    )
+    for i, row in enumerate([[a11, a12, a13], [a21, a22, a23], [a31, a32, a33]]):
+        for j, a in enumerate(row):
+            blocks[:, i, j] = a
+    B = _invert_stacked_blocks(blocks, return_matrix)
+    if B is not None:
+        if return_matrix:
+            return B
+        return tuple(B[:, i, j] for i in range(3) for j in range(3))
+
     detA = (
         a31 * a12 * a23
         - a31 * a13 * a22
@@ -776,7 +1002,7 @@ def inverse_2x2_block_diagonal(a11, a12, a21, a22, return_matrix=True, **kwargs)
 
     Returns
     -------
-    (2 * n_blocks, 2 * n_blocks) scipy.sparse.coo_matrix or list of (n_blocks) numpy.ndarray
+    (2 * n_blocks, 2 * n_blocks) scipy.sparse.csr_matrix or list of (n_blocks) numpy.ndarray
         If *return_matrix = False*, the function will return vectors
         *b11, b12, b21, b22*.
         If *return_matrix = True*, the function will return the
@@ -876,6 +1102,16 @@ def inverse_2x2_block_diagonal(a11, a12, a21, a22, return_matrix=True, **kwargs)
     a21 = mkvc(a21)
     a22 = mkvc(a22)
 
+    blocks = np.empty((len(a11), 2, 2), dtype=np.result_type(a11, a12, a21, a22))
+    for i, row in enumerate([[a11, a12], [a21, a22]]):
+        for j, a in enumerate(row):
+            blocks[:, i, j] = a
+    B = _invert_stacked_blocks(blocks, return_matrix)
+    if B is not None:
+        if return_matrix:
+            return B
+        return tuple(B[:, i, j] for i in range(2) for j in range(2))
+
     # compute inverse of the determinant.
     detAinv = 1.0 / (a11 * a22 - a21 * a12)
 
@@ -932,6 +1168,14 @@ def invert_blocks(A):
     if A.shape[-1] != A.shape[-2]:
         raise ValueError(f"Last two dimensions are not equal, got {A.shape}")
 
+    if not np.issubdtype(A.dtype, np.inexact):
+        A = A.astype(np.float64)
+
+    if A.shape[-1] in (2, 3):
+        B = np.array(A, order="C").reshape((-1,) + A.shape[-2:])
+        if _invert_stacked_blocks(B, False) is not None:
+            return B.reshape(A.shape)
+
     if A.shape[-1] == 2:
         a11 = A[..., 0, 0]
         a12 = A[..., 0, 1]
@@ -1123,7 +1367,7 @@ def make_property_tensor(mesh, tensor):
 
     Returns
     -------
-    (dim * n_cells, dim * n_cells) scipy.sparse.coo_matrix
+    (dim * n_cells, dim * n_cells) scipy.sparse.csr_matrix
         The property tensor.
 
     Notes
@@ -1145,6 +1389,12 @@ def make_property_tensor(mesh, tensor):
         \sigma_{xz} & \sigma_{yz} & \sigma_{zz}
         \end{bmatrix}
 
+    The property tensor is assembled directly in CSR format. Its sparsity pattern
+    only depends on the number of cells, the dimension and the type of *tensor*,
+    so it is cached between calls; assembling the tensor for a new model only
+    fills a new data array and copies the cached pattern, which the returned
+    matrix owns.
+
     Examples
     --------
     For the 4 classifications allowable (scalar, isotropic, anistropic and tensor),
@@ -1212,31 +1462,69 @@ def make_property_tensor(mesh, tensor):
         tensor = tensor * np.ones(mesh.nC)
 
     propType = TensorType(mesh, tensor)
+    if propType._tt not in (1, 2, 3):
+        raise Exception("Unexpected shape of tensor")
+    n_cells, dim = mesh.nC, mesh.dim
+    indices, indptr, gather = _property_tensor_structure(n_cells, dim, propType._tt)
+    tensor = mkvc(tensor)
     if propType == 1:  # Isotropic!
-        Sigma = sp.kron(sp.identity(mesh.dim), sdiag(mkvc(tensor)))
+        data = np.tile(tensor, dim)
     elif propType == 2:  # Diagonal tensor
-        Sigma = sdiag(mkvc(tensor))
-    elif mesh.dim == 2 and tensor.size == mesh.nC * 3:  # Fully anisotropic, 2D
-        tensor = tensor.reshape((mesh.nC, 3), order="F")
-        row1 = sp.hstack((sdiag(tensor[:, 0]), sdiag(tensor[:, 2])))
-        row2 = sp.hstack((sdiag(tensor[:, 2]), sdiag(tensor[:, 1])))
-        Sigma = sp.vstack((row1, row2))
-    elif mesh.dim == 3 and tensor.size == mesh.nC * 6:  # Fully anisotropic, 3D
-        tensor = tensor.reshape((mesh.nC, 6), order="F")
-        row1 = sp.hstack(
-            (sdiag(tensor[:, 0]), sdiag(tensor[:, 3]), sdiag(tensor[:, 4]))
-        )
-        row2 = sp.hstack(
-            (sdiag(tensor[:, 3]), sdiag(tensor[:, 1]), sdiag(tensor[:, 5]))
-        )
-        row3 = sp.hstack(
-            (sdiag(tensor[:, 4]), sdiag(tensor[:, 5]), sdiag(tensor[:, 2]))
-        )
-        Sigma = sp.vstack((row1, row2, row3))
-    else:
-        raise Exception("Unexpected shape of tensor")
+        data = tensor.copy()
+    else:  # Fully anisotropic
+        data = tensor[gather]
+    return sp.csr_matrix((data, indices, indptr), shape=(dim * n_cells, dim * n_cells))
+
+
+def _property_tensor_structure(n_cells, dim, tensor_type):
+    """Return the CSR structure of a property tensor.
+
+    The cached sparsity pattern is copied, so that every matrix owns (and may
+    modify) its structure.
+
+    Returns
+    -------
+    indices, indptr : numpy.ndarray
+        The CSR structure.
+    gather : numpy.ndarray or None
+        For full tensors, the (read only) index into the flattened (F-ordered)
+        model of every stored entry, ``None`` otherwise.
+    """
+    indices, indptr, gather = _cached_property_tensor_pattern(n_cells, dim, tensor_type)
+    return indices.copy(), indptr.copy(), gather
+
 
-    return Sigma
+@functools.lru_cache(maxsize=4)
+def _cached_property_tensor_pattern(n_cells, dim, tensor_type):
+    """Build the (read only) CSR pattern of a property tensor.
+
+    The sparsity pattern of the (dim * n_cells, dim * n_cells) property tensor
+    only depends on the number of cells, the dimension and the tensor type, so
+    it is built once for the few most recently used combinations.
+    """
+    n = dim * n_cells
+    # match the index type scipy would pick so the arrays are not copied
+    idx_dtype = np.int32 if dim * n < np.iinfo(np.int32).max else np.int64
+    if tensor_type < 3:
+        indices = np.arange(n, dtype=idx_dtype)
+        indptr = np.arange(n + 1, dtype=idx_dtype)
+        gather = None
+    else:
+        if dim == 2:
+            stencil = np.array([[0, 2], [2, 1]])
+        else:
+            stencil = np.array([[0, 3, 4], [3, 1, 5], [4, 5, 2]])
+        cells = np.arange(n_cells)
+        # row a * n_cells + c holds the entries (a, b) of cell c at column
+        # b * n_cells + c, for b = 0..dim-1
+        indices = np.tile((cells[:, None] + n_cells * np.arange(dim)).reshape(-1), dim)
+        indices = indices.astype(idx_dtype)
+        indptr = dim * np.arange(n + 1, dtype=idx_dtype)
+        gather = (stencil[:, None, :] * n_cells + cells[None, :, None]).reshape(-1)
+        gather.flags.writeable = False
+    indices.flags.writeable = False
+    indptr.flags.writeable = False
+    return indices, indptr, gather
 
 
 def inverse_property_tensor(mesh, tensor, return_matrix=False, **kwargs):
@@ -1280,12 +1568,12 @@ def inverse_property_tensor(mesh, tensor, return_matrix=False, **kwargs):
 
     Returns
     -------
-    numpy.ndarray or scipy.sparse.coo_matrix
+    numpy.ndarray or scipy.sparse.csr_matrix
         - If *return_matrix* = *False*, the function outputs the parameters defining the
           inverse of the property tensor in a numpy.ndarray with the same dimensions as
           the input argument *tensor*
         - If *return_natrix* = *True*, the function outputs the inverse of the property
-          tensor as a *scipy.sparse.coo_matrix*.
+          tensor as a *scipy.sparse.csr_matrix*.
 
     Notes
     -----
@@ -1429,6 +1717,404 @@ def inverse_property_tensor(mesh, tensor, return_matrix=False, **kwargs):
     return T
 
 
+def _row_outer_triplets(A, B):
+    """Triplets of the outer products of matching rows of two CSR matrices.
+
+    For every row ``c`` of *A* and *B*, returns the (``i``, ``j``, ``c``, value)
+    entries of ``outer(A[c, :], B[c, :])``.
+    """
+    A = A.tocsr()
+    B = B.tocsr()
+    n_a = np.diff(A.indptr)
+    n_b = np.diff(B.indptr)
+    row_a = np.repeat(np.arange(A.shape[0]), n_a)
+    counts = n_b[row_a]
+    a_inds = np.repeat(np.arange(A.nnz), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    b_inds = np.repeat(B.indptr[:-1][row_a], counts) + offsets
+    return (
+        A.indices[a_inds],
+        B.indices[b_inds],
+        row_a[a_inds],
+        A.data[a_inds] * B.data[b_inds],
+    )
+
+
+class WeightedProductPlan(object):
+    r"""Reusable product of two sparse operators through a diagonal weighting.
+
+    Many system matrices are products :math:`\mathbf{A} = \mathbf{L} \,
+    diag(\mathbf{w}) \, \mathbf{R}` of fixed sparse operators with a diagonal
+    weighting, such as :math:`\mathbf{D} \, \mathbf{M}^{-1} \mathbf{D}^T` or
+    :math:`\mathbf{C}^T \mathbf{M} \, \mathbf{C}`. The values of
+    :math:`\mathbf{A}` are linear in the weights, :math:`\mathbf{G \, w}`,
+    where :math:`\mathbf{G}` only depends on the two operators. The plan computes
+    the symbolic product (the CSR structure of :math:`\mathbf{A}`) and
+    :math:`\mathbf{G}` once; updating it for new weights then only refills the
+    ``data`` array of a pre-allocated matrix.
+
+    Parameters
+    ----------
+    left : (n, n_weights) scipy.sparse.spmatrix
+        The operator on the left of the weighting.
+    right : (n_weights, m) scipy.sparse.spmatrix, optional
+        The operator on the right of the weighting. Defaults to the transpose of
+        *left*.
+
+    Notes
+    -----
+    The matrix returned by :py:meth:`update` is the same object on every call, and
+    its values are overwritten by subsequent updates. Copy it if you need to keep
+    the values for previous weights.
+
+    Examples
+    --------
+    >>> from discretize import TensorMesh
+    >>> from discretize.utils import WeightedProductPlan
+    >>> import numpy as np
+    >>> mesh = TensorMesh([8, 8, 8])
+    >>> plan = WeightedProductPlan(mesh.face_divergence)
+    >>> for _ in range(3):
+    ...     A = plan.update(np.random.rand(mesh.n_faces) + 1)
+    """
+
+    def __init__(self, left, right=None):
+        left = sp.csr_matrix(left)
+        if right is None:
+            right = left.T
+        right = sp.csr_matrix(right)
+        if left.shape[1] != right.shape[0]:
+            raise ValueError(
+                f"Incompatible operator shapes {left.shape} and {right.shape}."
+            )
+        self._left = left
+        self._right = right
+        n, m = left.shape[0], right.shape[1]
+        n_weights = left.shape[1]
+
+        # row k of left.T and right give every (i, j) pair weighted by w[k]
+        rows, cols, k, vals = _row_outer_triplets(left.T.tocsr(), right)
+        rows = rows.astype(np.int64)
+        cols = cols.astype(np.int64)
+
+        # sorted, unique (row, col) pairs give the canonical CSR structure
+        keys, entry = np.unique(rows * m + cols, return_inverse=True)
+        indices = keys % m
+        indptr = np.r_[0, np.cumsum(np.bincount(keys // m, minlength=n))]
+        self._G = sp.csr_matrix(
+            (vals, (entry.reshape(-1), k)), shape=(len(keys), n_weights)
+        )
+        self._n_weights = n_weights
+        self._matrix = sp.csr_matrix(
+            (np.zeros(len(keys)), indices, indptr), shape=(n, m)
+        )
+
+    @property
+    def shape(self):
+        """The shape of the product matrix.
+
+        Returns
+        -------
+        tuple of int
+        """
+        return self._matrix.shape
+
+    @property
+    def n_weights(self):
+        """The number of diagonal weights.
+
+        Returns
+        -------
+        int
+        """
+        return self._n_weights
+
+    @property
+    def matrix(self):
+        """The pre-allocated product matrix.
+
+        This holds the values from the most recent call to :py:meth:`update`.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+        """
+        return self._matrix
+
+    def values(self, weights):
+        """Evaluate the non-zero values of the product matrix.
+
+        Parameters
+        ----------
+        weights : (n_weights) or (n_weights, n_sets) numpy.ndarray
+            One set of weights, or many sets stacked as columns.
+
+        Returns
+        -------
+        (nnz) or (nnz, n_sets) numpy.ndarray
+            The values of the matrix, in the order of the ``data`` array of
+            :py:attr:`matrix`.
+        """
+        weights = np.asarray(weights)
+        if weights.shape[0] != self._n_weights:
+            raise ValueError(
+                f"weights must have {self._n_weights} entries along its first axis, "
+                f"got {weights.shape[0]}."
+            )
+        return self._G @ weights
+
+    def update(self, weights):
+        """Refill the product matrix for new weights.
+
+        Parameters
+        ----------
+        weights : float or (n_weights) numpy.ndarray
+            The new diagonal weights. Complex weights are supported.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+            The updated product matrix. This is always the same object.
+        """
+        if is_scalar(weights):
+            weights = np.full(self._n_weights, weights)
+        values = self.values(mkvc(weights))
+        if np.iscomplexobj(values) and not np.iscomplexobj(self._matrix.data):
+            self._matrix.data = self._matrix.data.astype(values.dtype)
+        self._matrix.data[:] = values
+        return self._matrix
+
+    def deriv(self, v):
+        r"""Derivative of the product matrix times a vector with respect to the weights.
+
+        Parameters
+        ----------
+        v : (m) numpy.ndarray
+            The vector multiplying the product matrix.
+
+        Returns
+        -------
+        (n, n_weights) scipy.sparse.csr_matrix
+            :math:`\partial (\mathbf{A}(\mathbf{w}) \mathbf{v}) / \partial
+            \mathbf{w} = \mathbf{L} \, diag(\mathbf{R \, v})`.
+        """
+        return (self._left @ sdiag(self._right @ v)).tocsr()
+
+
+def _is_identity(A):
+    """Check whether a sparse matrix is a square identity matrix."""
+    n, m = A.shape
+    return n == m and (A != speye(n)).nnz == 0
+
+
+def _apply_along_axis(A, x, axis):
+    """Multiply the axis of a gridded array by a matrix."""
+    x = np.moveaxis(x, axis, 0)
+    shape = x.shape
+    y = A @ x.reshape(shape[0], -1)
+    return np.moveaxis(y.reshape((A.shape[0],) + shape[1:]), 0, axis)
+
+
+class KroneckerOperator(LinearOperator):
+    r"""Block operator assembled from Kronecker products of 1D operators.
+
+    Every block of the operator is a sum of Kronecker products of 1D operators,
+    one per axis, acting on a grid ordered with x varying fastest:
+
+    .. math::
+        \mathbf{A}_{ij} = \sum_t \mathbf{F}^{(t)}_z \otimes \mathbf{F}^{(t)}_y
+        \otimes \mathbf{F}^{(t)}_x
+
+    Differential and averaging operators of tensor meshes have this form. Only the
+    1D factors are stored, which needs :math:`\mathcal{O}(n_x + n_y + n_z)`
+    memory instead of the :math:`\mathcal{O}(n_x n_y n_z)` non-zeros of the
+    assembled matrix, and products are computed as successive 1D
+    multiplications along each axis of the gridded vector. The factors are
+    available in :py:attr:`blocks` for methods exploiting the separability, such
+    as fast diagonalization.
+
+    Parameters
+    ----------
+    blocks : list of list of (list of tuple of scipy.sparse.spmatrix or None)
+        ``blocks[i][j]`` is the list of terms of the block ``(i, j)``, or ``None``
+        for a zero block. Every term is a tuple of the 1D operators along each
+        axis, ordered ``(x, y, z)``.
+
+    Examples
+    --------
+    >>> from discretize.utils import KroneckerOperator, ddx, speye
+    >>> import numpy as np
+
+    The nodal differences of a grid with 4 x 3 cells (5 x 4 nodes)
+
+    >>> Gx = (ddx(4), speye(4))
+    >>> Gy = (speye(5), ddx(3))
+    >>> A = KroneckerOperator([[[Gx]], [[Gy]]])
+    >>> A.shape
+    (31, 20)
+    >>> x = np.random.rand(20)
+    >>> np.allclose(A @ x, A.tocsr() @ x)
+    True
+    """
+
+    def __init__(self, blocks):
+        blocks = [list(row) for row in blocks]
+        n_rows, n_cols = len(blocks), len(blocks[0])
+        if any(len(row) != n_cols for row in blocks):
+            raise ValueError("Every block row must have the same number of blocks.")
+        row_shapes = [None] * n_rows
+        col_shapes = [None] * n_cols
+        dtypes = []
+        for i, row in enumerate(blocks):
+            for j, terms in enumerate(row):
+                if terms is None:
+                    continue
+                terms = [tuple(sp.csr_matrix(f) for f in term) for term in terms]
+                for term in terms:
+                    out_shape = tuple(f.shape[0] for f in term)
+                    in_shape = tuple(f.shape[1] for f in term)
+                    if row_shapes[i] is None:
+                        row_shapes[i] = out_shape
+                    if col_shapes[j] is None:
+                        col_shapes[j] = in_shape
+                    if row_shapes[i] != out_shape or col_shapes[j] != in_shape:
+                        raise ValueError(
+                            f"Inconsistent factor shapes in block ({i}, {j})."
+                        )
+                    dtypes.extend(f.dtype for f in term)
+                row[j] = terms
+        if None in row_shapes or None in col_shapes:
+            raise ValueError("Every block row and column needs a non-zero block.")
+        self._blocks = blocks
+        self._row_shapes = row_shapes
+        self._col_shapes = col_shapes
+        self._row_offsets = np.r_[0, np.cumsum([np.prod(s) for s in row_shapes])]
+        self._col_offsets = np.r_[0, np.cumsum([np.prod(s) for s in col_shapes])]
+        # identity factors are skipped when multiplying
+        self._skip = [
+            [
+                None if terms is None else [[_is_identity(f) for f in t] for t in terms]
+                for terms in row
+            ]
+            for row in blocks
+        ]
+        super().__init__(
+            np.result_type(*dtypes),
+            (int(self._row_offsets[-1]), int(self._col_offsets[-1])),
+        )
+
+    @property
+    def blocks(self):
+        """The 1D factors of every block.
+
+        Returns
+        -------
+        list of list of (list of tuple of scipy.sparse.csr_matrix or None)
+        """
+        return self._blocks
+
+    @property
+    def row_shapes(self):
+        """The grid shape of every block row.
+
+        Returns
+        -------
+        list of tuple of int
+        """
+        return self._row_shapes
+
+    @property
+    def col_shapes(self):
+        """The grid shape of every block column.
+
+        Returns
+        -------
+        list of tuple of int
+        """
+        return self._col_shapes
+
+    def _matmat(self, X):
+        X = np.asarray(X)
+        n_vec = X.shape[1]
+        dtype = np.result_type(self.dtype, X.dtype)
+        grids = [
+            X[self._col_offsets[j] : self._col_offsets[j + 1]].reshape(
+                shape + (n_vec,), order="F"
+            )
+            for j, shape in enumerate(self._col_shapes)
+        ]
+        out = np.empty((self.shape[0], n_vec), dtype=dtype)
+        for i, row in enumerate(self._blocks):
+            y = np.zeros(self._row_shapes[i] + (n_vec,), dtype=dtype)
+            for j, terms in enumerate(row):
+                if terms is None:
+                    continue
+                for term, skip in zip(terms, self._skip[i][j]):
+                    x = grids[j]
+                    for axis, (f, is_eye) in enumerate(zip(term, skip)):
+                        if not is_eye:
+                            x = _apply_along_axis(f, x, axis)
+                    y += x
+            out[self._row_offsets[i] : self._row_offsets[i + 1]] = y.reshape(
+                -1, n_vec, order="F"
+            )
+        return out
+
+    def _matvec(self, x):
+        return self._matmat(np.asarray(x).reshape(-1, 1))
+
+    def _transpose(self):
+        return KroneckerOperator(
+            [
+                [
+                    None if terms is None else [tuple(f.T for f in t) for t in terms]
+                    for terms in col
+                ]
+                for col in zip(*self._blocks)
+            ]
+        )
+
+    def _adjoint(self):
+        return KroneckerOperator(
+            [
+                [
+                    None
+                    if terms is None
+                    else [tuple(f.T.conj() for f in t) for t in terms]
+                    for terms in col
+                ]
+                for col in zip(*self._blocks)
+            ]
+        )
+
+    def tocsr(self):
+        """Assemble the operator as a sparse matrix.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+        """
+        blocks = []
+        for i, row in enumerate(self._blocks):
+            blocks.append([])
+            for j, terms in enumerate(row):
+                if terms is None:
+                    blocks[i].append(
+                        spzeros(
+                            np.prod(self._row_shapes[i]), np.prod(self._col_shapes[j])
+                        )
+                    )
+                    continue
+                block = 0
+                for term in terms:
+                    A = sp.identity(1, format="csr")
+                    for f in term:
+                        A = sp.kron(f, A, format="csr")
+                    block = block + A
+                blocks[i].append(block)
+        return sp.bmat(blocks, format="csr")
+
+
 class Zero(object):
     """Carries out arithmetic operations between 0 and arbitrary quantities.
 
@@ -1,4 +1,6 @@
 """Useful tools for working with meshes."""
+import hashlib
+from collections import OrderedDict
 import numpy as np
 import scipy.ndimage as ndi
 import scipy.sparse as sp
@@ -12,6 +14,68 @@ import warnings
 
 num_types = [int, float]
 
+# spatial indexes of the most recently used point sets (e.g. topography)
+_spatial_indexes = OrderedDict()
+_max_spatial_indexes = 4
+
+
+def _cached_spatial_index(points, index_type="kdtree"):
+    """Return a spatial index of points, reusing the index of identical points.
+
+    The indexes of the few most recently used point sets are kept, keyed by the
+    content of the points, so that repeated calls with the same points (e.g. the
+    same topography) do not rebuild them, while modified points get a new index.
+
+    Parameters
+    ----------
+    points : (n, dim) array_like
+        The points to index.
+    index_type : {"kdtree", "delaunay"}
+        Build a ``scipy.spatial.cKDTree`` or a ``scipy.spatial.Delaunay``
+        triangulation of the points.
+
+    Returns
+    -------
+    scipy.spatial.cKDTree or scipy.spatial.Delaunay
+    """
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    key = (index_type, points.shape, hashlib.sha1(points).hexdigest())
+    index = _spatial_indexes.pop(key, None)
+    if index is None:
+        if index_type == "kdtree":
+            index = cKDTree(points)
+        elif index_type == "delaunay":
+            index = Delaunay(points)
+        else:
+            raise ValueError(f"Unrecognized index_type {index_type}")
+    _spatial_indexes[key] = index
+    while len(_spatial_indexes) > _max_spatial_indexes:
+        _spatial_indexes.popitem(last=False)
+    return index
+
+
+def clear_spatial_index_cache():
+    """Clear the cached spatial indexes of topography points.
+
+    :func:`active_from_xyz`, :func:`refine_tree_xyz` and
+    :meth:`discretize.TreeMesh.refine_surface` keep the KD-trees and Delaunay
+    triangulations of the few most recently used sets of surface points, so that
+    repeated calls with the same points do not rebuild them. This function
+    releases them, e.g. to free the memory held by large triangulations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from discretize import TensorMesh
+    >>> from discretize.utils import active_from_xyz, clear_spatial_index_cache
+    >>> mesh = TensorMesh([5, 5, 5])
+    >>> xx, yy = np.meshgrid(np.linspace(0, 1, 10), np.linspace(0, 1, 10))
+    >>> topo = np.c_[xx.ravel(), yy.ravel(), 0.5 + 0.1 * xx.ravel()]
+    >>> active = active_from_xyz(mesh, topo)
+    >>> clear_spatial_index_cache()
+    """
+    _spatial_indexes.clear()
+
 
 def random_model(shape, seed=None, anisotropy=None, its=100, bounds=None):
     """Create random tensor model.
@@ -339,12 +403,7 @@ def extract_core_mesh(xyzlim, mesh, mesh_type="tensor"):
 
         meshCore = discretize.TensorMesh([hx, hy], origin=origin)
 
-        actind = (
-            (mesh.cell_centers[:, 0] > xmin)
-            & (mesh.cell_centers[:, 0] < xmax)
-            & (mesh.cell_centers[:, 1] > ymin)
-            & (mesh.cell_centers[:, 1] < ymax)
-        )
+        actind = np.logical_and.outer(xind, yind).reshape(-1, order="F")
 
     elif mesh.dim == 3:
         xmin, xmax = xyzlim[0, 0], xyzlim[0, 1]
@@ -367,14 +426,8 @@ def extract_core_mesh(xyzlim, mesh, mesh_type="tensor"):
 
         meshCore = discretize.TensorMesh([hx, hy, hz], origin=origin)
 
-        actind = (
-            (mesh.cell_centers[:, 0] > xmin)
-            & (mesh.cell_centers[:, 0] < xmax)
-            & (mesh.cell_centers[:, 1] > ymin)
-            & (mesh.cell_centers[:, 1] < ymax)
-            & (mesh.cell_centers[:, 2] > zmin)
-            & (mesh.cell_centers[:, 2] < zmax)
-        )
+        actind = np.logical_and.outer(np.logical_and.outer(xind, yind), zind)
+        actind = actind.reshape(-1, order="F")
 
     else:
         raise Exception("Not implemented!")
@@ -778,6 +831,7 @@ def refine_tree_xyz(
         zOffset = 0
         xyPad = -1
         depth = zmax[-1]
+        tree = _cached_spatial_index(xyz)
         # Cycle through the Tree levels backward
         for ii in range(len(octree_levels) - 1, -1, -1):
             dx = mesh.h[0].min() * 2**ii
@@ -833,7 +887,6 @@ def refine_tree_xyz(
             newLoc = np.c_[xy[indexTri != -1], z]
 
             # Only keep points within max_distance
-            tree = cKDTree(xyz)
             r, ind = tree.query(newLoc)
 
             # Apply vertical padding for current octree level
@@ -928,7 +981,9 @@ def active_from_xyz(mesh, xyz, grid_reference="CC", method="linear"):
     boolean array indicating which mesh cells like below the surface points.
     This method uses SciPy's interpolation routine to interpolate between
     location points defining the surface. Nearest neighbour interpolation
-    is used for cells outside the convex hull of the surface points.
+    is used for cells outside the convex hull of the surface points. For a
+    TreeMesh, the surface is only sampled once for each column of cells whose
+    tops lie within the range of heights of the surface points.
 
     Parameters
     ----------
@@ -1002,10 +1057,14 @@ def active_from_xyz(mesh, xyz, grid_reference="CC", method="linear"):
         if xyz.shape[1] != 3:
             raise ValueError("xyz locations of shape (*, 3) required for 3D mesh")
         if method == "linear":
-            tri2D = Delaunay(xyz[:, :2])
+            tri2D = _cached_spatial_index(xyz[:, :2], "delaunay")
             z_interpolate = interpolate.LinearNDInterpolator(tri2D, xyz[:, 2])
         else:
-            z_interpolate = interpolate.NearestNDInterpolator(xyz[:, :2], xyz[:, 2])
+            tree2D = _cached_spatial_index(xyz[:, :2])
+
+            def z_interpolate(xy):
+                return xyz[tree2D.query(xy)[1], 2]
+
     elif mesh.dim == 2:
         if xyz.shape[1] != 2:
             raise ValueError("xyz locations of shape (*, 2) required for 2D mesh")
@@ -1016,6 +1075,9 @@ def active_from_xyz(mesh, xyz, grid_reference="CC", method="linear"):
         if xyz.ndim != 1:
             raise ValueError("xyz locations of shape (*, ) required for 1D mesh")
 
+    if getattr(mesh, "_meshType", None) == "TREE" and method in ["linear", "nearest"]:
+        return _active_from_xyz_tree(mesh, xyz, grid_reference, z_interpolate)
+
     if grid_reference == "CC":
         # this should work for all 4 mesh types...
         locations = mesh.cell_centers
@@ -1083,7 +1145,7 @@ def active_from_xyz(mesh, xyz, grid_reference="CC", method="linear"):
     # Apply nearest neighbour if in extrapolation
     ind_nan = np.isnan(z_xyz)
     if any(ind_nan):
-        tree = cKDTree(xyz)
+        tree = _cached_spatial_index(xyz)
         _, ind = tree.query(locations[ind_nan, :])
         z_xyz[ind_nan] = xyz[ind, dim]
 
@@ -1095,6 +1157,85 @@ def active_from_xyz(mesh, xyz, grid_reference="CC", method="linear"):
     return active.ravel()
 
 
+def _active_from_xyz_tree(mesh, xyz, grid_reference, z_interpolate):
+    """Return the cells of a TreeMesh below a surface, sampling it once per column.
+
+    Linear and nearest interpolation of the surface never leave the range of the
+    heights of its points, so only the cells whose tops lie within that range
+    are compared to the surface. The cells of a tree mesh are stacked in columns
+    sharing the same horizontal location, so the surface is then interpolated
+    once at each unique horizontal location of their centers (or top corners).
+    """
+    dim = mesh.dim - 1
+    cell_centers = mesh.cell_centers
+    z_top = cell_centers[:, dim]
+    if grid_reference == "N":
+        h_gridded = mesh.h_gridded
+        z_top = z_top + h_gridded[:, dim] / 2.0
+
+    active = z_top < xyz[:, dim].min()
+    in_range = np.flatnonzero(~active & (z_top < xyz[:, dim].max()))
+    if len(in_range) == 0:
+        return active
+    n_cells = len(in_range)
+    z_top = z_top[in_range]
+    centers = cell_centers[in_range, :dim]
+
+    # horizontal offsets of the cell centers (or top corners)
+    if grid_reference == "CC":
+        signs = np.zeros((1, dim))
+    else:
+        if dim == 2:
+            signs = np.array([[-1, 1], [-1, -1], [1, 1], [1, -1]])
+        else:
+            signs = np.array([[-1], [1]])
+        half_h = h_gridded[in_range, :dim] / 2.0
+
+    # index the unique horizontal location (column) of every location
+    column = np.zeros((len(signs), n_cells), dtype=np.int64)
+    axis_values = []
+    for i in range(dim):
+        axis_signs, sign_index = np.unique(signs[:, i], return_inverse=True)
+        if grid_reference == "CC":
+            coords = [centers[:, i]]
+        else:
+            coords = [centers[:, i] + sign * half_h[:, i] for sign in axis_signs]
+        values, index = np.unique(np.concatenate(coords), return_inverse=True)
+        index = index.reshape(len(axis_signs), n_cells)
+        column = column * len(values) + index[sign_index.reshape(-1)]
+        axis_values.append(values)
+    n_columns = np.prod([len(values) for values in axis_values])
+    if n_columns <= 4 * column.size:
+        used = np.zeros(n_columns, dtype=bool)
+        used[column] = True
+        columns = np.flatnonzero(used)
+        column = (np.cumsum(used) - 1)[column]
+    else:
+        columns, column = np.unique(column, return_inverse=True)
+        column = column.reshape(len(signs), n_cells)
+    xy = np.empty((len(columns), dim))
+    for i in range(dim - 1, -1, -1):
+        columns, index = np.divmod(columns, len(axis_values[i]))
+        xy[:, i] = axis_values[i][index]
+
+    z_columns = np.asarray(z_interpolate(xy)).reshape(-1)
+    z_xyz = z_columns[column]
+
+    # Apply nearest neighbour if in extrapolation
+    ind_nan = np.isnan(z_xyz)
+    if np.any(ind_nan):
+        sign, cell = np.nonzero(ind_nan)
+        locations = np.empty((len(cell), dim + 1))
+        locations[:, :dim] = xy[column[sign, cell]]
+        locations[:, dim] = z_top[cell]
+        tree = _cached_spatial_index(xyz)
+        _, ind = tree.query(locations)
+        z_xyz[sign, cell] = xyz[ind, dim]
+
+    active[in_range] = z_top < z_xyz.min(axis=0)
+    return active
+
+
 def example_simplex_mesh(rect_shape):
     """Create a simple tetrahedral mesh on a unit cube in 2D or 3D.
 
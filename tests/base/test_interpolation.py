@@ -1,3 +1,5 @@
+import os
+import tempfile
 import numpy as np
 import unittest
 
@@ -392,5 +394,243 @@ class TestInterpolation3D(discretize.tests.OrderTest):
         self.orderTest()
 
 
+class TestInterpolationMatrix(unittest.TestCase):
+    def test_csr_structure(self):
+        rng = np.random.default_rng(24)
+        axes = [np.cumsum(rng.random(n)) for n in [6, 5, 4]]
+        for dim in [1, 2, 3]:
+            x = axes[:dim]
+            locs = np.column_stack([rng.uniform(a[0], a[-1], 50) for a in x])
+            Q = discretize.utils.interpolation_matrix(locs, *x)
+            self.assertEqual(Q.indices.dtype, np.int32)
+            self.assertTrue(Q.has_canonical_format)
+            np.testing.assert_equal(np.diff(Q.indptr), 2**dim)
+            np.testing.assert_allclose(Q @ np.ones(Q.shape[1]), 1)
+            # linear functions are interpolated exactly
+            grid = discretize.utils.ndgrid(*x).reshape(-1, dim)
+            np.testing.assert_allclose(Q @ grid.sum(axis=1), locs.sum(axis=1))
+
+            # points outside of the grid are clamped to the nearest node
+            locs = np.column_stack([a[[0, -1]] + [-1.0, 1.0] for a in x])
+            Q = discretize.utils.interpolation_matrix(locs, *x)
+            self.assertTrue(Q.has_canonical_format)
+            np.testing.assert_equal(Q.indices, [0, Q.shape[1] - 1])
+            np.testing.assert_allclose(Q.data, 1)
+
+    def test_read_only_locs(self):
+        mesh = discretize.TensorMesh([5, 6, 4])
+        locs = np.broadcast_to([0.3, 0.6, 0.2], (10, 3))
+        self.assertFalse(locs.flags.writeable)
+        Q = mesh.get_interpolation_matrix(locs, "cell_centers")
+        np.testing.assert_allclose(
+            Q.toarray(), mesh.get_interpolation_matrix(locs.copy()).toarray()
+        )
+        for dim in [1, 2]:
+            mesh = discretize.TensorMesh([5, 6][:dim])
+            locs = np.full((10, dim), 0.4)
+            locs.flags.writeable = False
+            Q = mesh.get_interpolation_matrix(locs, "nodes")
+            np.testing.assert_allclose(Q @ np.ones(mesh.n_nodes), 1)
+
+
+def _fd_derivative_error(mesh, locs, location_type, axis, values, h=1e-6):
+    D = mesh.get_interpolation_matrix(locs, location_type, derivative=axis)
+    loc_p = locs.copy()
+    loc_p[:, axis] += h
+    loc_m = locs.copy()
+    loc_m[:, axis] -= h
+    fd = (
+        mesh.get_interpolation_matrix(loc_p, location_type) @ values
+        - mesh.get_interpolation_matrix(loc_m, location_type) @ values
+    ) / (2 * h)
+    return np.abs(D @ values - fd).max()
+
+
+class TestInterpolationDerivative(unittest.TestCase):
+    def test_tensor_finite_difference(self):
+        rng = np.random.default_rng(4)
+        mesh = discretize.TensorMesh([rng.uniform(0.5, 1.5, 5), 6, 4])
+        locs = rng.uniform(0.05, 0.95, (30, 3)) * [mesh.h[0].sum(), 1, 1]
+        for location_type, n in [
+            ("cell_centers", mesh.n_cells),
+            ("nodes", mesh.n_nodes),
+            ("faces_y", mesh.n_faces),
+            ("edges_z", mesh.n_edges),
+        ]:
+            values = rng.random(n)
+            for axis in range(3):
+                err = _fd_derivative_error(mesh, locs, location_type, axis, values)
+                self.assertLess(err, 1e-7)
+
+    def test_cyl_finite_difference(self):
+        rng = np.random.default_rng(5)
+        mesh = discretize.CylindricalMesh([5, 6, 4])
+        locs = np.c_[
+            rng.uniform(0.1, 0.9, 30),
+            rng.uniform(0.3, 6.0, 30),
+            rng.uniform(0.1, 0.9, 30),
+        ]
+        for location_type, n in [
+            ("cell_centers", mesh.n_cells),
+            ("nodes", mesh.n_nodes),
+            ("faces_x", mesh.n_faces),
+        ]:
+            values = rng.random(n)
+            for axis in range(3):
+                err = _fd_derivative_error(mesh, locs, location_type, axis, values)
+                self.assertLess(err, 1e-7)
+
+    def test_tensor_linear_exact(self):
+        rng = np.random.default_rng(6)
+        mesh = discretize.TensorMesh([rng.uniform(0.5, 1.5, 6), 5])
+        locs = rng.uniform(0, 1, (20, 2)) * [mesh.h[0].sum(), 1]
+        slopes = np.r_[2.0, -3.0]
+        values = mesh.nodes @ slopes
+        for axis, name in enumerate(["x", "y"]):
+            D = mesh.get_interpolation_matrix(locs, "nodes", derivative=name)
+            np.testing.assert_allclose(D @ values, slopes[axis])
+
+        # the interpolation is clamped outside of the tensor
+        D = discretize.utils.interpolation_matrix(
+            np.array([[-1.0, 0.5]]), mesh.nodes_x, mesh.nodes_y, derivative=0
+        )
+        np.testing.assert_allclose(D @ values, 0)
+
+    def test_bad_axis(self):
+        mesh = discretize.TensorMesh([4, 4])
+        with self.assertRaises(ValueError):
+            mesh.get_interpolation_matrix([[0.5, 0.5]], "nodes", derivative=2)
+        with self.assertRaises(ValueError):
+            mesh.get_interpolation_matrix([[0.5, 0.5]], "nodes", derivative="z")
+
+
+class TestInterpolationPlan(unittest.TestCase):
+    def _check_plan(self, mesh, locs, location_type):
+        rng = np.random.default_rng(42)
+        Q = mesh.get_interpolation_matrix(locs, location_type)
+        plan = mesh.get_interpolation_plan(locs, location_type)
+        self.assertEqual(plan.shape, Q.shape)
+        np.testing.assert_allclose((plan.tocsr() - Q).toarray(), 0, atol=1e-14)
+
+        v = rng.random(Q.shape[1])
+        np.testing.assert_allclose(plan.apply(v), Q @ v)
+        V = rng.random((Q.shape[1], 3)) + 1j * rng.random((Q.shape[1], 3))
+        np.testing.assert_allclose(plan.apply(V), Q @ V)
+
+        u = rng.random(Q.shape[0])
+        np.testing.assert_allclose(plan.apply_adjoint(u), Q.T @ u)
+        U = rng.random((Q.shape[0], 2)) + 1j * rng.random((Q.shape[0], 2))
+        np.testing.assert_allclose(plan.apply_adjoint(U), Q.T @ U)
+
+    def test_tensor(self):
+        mesh = discretize.TensorMesh([5, 6, 7])
+        locs = np.random.default_rng(0).random((40, 3))
+        for location_type in ["cell_centers", "nodes", "faces_x", "edges_z"]:
+            self._check_plan(mesh, locs, location_type)
+
+    def test_tree(self):
+        mesh = discretize.TreeMesh([16, 16])
+        mesh.refine_ball([0.5, 0.5], 0.2, -1)
+        locs = np.random.default_rng(1).random((40, 2))
+        for location_type in ["cell_centers", "nodes", "faces_y"]:
+            self._check_plan(mesh, locs, location_type)
+
+    def test_simplex(self):
+        nodes, simplices = discretize.utils.example_simplex_mesh((5, 6))
+        mesh = discretize.SimplexMesh(nodes, simplices)
+        locs = np.random.default_rng(2).random((40, 2))
+        for location_type in ["cell_centers", "nodes"]:
+            self._check_plan(mesh, locs, location_type)
+
+    def test_bad_values(self):
+        mesh = discretize.TensorMesh([4, 4])
+        plan = mesh.get_interpolation_plan(np.full((3, 2), 0.5), "nodes")
+        with self.assertRaises(ValueError):
+            plan.apply(np.ones(mesh.n_nodes + 1))
+        with self.assertRaises(ValueError):
+            plan.apply_adjoint(np.ones(2))
+
+
+class TestInterpolateInChunks(unittest.TestCase):
+    def test_matches_matrix(self):
+        rng = np.random.default_rng(46)
+        mesh = discretize.TreeMesh([16, 16])
+        mesh.refine_ball([0.5, 0.5], 0.2, -1)
+        locs = rng.random((100, 2))
+        for location_type in ["cell_centers", "nodes"]:
+            Q = mesh.get_interpolation_matrix(locs, location_type)
+            v = rng.random((Q.shape[1], 2))
+            out = discretize.utils.interpolate_in_chunks(
+                mesh, locs, v, location_type=location_type, chunk_size=17
+            )
+            np.testing.assert_allclose(out, Q @ v)
+
+    def test_memmap(self):
+        mesh = discretize.TensorMesh([8, 9, 10])
+        grid = discretize.TensorMesh([5, 5, 5]).get_tensor_grid("cell_centers")
+        model = np.random.default_rng(47).random(mesh.n_cells)
+        with tempfile.TemporaryDirectory() as tmp:
+            np.save(os.path.join(tmp, "model.npy"), model)
+            values = np.load(os.path.join(tmp, "model.npy"), mmap_mode="r")
+            output = np.lib.format.open_memmap(
+                os.path.join(tmp, "out.npy"), mode="w+", shape=(len(grid),)
+            )
+            out = discretize.utils.interpolate_in_chunks(
+                mesh, grid, values, output=output, chunk_size=30, derivative="z"
+            )
+            self.assertIs(out, output)
+            Q = mesh.get_interpolation_matrix(grid[:], derivative="z")
+            np.testing.assert_allclose(np.load(os.path.join(tmp, "out.npy")), Q @ model)
+
+            # read-only memory-mapped points
+            np.save(os.path.join(tmp, "loc.npy"), grid[:])
+            loc = np.load(os.path.join(tmp, "loc.npy"), mmap_mode="r")
+            out = discretize.utils.interpolate_in_chunks(
+                mesh, loc, values, chunk_size=30
+            )
+            Q = mesh.get_interpolation_matrix(grid[:])
+            np.testing.assert_allclose(out, Q @ model)
+
+            tree = discretize.TreeMesh([8, 8, 8])
+            tree.refine_ball([0.5, 0.5, 0.5], 0.2, -1)
+            tree_model = model[: tree.n_cells]
+            out = discretize.utils.interpolate_in_chunks(
+                tree, loc, tree_model, chunk_size=30
+            )
+            Q = tree.get_interpolation_matrix(grid[:])
+            np.testing.assert_allclose(out, Q @ tree_model)
+            del values, output, out, loc
+
+    def test_complex(self):
+        rng = np.random.default_rng(49)
+        mesh = discretize.TreeMesh([16, 16, 16])
+        mesh.refine_ball([0.5, 0.5, 0.5], 0.2, -1)
+        loc = rng.random((100, 3))
+        values = rng.random((mesh.n_edges, 2)) + 1j * rng.random((mesh.n_edges, 2))
+        Q = mesh.get_interpolation_matrix(loc, "edges_x")
+        values = values[: Q.shape[1]]
+        out = discretize.utils.interpolate_in_chunks(
+            mesh, loc, values, "edges_x", chunk_size=30
+        )
+        self.assertEqual(out.dtype, np.complex128)
+        np.testing.assert_allclose(out, Q @ values)
+
+        # the output must be able to hold complex values
+        with self.assertRaises(ValueError):
+            discretize.utils.interpolate_in_chunks(
+                mesh, loc, values, "edges_x", output=np.empty((100, 2))
+            )
+
+    def test_errors(self):
+        mesh = discretize.TensorMesh([4, 4])
+        locs = np.full((3, 2), 0.5)
+        with self.assertRaises(ValueError):
+            discretize.utils.interpolate_in_chunks(mesh, locs, np.ones(4))
+        with self.assertRaises(ValueError):
+            discretize.utils.interpolate_in_chunks(
+                mesh, locs, np.ones(mesh.n_cells), chunk_size=0
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -802,5 +802,99 @@ class MimeticProperties(unittest.TestCase):
             )
 
 
+class TestWeightedProductPlans(unittest.TestCase):
+    def test_matches_products(self):
+        for mesh in [
+            discretize.TensorMesh([5, 4, 3]),
+            discretize.CurvilinearMesh(
+                discretize.utils.example_curvilinear_grid([4, 5], "rotate")
+            ),
+        ]:
+            operators = {
+                "face_divergence": mesh.face_divergence.T,
+                "edge_curl": mesh.edge_curl,
+                "nodal_gradient": mesh.nodal_gradient,
+            }
+            for name, B in operators.items():
+                plan = mesh.get_weighted_product_plan(name)
+                self.assertIs(plan, mesh.get_weighted_product_plan(name))
+                A = plan.matrix
+                for w in [
+                    np.random.rand(B.shape[0]),
+                    np.random.rand(B.shape[0]) + 1j * np.random.rand(B.shape[0]),
+                ]:
+                    # the same matrix is refilled
+                    self.assertIs(plan.update(w), A)
+                    true = B.T @ discretize.utils.sdiag(w) @ B
+                    np.testing.assert_allclose(A.toarray(), true.toarray())
+
+                v = np.random.rand(B.shape[1])
+                np.testing.assert_allclose(
+                    plan.deriv(v) @ w, (B.T @ discretize.utils.sdiag(w) @ B) @ v
+                )
+
+    def test_bad_operator(self):
+        mesh = discretize.TensorMesh([3, 3])
+        with self.assertRaises(ValueError):
+            mesh.get_weighted_product_plan("cell_gradient")
+
+
+class TestKroneckerOperators(unittest.TestCase):
+    names = [
+        "face_divergence",
+        "cell_gradient",
+        "nodal_gradient",
+        "edge_curl",
+        "average_face_to_cell",
+        "average_edge_to_cell",
+        "average_node_to_cell",
+        "average_cell_to_face",
+        "average_node_to_face",
+        "average_node_to_edge",
+    ]
+
+    def test_matches_sparse(self):
+        h = [[(1, 3, -1.3), (1, 2)], 4, [1.0, 2.0, 3.0]]
+        for dim in [1, 2, 3]:
+            mesh = discretize.TensorMesh(h[:dim])
+            mesh.set_cell_gradient_BC([["dirichlet", "neumann"]] * dim)
+            for name in self.names:
+                if name == "edge_curl" and dim == 1:
+                    continue
+                K = mesh.get_kronecker_operator(name)
+                A = getattr(mesh, name)
+                self.assertEqual(K.shape, A.shape)
+                np.testing.assert_allclose(K.tocsr().toarray(), A.toarray())
+                x = np.random.rand(A.shape[1], 2)
+                np.testing.assert_allclose(K @ x, A @ x)
+                y = np.random.rand(A.shape[0]) + 1j * np.random.rand(A.shape[0])
+                np.testing.assert_allclose(K.H @ y, A.T @ y)
+
+    def test_default_cell_gradient_BC(self):
+        for dim in [1, 2, 3]:
+            mesh = discretize.TensorMesh([4, 5, 3][:dim])
+            K = mesh.get_kronecker_operator("cell_gradient")
+            np.testing.assert_allclose(
+                K.tocsr().toarray(), mesh.cell_gradient.toarray()
+            )
+
+    def test_factor_memory(self):
+        mesh = discretize.TensorMesh([10, 11, 12])
+        K = mesh.get_kronecker_operator("edge_curl")
+        nnz = sum(
+            f.nnz
+            for row in K.blocks
+            for terms in row
+            if terms is not None
+            for term in terms
+            for f in term
+        )
+        self.assertLess(nnz, 10 * (10 + 11 + 12))
+        self.assertEqual(K.row_shapes[0], (11, 11, 12))
+        self.assertEqual(K.col_shapes[2], (11, 12, 12))
+        with self.assertRaises(ValueError):
+            mesh.get_kronecker_operator("nodal_laplacian")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -242,6 +242,119 @@ class BasicTensorMeshTests(unittest.TestCase):
         M = discretize.TensorMesh([[(10.0, 2)]])
         self.assertLess(np.abs(M.h[0] - np.r_[10.0, 10.0]).sum(), TOL)
 
+    def test_tensor_grid(self):
+        for key in ["cell_centers", "nodes", "faces_x", "edges_y", "edges_z"]:
+            grid = self.mesh3.get_tensor_grid(key)
+            np.testing.assert_equal(np.asarray(grid), getattr(self.mesh3, key))
+        grid = self.mesh3.get_tensor_grid("Fz")
+        np.testing.assert_equal(np.asarray(grid), self.mesh3.faces_z)
+
+    def test_BC_projections(self):
+        mesh = self.mesh3
+        BC = [["neumann", "dirichlet"], "dirichlet", "neumann"]
+        Pbc, Pin, Pout = mesh.get_BC_projections(BC)
+        i_s = mesh.face_boundary_indices
+        offsets = np.cumsum([0, mesh.nFx, mesh.nFy])
+        # boundary face sides as masks over all faces
+        masks = []
+        for i, ind in enumerate(i_s):
+            mask = np.zeros(mesh.nF, dtype=bool)
+            mask[offsets[i // 2] : offsets[i // 2] + len(ind)] = ind
+            masks.append(mask)
+        i_s = masks
+        neumann = i_s[0] | i_s[4] | i_s[5]
+        sign = np.zeros(mesh.nF)
+        sign[i_s[2]] = -1
+        sign[i_s[1] | i_s[3]] = 1
+
+        np.testing.assert_equal(Pout.T @ np.ones(Pout.shape[0]), neumann)
+        np.testing.assert_equal(Pin.T @ np.ones(Pin.shape[0]), ~neumann)
+        np.testing.assert_equal(Pbc @ np.ones(Pbc.shape[1]), sign * mesh.face_areas)
+
+        # the operators are cached by boundary condition
+        self.assertIs(mesh.get_BC_projections(BC)[0], Pbc)
+        self.assertIsNot(mesh.get_BC_projections("neumann")[0], Pbc)
+        Pbc, B = mesh.get_BC_projections_simple()
+        self.assertIs(mesh.get_BC_projections_simple()[1], B)
+
+    def test_cell_gradient_BC_cache(self):
+        mesh = self.mesh3
+        mesh.set_cell_gradient_BC("dirichlet")
+        G_d = mesh.cell_gradient
+        mesh.set_cell_gradient_BC("neumann")
+        G_n = mesh.cell_gradient
+        self.assertGreater(abs(G_d - G_n).sum(), 0)
+        mesh.set_cell_gradient_BC("dirichlet")
+        self.assertIs(mesh.cell_gradient, G_d)
+
+    def test_poisson_solver(self):
+        rng = np.random.default_rng(4412)
+        uniform = discretize.TensorMesh([6, 5, 4])
+        stretched = discretize.TensorMesh([[(1, 3, -1.3), (1, 4)], [4, 3, 2], 5])
+        BC = [["neumann", "dirichlet"], "dirichlet", ["dirichlet", "neumann"]]
+        for mesh in [uniform, stretched]:
+            mesh.set_cell_gradient_BC(BC)
+            L = (mesh.face_divergence @ mesh.cell_gradient).toarray()
+            Linv = mesh.get_poisson_solver()
+            q = rng.random((mesh.n_cells, 2))
+            np.testing.assert_allclose(Linv @ q, np.linalg.solve(L, q), atol=1e-10)
+            np.testing.assert_allclose(Linv.T @ q, np.linalg.solve(L.T, q), atol=1e-10)
+
+        # the preconditioner is exact on a uniform mesh
+        q = rng.random(uniform.n_cells)
+        M = uniform.get_poisson_preconditioner(BC)
+        Linv = uniform.get_poisson_solver(BC)
+        np.testing.assert_allclose(M @ q, Linv @ q, atol=1e-10)
+
+        # all Neumann: zero volume weighted mean solution
+        mesh = stretched
+        mesh.set_cell_gradient_BC("neumann")
+        L = mesh.face_divergence @ mesh.cell_gradient
+        q = rng.random(mesh.n_cells)
+        q -= mesh.cell_volumes @ q / mesh.cell_volumes.sum()
+        u = mesh.get_poisson_solver() @ q
+        np.testing.assert_allclose(L @ u, q, atol=1e-10)
+        self.assertLess(abs(mesh.cell_volumes @ u), 1e-10)
+
+    def test_coarsen_hierarchy(self):
+        mesh = discretize.TensorMesh([[(1, 3, -1.3), (1, 5)], 7, [2.0, 3.0, 1.0]])
+        meshes, R, P = mesh.coarsen_hierarchy(2)
+        self.assertEqual(
+            [m.shape_cells for m in meshes], [(8, 7, 3), (4, 4, 2), (2, 2, 1)]
+        )
+        coarse = meshes[1]
+        np.testing.assert_allclose(coarse.h[2], [5.0, 1.0])
+        np.testing.assert_allclose(coarse.nodes_x, mesh.nodes_x[::2])
+        self.assertEqual(len(mesh.coarsen_hierarchy(10)[0]), 4)
+        self.assertFalse(
+            hasattr(discretize.CylindricalMesh([4, 1, 6]), "coarsen_hierarchy")
+        )
+
+        Rc, Pc = R[0]["cell_centers"], P[0]["cell_centers"]
+        np.testing.assert_allclose((Rc @ Pc).toarray(), np.eye(coarse.n_cells))
+        np.testing.assert_allclose(Pc.T @ mesh.cell_volumes, coarse.cell_volumes)
+        for key in ["faces", "edges", "nodes"]:
+            np.testing.assert_allclose(P[0][key] @ np.ones(P[0][key].shape[1]), 1)
+            np.testing.assert_allclose(R[0][key] @ np.ones(R[0][key].shape[1]), 1)
+
+        # fluxes that vary linearly along the face normals are reproduced
+        def flux(m):
+            return np.r_[
+                2 * m.faces_x[:, 0] + 1, m.faces_y[:, 1] - 3, 0.5 * m.faces_z[:, 2]
+            ]
+
+        np.testing.assert_allclose(P[0]["faces"] @ flux(coarse), flux(mesh))
+
+        # linear tangential fields are reproduced
+        def tangential(m):
+            return np.r_[
+                m.edges_x[:, 1] - m.edges_x[:, 2],
+                m.edges_y[:, 0] + 1,
+                m.edges_z[:, 0] * m.edges_z[:, 1],
+            ]
+
+        np.testing.assert_allclose(P[0]["edges"] @ tangential(coarse), tangential(mesh))
+
     def test_serialization(self):
         mesh = discretize.TensorMesh.deserialize(self.mesh2.serialize())
         self.assertTrue(np.all(self.mesh2.x0 == mesh.x0))
@@ -768,6 +768,247 @@ class TestTensorSizeErrorRaises(unittest.TestCase):
         )
 
 
+class TestInnerProductProjectionCache(unittest.TestCase):
+    def setUp(self):
+        self.mesh = TensorMesh([4, 5, 6])
+        self.model = np.random.rand(self.mesh.nC, 6)
+
+    def test_projections_reused(self):
+        mesh = self.mesh
+        for proj in ["F", "E"]:
+            M1 = mesh._getInnerProduct(proj, self.model, do_fast=False)
+            Ps = mesh._inner_product_projections[proj]
+            M2 = mesh._getInnerProduct(proj, 2 * self.model, do_fast=False)
+            self.assertIs(Ps, mesh._inner_product_projections[proj])
+            np.testing.assert_allclose((2 * M1 - M2).data, 0.0, atol=1e-12)
+
+    def test_opt_out(self):
+        mesh = self.mesh
+        M1 = mesh.get_face_inner_product(self.model, do_fast=False)
+        mesh.cache_inner_product_projections = False
+        self.assertIsNone(mesh._inner_product_projections)
+        M2 = mesh.get_face_inner_product(self.model, do_fast=False)
+        self.assertIsNone(mesh._inner_product_projections)
+        np.testing.assert_allclose((M1 - M2).data, 0.0, atol=1e-12)
+
+
+class TestInnerProductPlan(unittest.TestCase):
+    def setUp(self):
+        self.meshes = [TensorMesh([5]), TensorMesh([4, 5]), TensorMesh([4, 5, 6])]
+
+    def _models(self, mesh):
+        n_c, dim = mesh.nC, mesh.dim
+        models = [2.0, np.random.rand(n_c) + 1, np.random.rand(n_c, dim) + 1]
+        if dim > 1:
+            tensor = 0.1 * np.random.rand(n_c, 3 if dim == 2 else 6)
+            tensor[:, :dim] += 1
+            models.append(tensor)
+        return models
+
+    def test_matches_inner_product(self):
+        for mesh in self.meshes:
+            for model in self._models(mesh):
+                for proj in ["face", "edge"]:
+                    plan = getattr(mesh, f"get_{proj}_inner_product_plan")(model)
+                    get_M = getattr(mesh, f"get_{proj}_inner_product")
+                    for invert_model in [False, True]:
+                        M1 = plan.update(model, invert_model=invert_model)
+                        M2 = get_M(model, invert_model=invert_model)
+                        np.testing.assert_allclose(M1.toarray(), M2.toarray())
+
+    def test_fixed_structure(self):
+        mesh = self.meshes[-1]
+        model = self._models(mesh)[-1]
+        plan = mesh.get_edge_inner_product_plan(model)
+        M1 = plan.update(model)
+        indices, indptr = M1.indices.copy(), M1.indptr.copy()
+        M2 = plan.update(2 * model)
+        self.assertIs(M1, M2)
+        self.assertIs(M2, plan.matrix)
+        np.testing.assert_array_equal(M2.indices, indices)
+        np.testing.assert_array_equal(M2.indptr, indptr)
+        np.testing.assert_allclose(
+            M2.toarray(), mesh.get_edge_inner_product(2 * model).toarray()
+        )
+
+    def test_complex_model(self):
+        for mesh in self.meshes:
+            for model in self._models(mesh):
+                model_c = model * (1 + 0.5j)
+                for proj in ["face", "edge"]:
+                    get_M = getattr(mesh, f"get_{proj}_inner_product")
+                    get_plan = getattr(mesh, f"get_{proj}_inner_product_plan")
+                    # from a complex template, or a real one
+                    for plan in [get_plan(model_c), get_plan(model)]:
+                        M = plan.update(model_c)
+                        self.assertEqual(M.dtype, np.complex128)
+                        np.testing.assert_allclose(
+                            M.toarray(), get_M(model_c).toarray()
+                        )
+                        M = plan.update(model)
+                        np.testing.assert_allclose(M.toarray(), get_M(model).toarray())
+
+    def test_wrong_tensor_type(self):
+        mesh = self.meshes[-1]
+        plan = mesh.get_face_inner_product_plan(np.ones(mesh.nC))
+        self.assertRaises(ValueError, plan.update, np.ones((mesh.nC, 3)))
+
+
+class TestFastFullTensorInnerProducts(unittest.TestCase):
+    def test_fast_matches_general(self):
+        for mesh in [TensorMesh([4, 5]), TensorMesh([3, 4, 5])]:
+            n_param = 3 if mesh.dim == 2 else 6
+            model = 0.1 * np.random.rand(mesh.nC, n_param)
+            model[:, : mesh.dim] += 1
+            for proj in ["F", "E"]:
+                for invert_model in [False, True]:
+                    M1 = mesh._getInnerProduct(proj, model, invert_model=invert_model)
+                    M2 = mesh._getInnerProduct(
+                        proj, model, invert_model=invert_model, do_fast=False
+                    )
+                    np.testing.assert_allclose(M1.toarray(), M2.toarray())
+                v = np.random.rand(M1.shape[0])
+                D1 = mesh._getInnerProductDeriv(model, proj)(v)
+                D2 = mesh._getInnerProductDeriv(model, proj, do_fast=False)(v)
+                np.testing.assert_allclose(D1.toarray(), D2.toarray())
+
+
+class TestBatchInnerProducts(unittest.TestCase):
+    def setUp(self):
+        self.mesh = TensorMesh([4, 5, 6])
+        self.n_models = 3
+
+    def test_diagonal_batch(self):
+        mesh = self.mesh
+        for shape in [(mesh.nC,), (mesh.nC, 3)]:
+            models = np.random.rand(*shape, self.n_models) + 1
+            for invert_model in [False, True]:
+                for invert_matrix in [False, True]:
+                    diags = mesh.get_edge_inner_product(
+                        models,
+                        invert_model=invert_model,
+                        invert_matrix=invert_matrix,
+                        batch=True,
+                    )
+                    self.assertEqual(diags.shape, (mesh.nE, self.n_models))
+                    for i in range(self.n_models):
+                        M = mesh.get_edge_inner_product(
+                            models[..., i],
+                            invert_model=invert_model,
+                            invert_matrix=invert_matrix,
+                        )
+                        np.testing.assert_allclose(diags[:, i], M.diagonal())
+
+    def test_complex_batch(self):
+        mesh = self.mesh
+        models = np.random.rand(mesh.nC, self.n_models) + 1j * np.random.rand(
+            mesh.nC, self.n_models
+        )
+        diags = mesh.get_face_inner_product(models, batch=True)
+        for i in range(self.n_models):
+            M = mesh.get_face_inner_product(models[:, i])
+            np.testing.assert_allclose(diags[:, i], M.diagonal())
+
+    def test_tensor_batch(self):
+        mesh = self.mesh
+        models = 0.1 * np.random.rand(mesh.nC, 6, self.n_models)
+        models[:, :3] += 1
+        Ms = mesh.get_face_inner_product(models, batch=True)
+        self.assertEqual(len(Ms), self.n_models)
+        for i in range(self.n_models):
+            M = mesh.get_face_inner_product(models[..., i])
+            np.testing.assert_allclose(Ms[i].toarray(), M.toarray())
+
+
+class TestMatrixFreeInnerProductDerivs(unittest.TestCase):
+    def setUp(self):
+        self.mesh = TensorMesh([4, 5, 6])
+
+    def _compare(self, model, proj, **kwargs):
+        mesh = self.mesh
+        get_deriv = getattr(mesh, f"get_{proj}_inner_product_deriv")
+        v = np.random.rand(mesh.nF if proj == "face" else mesh.nE)
+        D1 = get_deriv(model, matrix_free=True, **kwargs)(v)
+        D2 = get_deriv(model, **kwargs)(v)
+        self.assertEqual(D1.shape, D2.shape)
+        w = np.random.rand(D1.shape[1], 2)
+        u = np.random.rand(D1.shape[0], 2)
+        np.testing.assert_allclose(D1 @ w[:, 0], D2 @ w[:, 0])
+        np.testing.assert_allclose(D1.T @ u[:, 0], D2.T @ u[:, 0])
+        np.testing.assert_allclose(D1 @ w, D2 @ w)
+        np.testing.assert_allclose(D1.T @ u, D2.T @ u)
+
+    def test_isotropic(self):
+        model = np.random.rand(self.mesh.nC) + 1
+        for proj in ["face", "edge"]:
+            for invert_model in [False, True]:
+                for invert_matrix in [False, True]:
+                    self._compare(
+                        model,
+                        proj,
+                        invert_model=invert_model,
+                        invert_matrix=invert_matrix,
+                    )
+
+    def test_anisotropic(self):
+        model = np.random.rand(self.mesh.nC, 3) + 1
+        for proj in ["face", "edge"]:
+            for invert_model in [False, True]:
+                self._compare(model, proj, invert_model=invert_model)
+
+    def test_tensor(self):
+        model = 0.1 * np.random.rand(self.mesh.nC, 6)
+        model[:, :3] += 1
+        for proj in ["face", "edge"]:
+            self._compare(model, proj)
+        deriv = self.mesh.get_face_inner_product_deriv(
+            model, invert_model=True, matrix_free=True
+        )
+        self.assertRaises(NotImplementedError, deriv, np.ones(self.mesh.nF))
+
+
+class TestMultiVectorInnerProductDerivs(unittest.TestCase):
+    def setUp(self):
+        self.mesh = TensorMesh([4, 5, 6])
+        self.n_v = 3
+
+    def _compare(self, model, proj, **kwargs):
+        mesh = self.mesh
+        n = mesh.nF if proj == "face" else mesh.nE
+        V = np.random.rand(n, self.n_v) + 1j * np.random.rand(n, self.n_v)
+        for do_fast in [True, False]:
+            for matrix_free in [False, True]:
+                deriv = getattr(mesh, f"get_{proj}_inner_product_deriv")(
+                    model, do_fast=do_fast, matrix_free=matrix_free, **kwargs
+                )
+                D = deriv(V)
+                self.assertEqual(D.shape[0], n * self.n_v)
+                w = np.random.rand(D.shape[1])
+                u = np.random.rand(D.shape[0])
+                Dw = np.concatenate([deriv(v) @ w for v in V.T])
+                DTu = sum(
+                    deriv(v).T @ u[i * n : (i + 1) * n] for i, v in enumerate(V.T)
+                )
+                np.testing.assert_allclose(D @ w, Dw)
+                np.testing.assert_allclose(D.T @ u, DTu)
+
+    def test_isotropic(self):
+        model = np.random.rand(self.mesh.nC) + 1
+        for proj in ["face", "edge"]:
+            self._compare(model, proj)
+
+    def test_anisotropic(self):
+        model = np.random.rand(self.mesh.nC, 3) + 1
+        for proj in ["face", "edge"]:
+            self._compare(model, proj)
+
+    def test_tensor(self):
+        model = 0.1 * np.random.rand(self.mesh.nC, 6)
+        model[:, :3] += 1
+        for proj in ["face", "edge"]:
+            self._compare(model, proj)
+
+
 ###################################################
 #### Uncomment to Reevaluate the InnerProducts ####
 ###################################################
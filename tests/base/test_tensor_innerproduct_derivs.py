@@ -135,6 +135,12 @@ class TestInnerProductsDerivsTensor(unittest.TestCase):
     def test_FaceIP_3D_anisotropic_fast(self):
         self.assertTrue(self.doTestFace([10, 4, 5], 3, True, "Tensor"))
 
+    def test_FaceIP_2D_tensor_fast(self):
+        self.assertTrue(self.doTestFace([10, 4], 3, True, "Tensor"))
+
+    def test_FaceIP_3D_tensor_fast(self):
+        self.assertTrue(self.doTestFace([10, 4, 5], 6, True, "Tensor"))
+
     def test_EdgeIP_1D_float(self):
         self.assertTrue(self.doTestEdge([10], 0, False, "Tensor"))
 
@@ -189,6 +195,12 @@ class TestInnerProductsDerivsTensor(unittest.TestCase):
     def test_EdgeIP_3D_anisotropic_fast(self):
         self.assertTrue(self.doTestEdge([10, 4, 5], 3, True, "Tensor"))
 
+    def test_EdgeIP_2D_tensor_fast(self):
+        self.assertTrue(self.doTestEdge([10, 4], 3, True, "Tensor"))
+
+    def test_EdgeIP_3D_tensor_fast(self):
+        self.assertTrue(self.doTestEdge([10, 4, 5], 6, True, "Tensor"))
+
     def test_FaceIP_1D_float_fast_harmonic(self):
         self.assertTrue(
             self.doTestFace(
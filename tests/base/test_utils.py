@@ -1,14 +1,18 @@
 import unittest
 import numpy as np
 import scipy.sparse as sp
+from scipy import interpolate
+from scipy.spatial import cKDTree
 from discretize.utils import (
     sdiag,
     sub2ind,
     ndgrid,
+    TensorGrid,
     mkvc,
     is_scalar,
     inverse_2x2_block_diagonal,
     inverse_3x3_block_diagonal,
+    invert_blocks,
     inverse_property_tensor,
     make_property_tensor,
     index_cube,
@@ -22,6 +26,7 @@ from discretize.utils import (
     mesh_builder_xyz,
     refine_tree_xyz,
     unpack_widths,
+    clear_spatial_index_cache,
 )
 import discretize
 
@@ -72,6 +77,42 @@ class TestSequenceFunctions(unittest.TestCase):
         self.assertTrue(np.all(XYZ[:, 1] == X2_test))
         self.assertTrue(np.all(XYZ[:, 2] == X3_test))
 
+    def test_mkvc_view(self):
+        x = np.asfortranarray(np.random.rand(3, 4))
+        self.assertTrue(np.shares_memory(mkvc(x), x))
+        self.assertTrue(np.shares_memory(mkvc(self.a, 2), self.a))
+
+    def test_ndgrid_order(self):
+        for order in ["F", "C"]:
+            XYZ = ndgrid([self.a, self.b, self.c], order=order)
+            grids = np.meshgrid(self.a, self.b, self.c, indexing="ij")
+            for i, grid in enumerate(grids):
+                np.testing.assert_equal(XYZ[:, i], grid.reshape(-1, order=order))
+
+    def test_tensor_grid(self):
+        x = np.random.rand(3)
+        grid = TensorGrid(x, self.b, self.c)
+        XYZ = ndgrid(x, self.b, self.c)
+        self.assertEqual(grid.shape, XYZ.shape)
+        self.assertEqual(len(grid), len(XYZ))
+        np.testing.assert_equal(np.asarray(grid), XYZ)
+
+        for key in [
+            5,
+            -1,
+            slice(2, 20, 3),
+            [0, 7, -3],
+            XYZ[:, 0] > 0.5,
+            (slice(None), 1),
+            (4, 2),
+            (slice(1, 9), [0, 2]),
+        ]:
+            np.testing.assert_equal(grid[key], XYZ[key])
+        self.assertRaises(IndexError, grid.__getitem__, len(XYZ))
+
+        np.testing.assert_equal(np.vstack(list(grid.chunks(5))), XYZ)
+        np.testing.assert_equal(np.array(list(grid)), XYZ)
+
     def test_sub2ind(self):
         x = np.ones((5, 2))
         self.assertTrue(np.all(sub2ind(x.shape, [0, 0]) == [0]))
@@ -152,6 +193,54 @@ class TestSequenceFunctions(unittest.TestCase):
 
         self.assertTrue(np.linalg.norm(Z3.todense().ravel(), 2) < TOL)
 
+    def test_invert_blocks(self):
+        for d in [2, 3]:
+            for dtype in [np.float64, np.complex128, np.int64]:
+                A = np.random.randint(0, 3, (4, 5, d, d)).astype(dtype)
+                A += (10 * np.eye(d, dtype=int)).astype(dtype)
+                if dtype == np.complex128:
+                    A += 1j * np.random.rand(4, 5, d, d)
+                B = invert_blocks(A)
+                np.testing.assert_allclose(B, np.linalg.inv(A))
+
+    def test_invert_singular_blocks(self):
+        A2 = np.array([[[1.0, 2.0], [2.0, 4.0]], [[2.0, 0.0], [0.0, 4.0]]])
+        A3 = np.zeros((2, 3, 3))
+        A3[1] = 2 * np.eye(3)
+        for A in [A2, A3]:
+            d = A.shape[-1]
+            # in place
+            B = invert_blocks(A)
+            self.assertFalse(np.any(np.isfinite(B[0])))
+            np.testing.assert_allclose(B[1], np.linalg.inv(A[1]))
+            # as a sparse matrix
+            blocks = [A[:, i, j] for i in range(d) for j in range(d)]
+            if d == 2:
+                M = inverse_2x2_block_diagonal(*blocks, return_matrix=True)
+            else:
+                M = inverse_3x3_block_diagonal(*blocks, return_matrix=True)
+            M = M.toarray()
+            self.assertFalse(np.any(np.isfinite(M[0::2, 0::2])))
+            np.testing.assert_allclose(M[1::2, 1::2], np.linalg.inv(A[1]))
+
+    def test_inverse_block_diagonal_complex(self):
+        a = [np.random.rand(5) + 1j * np.random.rand(5) for i in range(9)]
+        a[0] += 3
+        a[4] += 3
+        a[8] += 3
+        B = inverse_3x3_block_diagonal(*a)
+        self.assertEqual(B.format, "csr")
+        A = sp.bmat([[sdiag(a[3 * i + j]) for j in range(3)] for i in range(3)])
+        np.testing.assert_allclose((B @ A).toarray(), np.eye(15), atol=TOL)
+
+        bs = inverse_3x3_block_diagonal(*a, return_matrix=False)
+        np.testing.assert_allclose(
+            sp.bmat(
+                [[sdiag(bs[3 * i + j]) for j in range(3)] for i in range(3)]
+            ).toarray(),
+            B.toarray(),
+        )
+
     def test_inverse_property_tensor2D(self):
         M = discretize.TensorMesh([6, 6])
         a1 = np.random.rand(M.nC)
@@ -228,6 +317,62 @@ class TestSequenceFunctions(unittest.TestCase):
             Z = B2 * A - sp.identity(M.nC * 3)
             self.assertTrue(np.linalg.norm(Z.todense().ravel(), 2) < TOL)
 
+    def test_make_property_tensor_structure(self):
+        for n, stencil in [
+            ([3, 4], [[0, 2], [2, 1]]),
+            ([3, 4, 2], [[0, 3, 4], [3, 1, 5], [4, 5, 2]]),
+        ]:
+            M = discretize.TensorMesh(n)
+            n_param = len(stencil) * (len(stencil) + 1) // 2
+            for n_p in [1, M.dim, n_param]:
+                prop = np.random.rand(M.nC, n_p)
+                A = make_property_tensor(M, prop)
+                self.assertTrue(sp.isspmatrix_csr(A))
+                if n_p == 1:
+                    true = sp.kron(sp.identity(M.dim), sdiag(prop[:, 0]))
+                elif n_p == M.dim:
+                    true = sdiag(mkvc(prop))
+                else:
+                    true = sp.bmat(
+                        [[sdiag(prop[:, i]) for i in row] for row in stencil]
+                    )
+                np.testing.assert_equal(A.toarray(), true.toarray())
+
+                # every matrix owns its (writeable) structure
+                B = make_property_tensor(M, np.random.rand(M.nC, n_p))
+                self.assertFalse(np.shares_memory(A.indices, B.indices))
+                self.assertFalse(np.shares_memory(A.indptr, B.indptr))
+                self.assertFalse(np.shares_memory(A.data, B.data))
+                A.data[0] = 0
+                A.eliminate_zeros()
+                self.assertEqual(A.nnz, B.nnz - 1)
+
+    def test_inverse_property_tensor_matrix_writeable(self):
+        from discretize.utils.matrix_utils import _cached_property_tensor_pattern
+
+        M = discretize.TensorMesh([3, 4, 2])
+        model = np.random.rand(M.nC, 6) + 3
+        expected = inverse_property_tensor(M, model, return_matrix=True).toarray()
+        pattern = _cached_property_tensor_pattern(M.nC, 3, 3)
+
+        # callers may modify the returned matrices in place
+        A = inverse_property_tensor(M, model, return_matrix=True)
+        A.indices[:] = 0
+        A.indptr[1:] = A.nnz
+        B = make_property_tensor(M, 2 * np.ones(M.nC))
+        B.data[::2] = 0
+        B.eliminate_zeros()
+        self.assertEqual(B.nnz, 3 * M.nC // 2)
+
+        # without changing the cached pattern
+        self.assertIs(_cached_property_tensor_pattern(M.nC, 3, 3), pattern)
+        self.assertFalse(np.shares_memory(A.indices, pattern[0]))
+        C = inverse_property_tensor(M, model, return_matrix=True)
+        np.testing.assert_equal(C.toarray(), expected)
+        np.testing.assert_equal(
+            make_property_tensor(M, 2 * np.ones(M.nC)).toarray(), 2 * np.eye(3 * M.nC)
+        )
+
     def test_is_scalar(self):
         self.assertTrue(is_scalar(1.0))
         self.assertTrue(is_scalar(1))
@@ -601,6 +746,93 @@ class TestMeshUtils(unittest.TestCase):
                 mesh_cyl2, topo3D, grid_reference="CC", method="nearest"
             )
 
+    def test_active_from_xyz_tree(self):
+        xx, yy = np.meshgrid(np.linspace(0.1, 0.9, 30), np.linspace(0.1, 0.9, 30))
+        zz = 0.5 + 0.1 * np.sin(5 * xx) * np.cos(3 * yy)
+        topo = np.c_[xx.ravel(), yy.ravel(), zz.ravel()]
+        mesh = discretize.TreeMesh([32, 32, 32])
+        mesh.refine_surface(topo, padding_cells_by_level=[1, 1], finalize=True)
+
+        # compare against sampling the surface at every location
+        linear = interpolate.LinearNDInterpolator(topo[:, :2], topo[:, 2])
+        nearest = cKDTree(topo[:, :2])
+        tree = cKDTree(topo)
+
+        def below(locations, method="linear"):
+            if method == "linear":
+                z = linear(locations[:, :2])
+            else:
+                z = topo[nearest.query(locations[:, :2])[1], 2]
+            ind_nan = np.isnan(z)
+            z[ind_nan] = topo[tree.query(locations[ind_nan])[1], 2]
+            return locations[:, 2] < z
+
+        cell_centers = mesh.cell_centers
+        corners = [
+            cell_centers + np.r_[sx, sy, 1] * mesh.h_gridded / 2.0
+            for sx in [-1, 1]
+            for sy in [-1, 1]
+        ]
+        for method in ["linear", "nearest"]:
+            np.testing.assert_array_equal(
+                active_from_xyz(mesh, topo, "CC", method), below(cell_centers, method)
+            )
+            np.testing.assert_array_equal(
+                active_from_xyz(mesh, topo, "N", method),
+                np.all([below(corner, method) for corner in corners], axis=0),
+            )
+
+    def test_cached_spatial_index(self):
+        from discretize.utils.mesh_utils import _cached_spatial_index
+
+        rng = np.random.default_rng(4421)
+        pts = rng.random((50, 2))
+        tree = _cached_spatial_index(pts)
+        self.assertIs(_cached_spatial_index(pts.copy()), tree)
+        tri = _cached_spatial_index(pts, "delaunay")
+        self.assertIs(_cached_spatial_index(pts, "delaunay"), tri)
+        self.assertIsNot(tri, tree)
+
+        # changed points get a new index
+        pts[0] = 0.5
+        self.assertIsNot(_cached_spatial_index(pts), tree)
+        with self.assertRaises(ValueError):
+            _cached_spatial_index(pts, "octree")
+
+        # refining with padded surfaces keeps the cached topography indexes
+        xx, yy = np.meshgrid(np.linspace(10, 90, 9), np.linspace(10, 90, 9))
+        topo = np.c_[xx.ravel(), yy.ravel(), 50 + 0.1 * xx.ravel()]
+        mesh = discretize.TreeMesh([32, 32, 32], [0, 0, 0])
+        active_from_xyz(mesh, topo, method="linear")
+        tri = _cached_spatial_index(topo[:, :2], "delaunay")
+        refine_tree_xyz(
+            mesh,
+            topo,
+            method="surface",
+            octree_levels=[1, 1, 1],
+            octree_levels_padding=[1, 2, 3],
+            finalize=False,
+        )
+        self.assertIs(_cached_spatial_index(topo[:, :2], "delaunay"), tri)
+
+        clear_spatial_index_cache()
+        self.assertIsNot(_cached_spatial_index(topo[:, :2], "delaunay"), tri)
+
+    def test_closest_points_index_cache(self):
+        mesh = discretize.TreeMesh([16, 16])
+        mesh.refine(3)
+        pts = np.array([[0.1, 0.2], [0.7, 0.4]])
+        ind = mesh.closest_points_index(pts)
+        tree = mesh._cell_centers_tree[0]
+        np.testing.assert_equal(mesh.closest_points_index(pts), ind)
+        self.assertIs(mesh._cell_centers_tree[0], tree)
+
+        # moving the mesh rebuilds the tree
+        mesh.origin = [-1.0, -1.0]
+        ind_moved = mesh.closest_points_index(pts - 1)
+        self.assertIsNot(mesh._cell_centers_tree[0], tree)
+        np.testing.assert_equal(ind_moved, ind)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import numpy as np
 import unittest
 import discretize
@@ -161,7 +163,7 @@ class TestVolumeAverage(unittest.TestCase):
 
         hr = np.r_[1, 1, 0.5]
         hz = np.r_[2, 1]
-        meshCyl = discretize.CylindricalMesh([hr, 1, hz], np.r_[0.0, 0.0, 0.0])
+        meshCyl = discretize.CylindricalMesh([hr, hz], np.r_[0.0, 0.0])
         mesh2 = discretize.TreeMesh([h2, h2])
         mesh2.insert_cells([0.75, 0.75], [4])
 
@@ -439,6 +441,179 @@ class TestVolumeAverage(unittest.TestCase):
             print(vol1, vol2)
             self.assertAlmostEqual(vol1, vol2)
 
+    def test_tensor_to_tensor_kronecker(self):
+        rng = np.random.default_rng(44)
+        h1s = []
+        h2s = []
+        for i in range(3):
+            h1s.append(rng.uniform(0.5, 1.5, 7 + i))
+            h2s.append(rng.uniform(0.5, 1.5, 5 - i))
+            mesh1 = discretize.TensorMesh(h1s, origin=rng.uniform(-1, 0, i + 1))
+            mesh2 = discretize.TensorMesh(h2s, origin=rng.uniform(-1, 0, i + 1))
+
+            Av = volume_average(mesh1, mesh2)
+            Ak = volume_average(mesh1, mesh2, kronecker=True)
+            self.assertIsInstance(Ak, discretize.utils.KroneckerOperator)
+            self.assertEqual(len(Ak.blocks[0][0][0]), i + 1)
+            assert_allclose((Ak.tocsr() - Av).toarray(), 0, atol=1e-15)
+
+            # a block of models is averaged in a single call
+            in_put = rng.random((mesh1.nC, 3))
+            out_put = np.empty((mesh2.nC, 3))
+            out1 = volume_average(mesh1, mesh2, in_put, out_put)
+            assert_array_equal(out1, out_put)
+            assert_allclose(out1, Av @ in_put)
+            assert_allclose(Ak @ in_put, Av @ in_put)
+
+    def test_tree_block_of_models(self):
+        mesh1 = discretize.TensorMesh([16, 16])
+        mesh2 = discretize.TreeMesh([16, 16])
+        mesh2.refine_ball([0.5, 0.5], 0.2, -1)
+        in_put = np.random.rand(mesh1.nC, 2)
+
+        out1 = volume_average(mesh1, mesh2, in_put)
+        assert_allclose(out1, volume_average(mesh1, mesh2) @ in_put)
+        out2 = volume_average(mesh2, mesh1, out1)
+        assert_allclose(out2, volume_average(mesh2, mesh1) @ out1)
+
+    def test_simplex_to_tensor(self):
+        rng = np.random.default_rng(45)
+        for n in [(6, 5), (4, 5, 3)]:
+            nodes, simplices = discretize.utils.example_simplex_mesh(n)
+            mesh1 = discretize.SimplexMesh(nodes, simplices)
+            mesh2 = discretize.TensorMesh([7] * len(n))
+
+            # same extent, so the operation is conservative both ways
+            in_put = rng.random(mesh1.nC)
+            out_put = volume_average(mesh1, mesh2, in_put)
+            vol1 = np.sum(mesh1.cell_volumes * in_put)
+            vol2 = np.sum(mesh2.cell_volumes * out_put)
+            self.assertAlmostEqual(vol1, vol2)
+            assert_allclose(volume_average(mesh2, mesh1, np.ones(mesh2.nC)), 1)
+
+            in_put = rng.random(mesh2.nC)
+            out_put = volume_average(mesh2, mesh1, in_put)
+            vol1 = np.sum(mesh2.cell_volumes * in_put)
+            vol2 = np.sum(mesh1.cell_volumes * out_put)
+            self.assertAlmostEqual(vol1, vol2)
+
+            # a mesh averaged to itself is the identity
+            P = volume_average(mesh1, mesh1)
+            assert_allclose(P.toarray(), np.eye(mesh1.nC), atol=1e-12)
+
+    def test_curvilinear_to_tree(self):
+        rng = np.random.default_rng(46)
+        mesh1 = discretize.CurvilinearMesh(
+            discretize.utils.example_curvilinear_grid([6, 6, 6], "rotate")
+        )
+        mesh2 = discretize.TreeMesh([16, 16, 16], diagonal_balance=True)
+        mesh2.refine_ball([0.5, 0.5, 0.5], 0.3, -1)
+
+        in_put = rng.random(mesh1.nC)
+        out_put = np.empty(mesh2.nC)
+        out1 = volume_average(mesh1, mesh2, in_put, out_put)
+        assert_array_equal(out1, out_put)
+        assert_allclose(out1, volume_average(mesh1, mesh2) @ in_put)
+        assert_allclose(volume_average(mesh1, mesh2, np.ones(mesh1.nC)), 1)
+        # the curvilinear cells are split into (planar faced) tetrahedra
+        vol1 = np.sum(mesh1.cell_volumes * in_put)
+        vol2 = np.sum(mesh2.cell_volumes * out1)
+        assert_allclose(vol1, vol2, rtol=1e-3)
+
+    def test_overlap_outside_extent(self):
+        # cells partly outside of the input average only their overlap and cells
+        # entirely outside of it are zero
+        mesh1 = discretize.SimplexMesh(*discretize.utils.example_simplex_mesh((4, 4)))
+        mesh2 = discretize.TensorMesh([[0.5, 0.5, 0.5, 0.5], [0.5, 0.5, 0.5, 0.5]])
+        out = volume_average(mesh1, mesh2, 2 * np.ones(mesh1.n_cells))
+        inside = np.all(mesh2.cell_centers < 1, axis=1)
+        assert_allclose(out[inside], 2)
+        assert_allclose(out[~inside], 0)
+
+        mesh2 = discretize.TensorMesh([[0.6, 0.6], [0.6, 0.6]])
+        out = volume_average(mesh1, mesh2, 2 * np.ones(mesh1.n_cells))
+        assert_allclose(out, 2)
+
+    def test_cylindrical_to_tensor(self):
+        rng = np.random.default_rng(47)
+        hr = np.r_[0.2, 0.3, 0.5]
+        hz = np.r_[0.5, 1.0]
+        meshes = [
+            discretize.CylindricalMesh([hr, 1, hz], origin=[0, 0, -1]),
+            discretize.CylindricalMesh(
+                [hr, np.full(3, np.pi / 3), hz], origin=[0, np.pi / 4, -1]
+            ),
+        ]
+        for mesh1 in meshes:
+            # a single cell across each layer of the cylinder
+            mesh2 = discretize.TensorMesh([[3], [3], hz], origin=[-1.5, -1.5, -1])
+            in_put = rng.random(mesh1.nC)
+            out_put = volume_average(mesh1, mesh2, in_put)
+            layers = np.digitize(mesh1.cell_centers[:, 2], mesh2.nodes_z) - 1
+            for layer in range(len(hz)):
+                in_layer = layers == layer
+                expected = np.average(
+                    in_put[in_layer], weights=mesh1.cell_volumes[in_layer]
+                )
+                assert_allclose(out_put[layer], expected)
+
+            # constants are preserved on the cylinder
+            h = np.full(8, 0.25)
+            mesh2 = discretize.TensorMesh([h, h, [1.5]], origin=[-1, -1, -1])
+            assert_allclose(volume_average(mesh2, mesh1, np.ones(mesh2.nC)), 1)
+
+    def test_chunked(self):
+        rng = np.random.default_rng(48)
+        h1 = rng.uniform(0.5, 1.5, 9)
+        h2 = rng.uniform(0.5, 1.5, 6)
+        tensor1 = discretize.TensorMesh([h1, h1, h1])
+        tensor2 = discretize.TensorMesh([h2, h2, h2], origin=[-1, -1, -1])
+        tree = discretize.TreeMesh([16, 16, 16], origin=[-2, -2, -2])
+        tree.refine_ball([3, 3, 3], 4, -1)
+        for mesh1, mesh2 in [
+            (tensor1, tensor2),
+            (tensor2, tensor1),
+            (tensor1, tree),
+            (tree, tensor2),
+        ]:
+            in_put = rng.random((mesh1.nC, 2))
+            expected = volume_average(mesh1, mesh2) @ in_put
+            for chunk_size in [1, 50, 10**6]:
+                out = volume_average(mesh1, mesh2, in_put, chunk_size=chunk_size)
+                assert_allclose(out, expected)
+
+            # complex values
+            in_put = in_put + 1j * rng.random((mesh1.nC, 2))
+            out = volume_average(mesh1, mesh2, in_put, chunk_size=50)
+            self.assertEqual(out.dtype, np.complex128)
+            assert_allclose(out, volume_average(mesh1, mesh2) @ in_put)
+        with self.assertRaises(ValueError):
+            volume_average(
+                mesh1, mesh2, in_put, output=np.empty((mesh2.nC, 2)), chunk_size=50
+            )
+
+    def test_chunked_memmap(self):
+        mesh1 = discretize.TreeMesh([16, 16])
+        mesh1.refine_ball([0.5, 0.5], 0.2, -1)
+        mesh2 = discretize.TensorMesh([10, 10])
+        in_put = np.random.rand(mesh1.nC)
+        with tempfile.TemporaryDirectory() as tmp:
+            np.save(os.path.join(tmp, "in.npy"), in_put)
+            values = np.load(os.path.join(tmp, "in.npy"), mmap_mode="r")
+            output = np.lib.format.open_memmap(
+                os.path.join(tmp, "out.npy"), mode="w+", shape=(mesh2.nC,)
+            )
+            out = volume_average(mesh1, mesh2, values, output, chunk_size=13)
+            self.assertIs(out, output)
+            assert_allclose(
+                np.load(os.path.join(tmp, "out.npy")),
+                volume_average(mesh1, mesh2, in_put),
+            )
+            del values, output, out
+
+        with self.assertRaises(ValueError):
+            volume_average(mesh1, mesh2, chunk_size=10)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,5 @@
+import gc
+import pickle
 import unittest
 import numpy as np
 import pytest
@@ -274,6 +276,47 @@ class TestCylSymmetricMesh(unittest.TestCase):
         assert np.abs(mag[dist > 0.1].max() - 1) < TOL
         assert np.abs(mag[dist > 0.1].min() - 1) < TOL
 
+    def test_getInterpPlanCartMesh(self):
+        Mr = discretize.TensorMesh([20, 20, 4], x0="CC0")
+        Mc = discretize.CylindricalMesh(
+            [np.ones(10) / 5, 1, 10], x0="0C0", cartesian_origin=[-0.2, -0.2, 0]
+        )
+        rng = np.random.default_rng(48)
+        for location_type, location_type_to in [
+            ("CC", None),
+            ("F", None),
+            ("E", "F"),
+            ("Fx", "Fy"),
+        ]:
+            plan = Mc.get_interpolation_plan_cartesian_mesh(
+                Mr, location_type, location_type_to
+            )
+            # the plan is cached for this mesh and these locations
+            self.assertIs(
+                plan,
+                Mc.get_interpolation_plan_cartesian_mesh(
+                    Mr, location_type, location_type_to
+                ),
+            )
+            P = Mc.get_interpolation_matrix_cartesian_mesh(
+                Mr, location_type, location_type_to
+            )
+            v = rng.random((P.shape[1], 3))
+            np.testing.assert_allclose(plan.apply(v), P @ v)
+
+        Mr2 = discretize.TensorMesh([10, 10, 2], x0="CC0")
+        plan2 = Mc.get_interpolation_plan_cartesian_mesh(Mr2, "CC")
+        self.assertEqual(plan2.shape, (Mr2.n_cells, Mc.n_cells))
+
+        # the plans are released with their target mesh
+        self.assertEqual(len(Mc._cartesian_plans), 2)
+        del Mr2
+        gc.collect()
+        self.assertEqual(len(Mc._cartesian_plans), 1)
+        # and are not pickled
+        Mc2 = pickle.loads(pickle.dumps(Mc))
+        self.assertIsNone(getattr(Mc2, "_cartesian_plans", None))
+
     def test_serialization(self):
         mesh = discretize.CylindricalMesh.deserialize(self.mesh.serialize())
         self.assertTrue(np.all(self.mesh.x0 == mesh.x0))
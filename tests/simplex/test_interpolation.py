@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 import discretize
 from discretize.utils import example_simplex_mesh
 
@@ -494,3 +495,18 @@ def test_zeros_outside():
         outside_point, location_type="nodes", zeros_outside=True
     )
     np.testing.assert_equal(Q2.data, 0)
+
+
+def test_nodes_derivative():
+    points, simplices = example_simplex_mesh((8, 8))
+    mesh = discretize.SimplexMesh(points, simplices)
+    locs = np.random.default_rng(9).random((30, 2))
+
+    slopes = np.r_[1.5, -0.5]
+    values = mesh.nodes @ slopes
+    for axis in range(2):
+        D = mesh.get_interpolation_matrix(locs, "nodes", derivative=axis)
+        np.testing.assert_allclose(D @ values, slopes[axis])
+
+    with pytest.raises(NotImplementedError):
+        mesh.get_interpolation_matrix(locs, "cell_centers", derivative=0)
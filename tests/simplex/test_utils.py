@@ -54,6 +54,28 @@ class SimplexTests(unittest.TestCase):
         inds = mesh.point2index(x)
         np.testing.assert_equal(inds, [16, 5])
 
+    def test_find_containing_many(self):
+        rng = np.random.default_rng(47)
+        for shape in [(9, 7), (5, 6, 4)]:
+            points, simplices = example_simplex_mesh(shape)
+            # perturb the nodes so the simplices are irregular
+            points = points + rng.uniform(-0.02, 0.02, points.shape)
+            mesh = discretize.SimplexMesh(points, simplices)
+            locs = rng.uniform(0.05, 0.95, (500, len(shape)))
+
+            inds = mesh.point2index(locs)
+            transform, shift = mesh.transform_and_shift
+            barys = np.einsum("ijk,ik->ij", transform[inds], locs - shift[inds])
+            barys = np.c_[barys, 1 - barys.sum(axis=1)]
+            self.assertTrue(np.all(barys > -1e-12))
+
+            # locations outside are either extrapolated from a boundary simplex,
+            # or flagged with zeros_outside
+            outside = np.full((2, len(shape)), 1.5)
+            self.assertTrue(np.all(mesh.point2index(outside) >= 0))
+            inds, _ = mesh._find_simplices(outside, zeros_outside=True)
+            np.testing.assert_equal(inds, -1)
+
     def test_pickle2D(self):
         n = 5
         points, simplices = discretize.utils.example_simplex_mesh((n, n))
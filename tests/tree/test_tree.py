@@ -128,6 +128,30 @@ class TestSimpleQuadTree(unittest.TestCase):
         mesh2 = discretize.TreeMesh.deserialize(mesh1.serialize())
         self.assertTrue(np.all(mesh1.x0 == mesh2.x0))
 
+    def test_coarsen_hierarchy(self):
+        mesh = discretize.TreeMesh([32, 32])
+        mesh.refine_ball([[0.5, 0.5]], [0.15], [5])
+        meshes, R, P = mesh.coarsen_hierarchy(10)
+        self.assertEqual(meshes[-1].n_cells, 1)
+        self.assertEqual([m.max_used_level for m in meshes], [5, 4, 3, 2, 1, 0])
+        for fine, coarse, Ri, Pi in zip(meshes[:-1], meshes[1:], R, P):
+            Rc, Pc = Ri["cell_centers"], Pi["cell_centers"]
+            # every coarse cell is a union of fine cells
+            np.testing.assert_allclose((Rc @ Pc).toarray(), np.eye(coarse.n_cells))
+            np.testing.assert_allclose(Pc.T @ fine.cell_volumes, coarse.cell_volumes)
+            for key, n in [("faces", "n_faces"), ("edges", "n_edges")]:
+                self.assertEqual(Pi[key].shape, (getattr(fine, n), getattr(coarse, n)))
+                np.testing.assert_allclose(Pi[key] @ np.ones(Pi[key].shape[1]), 1)
+                np.testing.assert_allclose(Ri[key] @ np.ones(Ri[key].shape[1]), 1)
+            f = lambda x: 1 + 2 * x[:, 0] - x[:, 1]  # NOQA E731
+            np.testing.assert_allclose(Pi["nodes"] @ f(coarse.nodes), f(fine.nodes))
+
+        # coarse levels are balanced like the fine mesh
+        mesh = discretize.TreeMesh([32, 32], diagonal_balance=True)
+        mesh.refine_ball([[0.5, 0.5]], [0.15], [5])
+        meshes, _, _ = mesh.coarsen_hierarchy(2)
+        self.assertTrue(all(m._diagonal_balance for m in meshes))
+
 
 class TestOcTree(unittest.TestCase):
     def test_counts(self):
@@ -210,6 +234,31 @@ class TestOcTree(unittest.TestCase):
         self.assertTrue(len(A_face.data) == 0 or np.allclose(A_face.data, 0))
         self.assertTrue(len(A_edge.data) == 0 or np.allclose(A_edge.data, 0))
 
+    def test_inner_product_plan(self):
+        M = discretize.TreeMesh([8, 8, 8])
+        M.refine_ball([0.5, 0.5, 0.5], 0.2, 3)
+        tensor = 0.1 * np.random.rand(M.nC, 6)
+        tensor[:, :3] += 1
+        models = [np.random.rand(M.nC) + 1, np.random.rand(M.nC, 3) + 1, tensor]
+        for model in models:
+            face_plan = M.get_face_inner_product_plan(model)
+            edge_plan = M.get_edge_inner_product_plan(model)
+            A_face = face_plan.update(model) - M.get_face_inner_product(model)
+            A_edge = edge_plan.update(model) - M.get_edge_inner_product(model)
+            self.assertTrue(len(A_face.data) == 0 or np.allclose(A_face.data, 0))
+            self.assertTrue(len(A_edge.data) == 0 or np.allclose(A_edge.data, 0))
+
+    def test_full_tensor_inner_product(self):
+        M = discretize.TreeMesh([8, 8, 8])
+        M.refine_ball([0.5, 0.5, 0.5], 0.2, 3)
+        tensor = 0.1 * np.random.rand(M.nC, 6)
+        tensor[:, :3] += 1
+        for invert_model in [False, True]:
+            for get_ip in [M.get_face_inner_product, M.get_edge_inner_product]:
+                A = get_ip(tensor, invert_model=invert_model)
+                A -= get_ip(tensor, invert_model=invert_model, do_fast=False)
+                self.assertTrue(len(A.data) == 0 or np.allclose(A.data, 0))
+
     def test_VectorIdenties(self):
         hx, hy, hz = [[(1, 4)], [(1, 4)], [(1, 4)]]
 
@@ -118,6 +118,12 @@ class TestInnerProductsDerivsTensor(unittest.TestCase):
     def test_FaceIP_3D_anisotropic_fast_Tree(self):
         self.assertTrue(self.doTestFace([8, 8, 8], 3, True, "Tree"))
 
+    def test_FaceIP_2D_tensor_fast_Tree(self):
+        self.assertTrue(self.doTestFace([8, 8], 3, True, "Tree"))
+
+    def test_FaceIP_3D_tensor_fast_Tree(self):
+        self.assertTrue(self.doTestFace([8, 8, 8], 6, True, "Tree"))
+
     # def test_EdgeIP_2D_float_Tree(self):
     #     self.assertTrue(self.doTestEdge([8, 8], 0, False, 'Tree'))
     def test_EdgeIP_3D_float_Tree(self):
@@ -158,6 +164,9 @@ class TestInnerProductsDerivsTensor(unittest.TestCase):
     def test_EdgeIP_3D_anisotropic_fast_Tree(self):
         self.assertTrue(self.doTestEdge([8, 8, 8], 3, True, "Tree"))
 
+    def test_EdgeIP_3D_tensor_fast_Tree(self):
+        self.assertTrue(self.doTestEdge([8, 8, 8], 6, True, "Tree"))
+
 
 class TestFacePropertiesInnerProductsDerivsTensor(unittest.TestCase):
     def doTestFace(self, h, rep, meshType, invert_model=False, invert_matrix=False):
@@ -217,6 +217,46 @@ class TestInterpolation3D(discretize.tests.OrderTest):
         self.orderTest()
 
 
+class TestInterpolationDerivative(unittest.TestCase):
+    def test_finite_difference(self):
+        rng = np.random.default_rng(7)
+        h = 1e-6
+        for dim in [2, 3]:
+            mesh = discretize.TreeMesh([16] * dim)
+            mesh.refine_ball([0.5] * dim, 0.25, -1)
+            locs = rng.uniform(0.05, 0.95, (40, dim))
+            for location_type, n in [
+                ("cell_centers", mesh.n_cells),
+                ("nodes", mesh.n_nodes),
+                ("faces_x", mesh.n_faces),
+                ("edges_y", mesh.n_edges),
+            ]:
+                values = rng.random(n)
+                for axis in range(dim):
+                    D = mesh.get_interpolation_matrix(
+                        locs, location_type, derivative=axis
+                    )
+                    loc_p = locs.copy()
+                    loc_p[:, axis] += h
+                    loc_m = locs.copy()
+                    loc_m[:, axis] -= h
+                    fd = (
+                        mesh.get_interpolation_matrix(loc_p, location_type) @ values
+                        - mesh.get_interpolation_matrix(loc_m, location_type) @ values
+                    ) / (2 * h)
+                    np.testing.assert_allclose(D @ values, fd, atol=1e-7)
+
+    def test_nodes_linear_exact(self):
+        mesh = discretize.TreeMesh([16, 16, 16])
+        mesh.refine_ball([0.5, 0.5, 0.5], 0.25, -1)
+        locs = np.random.default_rng(8).random((40, 3))
+        slopes = np.r_[1.0, -2.0, 0.5]
+        values = mesh.nodes @ slopes
+        for axis in range(3):
+            D = mesh.get_interpolation_matrix(locs, "nodes", derivative=axis)
+            np.testing.assert_allclose(D @ values, slopes[axis])
+
+
 class TestCaching(unittest.TestCase):
     def setUp(self):
         self.mesh, maxh = discretize.tests.setup_mesh("uniformTree", 32, 3)